@@ -9,7 +9,7 @@ from produits.models import Categorie, SousCategorie, SousSousCategorie, Produit
 from fournisseur.models import Fournisseur
 from commandes.models import Commande
 from paniers.models import LignePanier
-from django.db.models import Count, Q
+from django.db.models import Count, F, Q
 
 # Create your views here.
 def Home(request):
@@ -17,7 +17,7 @@ def Home(request):
     categories = Categorie.objects.filter(est_active=True).prefetch_related(
         'souscategories__soussouscategories'
     ).annotate(
-        nb_produits=Count('produits', filter=Q(produits__est_actif=True))
+        nb_produits=F('nb_produits_actifs')
     ).order_by('ordre')[:6]  # Top 6 catégories
 
     # Récupérer les fournisseurs avec leurs coordonnées pour la carte
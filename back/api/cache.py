@@ -0,0 +1,110 @@
+"""
+Cache des réponses publiques du catalogue, indexé par version du catalogue
+"""
+import hashlib
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from produits.utils import get_version_catalogue
+
+from .compression import (
+    QUALITE_BROTLI_CACHE,
+    TAILLE_MIN_COMPRESSION,
+    choisir_encodage,
+    compresser,
+    encodages_disponibles,
+)
+
+
+def _empreinte(nom: str, version: int, request) -> str:
+    """
+    Empreinte unique d'une représentation : endpoint + version + paramètres
+
+    Le schéma et l'hôte en font partie : les URL absolues des réponses (images,
+    liens de pagination) sont construites depuis la requête.
+    """
+    params = '&'.join(sorted(request.GET.urlencode().split('&')))
+    brut = f"{request.scheme}://{request.get_host()}|{nom}|{version}|{params}"
+    return hashlib.sha1(brut.encode()).hexdigest()
+
+
+def _etag(empreinte: str, encodage: Optional[str]) -> str:
+    """ETag fort propre à chaque encodage : les octets envoyés diffèrent"""
+    return f'"{empreinte}-{encodage}"' if encodage else f'"{empreinte}"'
+
+
+def _etag_correspond(request, empreinte: str) -> bool:
+    """
+    Vrai si le client a déjà cette représentation, quel que soit l'encodage
+
+    Comparaison faible (W/ ignoré) : un cache intermédiaire qui a décompressé
+    ou recompressé la réponse renvoie un ETag affaibli.
+    """
+    entete = request.META.get('HTTP_IF_NONE_MATCH')
+    if not entete:
+        return False
+    etags = {etag.removeprefix('W/') for etag in parse_etags(entete)}
+    if '*' in etags:
+        return True
+    variantes = {_etag(empreinte, None)} | {_etag(empreinte, e) for e in encodages_disponibles()}
+    return not etags.isdisjoint(variantes)
+
+
+def reponse_catalogue_cachee(request, nom: str, construire) -> HttpResponse:
+    """
+    Sert une représentation JSON du catalogue depuis le cache
+
+    Args:
+        nom: Nom de l'endpoint (préfixe des clés de cache)
+        construire: Fonction sans argument retournant les données à sérialiser,
+            appelée uniquement si la version courante n'est pas en cache
+
+    Le JSON rendu est stocké sous la version courante du catalogue, qui change
+    à chaque sauvegarde/suppression d'un produit, d'une catégorie ou d'un
+    fournisseur, et est partagée par tous les workers (voir
+    produits.utils.cache_catalogue) : aucune invalidation explicite n'est
+    nécessaire. Un client qui renvoie l'ETag reçu dans If-None-Match obtient
+    un 304 sans construire la réponse.
+
+    La variante compressée (brotli ou gzip, selon Accept-Encoding) est stockée
+    à côté du JSON : chaque version du catalogue est compressée une seule fois
+    par encodage, pas à chaque requête.
+    """
+    version = get_version_catalogue()
+    empreinte = _empreinte(nom, version, request)
+    encodage = choisir_encodage(request)
+
+    if _etag_correspond(request, empreinte):
+        response = HttpResponseNotModified()
+        response['ETag'] = _etag(empreinte, encodage)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    timeout = getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 3600)
+    cle = f"catalogue:{nom}:{empreinte}"
+    contenu = cache.get(f"{cle}:{encodage}") if encodage else None
+    if contenu is None:
+        contenu = cache.get(cle)
+        if contenu is None:
+            contenu = JSONRenderer().render(construire())
+            cache.set(cle, contenu, timeout)
+        if encodage and len(contenu) >= TAILLE_MIN_COMPRESSION:
+            contenu = compresser(contenu, encodage, qualite_brotli=QUALITE_BROTLI_CACHE)
+            cache.set(f"{cle}:{encodage}", contenu, timeout)
+        else:
+            encodage = None
+
+    response = HttpResponse(contenu, content_type='application/json')
+    response['ETag'] = _etag(empreinte, encodage)
+    if encodage:
+        response['Content-Encoding'] = encodage
+    patch_vary_headers(response, ('Accept-Encoding',))
+    # Le client garde sa copie mais doit la revalider à chaque utilisation
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,169 @@
+"""
+Compression des réponses JSON de l'API (brotli / gzip)
+
+L'encodage est négocié d'après l'en-tête Accept-Encoding : brotli si le
+client l'accepte et que le module `brotli` est installé, sinon gzip.
+Les réponses du catalogue mises en cache (api.cache) sont compressées une
+seule fois par version du catalogue ; le middleware compresse les autres
+réponses JSON à la volée.
+"""
+import zlib
+from typing import Optional
+
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # brotli absent : gzip uniquement
+    brotli = None
+
+BROTLI = 'br'
+GZIP = 'gzip'
+
+# Réponses plus courtes : la compression ne fait rien gagner
+TAILLE_MIN_COMPRESSION = 200
+
+# Qualité brotli (0-11) : élevée pour les réponses en cache, compressées une
+# seule fois par version du catalogue, rapide pour les réponses à la volée
+QUALITE_BROTLI_CACHE = 9
+QUALITE_BROTLI_VOLEE = 4
+
+TYPES_COMPRESSIBLES = ('application/json', 'application/x-ndjson')
+
+# En flux, le compresseur est vidé tous les TAILLE_BLOC_FLUX octets lus :
+# le client reçoit les lignes au fil de l'eau sans vider à chaque ligne,
+# ce qui dégraderait le taux de compression
+TAILLE_BLOC_FLUX = 16 * 1024
+
+
+def encodages_disponibles():
+    """Encodages supportés par le serveur, par ordre de préférence"""
+    return (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+
+def choisir_encodage(request) -> Optional[str]:
+    """
+    Encodage à utiliser pour répondre à `request`, ou None
+
+    Suit les valeurs q de Accept-Encoding ("gzip;q=0" refuse gzip, "*"
+    accepte tout encodage non cité). À q égal, brotli est préféré.
+    """
+    entete = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if not entete:
+        return None
+
+    qualites = {}
+    for element in entete.split(','):
+        nom, _, parametres = element.strip().partition(';')
+        nom = nom.strip().lower()
+        if not nom:
+            continue
+        q = 1.0
+        parametre, _, valeur = parametres.strip().partition('=')
+        if parametre.strip().lower() == 'q':
+            try:
+                q = float(valeur)
+            except ValueError:
+                q = 0.0
+        qualites[nom] = q
+
+    meilleur, meilleure_q = None, 0.0
+    for encodage in encodages_disponibles():
+        q = qualites.get(encodage, qualites.get('*', 0.0))
+        if q > meilleure_q:
+            meilleur, meilleure_q = encodage, q
+    return meilleur
+
+
+def compresser(contenu: bytes, encodage: str, qualite_brotli: int = QUALITE_BROTLI_VOLEE) -> bytes:
+    """Compresse `contenu` avec l'encodage négocié"""
+    if encodage == BROTLI:
+        return brotli.compress(contenu, mode=brotli.MODE_TEXT, quality=qualite_brotli)
+    if encodage == GZIP:
+        return compress_string(contenu)
+    raise ValueError(f"Encodage non supporté : {encodage}")
+
+
+def _compresser_flux_brotli(morceaux):
+    compresseur = brotli.Compressor(mode=brotli.MODE_TEXT, quality=QUALITE_BROTLI_VOLEE)
+    en_attente = 0
+    for morceau in morceaux:
+        donnees = compresseur.process(morceau)
+        en_attente += len(morceau)
+        if en_attente >= TAILLE_BLOC_FLUX:
+            donnees += compresseur.flush()
+            en_attente = 0
+        if donnees:
+            yield donnees
+    yield compresseur.finish()
+
+
+def _compresser_flux_gzip(morceaux):
+    compresseur = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    en_attente = 0
+    for morceau in morceaux:
+        donnees = compresseur.compress(morceau)
+        en_attente += len(morceau)
+        if en_attente >= TAILLE_BLOC_FLUX:
+            donnees += compresseur.flush(zlib.Z_SYNC_FLUSH)
+            en_attente = 0
+        if donnees:
+            yield donnees
+    yield compresseur.flush()
+
+
+def compresser_flux(morceaux, encodage: str):
+    """Compresse un contenu en flux (StreamingHttpResponse) morceau par morceau"""
+    if encodage == BROTLI:
+        return _compresser_flux_brotli(morceaux)
+    if encodage == GZIP:
+        return _compresser_flux_gzip(morceaux)
+    raise ValueError(f"Encodage non supporté : {encodage}")
+
+
+class CompressionMiddleware:
+    """
+    Compresse les réponses JSON de l'API selon Accept-Encoding
+
+    Les réponses déjà encodées (cache du catalogue, fichiers statiques servis
+    par WhiteNoise) sont laissées telles quelles. Comme GZipMiddleware, un
+    ETag fort devient faible une fois le contenu compressé.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.has_header('Content-Encoding'):
+            return response
+        type_contenu = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if type_contenu not in TYPES_COMPRESSIBLES:
+            return response
+        if response.streaming and response.is_async:
+            return response
+        if not response.streaming and len(response.content) < TAILLE_MIN_COMPRESSION:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodage = choisir_encodage(request)
+        if encodage is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compresser_flux(response.streaming_content, encodage)
+            del response.headers['Content-Length']
+        else:
+            contenu = compresser(response.content, encodage)
+            if len(contenu) >= len(response.content):
+                return response
+            response.content = contenu
+            response.headers['Content-Length'] = str(len(contenu))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encodage
+        return response
@@ -0,0 +1,171 @@
+"""
+Filtres du magasin et comptage des facettes en une seule agrégation
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Max, Min, Q
+from rest_framework.exceptions import ValidationError
+
+
+# Facettes booléennes : ?est_bio=true
+FACETTES_BOOLEENNES = ('est_bio', 'est_local', 'en_promotion', 'est_nouveaute')
+
+# Facettes à valeurs : ?categorie=1,4 (plusieurs valeurs = OU) -> colonne groupée
+FACETTES_VALEURS = {
+    'categorie': 'categorie_id',
+    'souscategorie': 'souscategorie_id',
+    'soussouscategorie': 'soussouscategorie_id',
+    'fournisseur': 'fournisseur_id',
+    'origine': 'origine',
+}
+
+FACETTES_ENTIERES = {'categorie', 'souscategorie', 'soussouscategorie', 'fournisseur'}
+
+_VRAI = {'1', 'true', 'oui'}
+_FAUX = {'0', 'false', 'non'}
+
+
+def _colonne(facette: str) -> str:
+    return FACETTES_VALEURS.get(facette, facette)
+
+
+def lire_filtres(request) -> dict:
+    """
+    Lit les filtres de la requête
+
+    Returns:
+        {facette: valeur} avec un booléen pour les facettes booléennes, un
+        ensemble de valeurs pour les autres, et 'prix_min'/'prix_max' (prix HT)
+    """
+    params = request.query_params
+    filtres = {}
+
+    for facette in FACETTES_BOOLEENNES:
+        valeur = params.get(facette)
+        if valeur is None or valeur == '':
+            continue
+        valeur = valeur.lower()
+        if valeur not in _VRAI | _FAUX:
+            raise ValidationError({facette: 'Valeur attendue : true ou false.'})
+        filtres[facette] = valeur in _VRAI
+
+    for facette in FACETTES_VALEURS:
+        valeur = params.get(facette)
+        if not valeur:
+            continue
+        valeurs = [v.strip() for v in valeur.split(',') if v.strip()]
+        if facette in FACETTES_ENTIERES:
+            try:
+                valeurs = [int(v) for v in valeurs]
+            except ValueError:
+                raise ValidationError({facette: 'Identifiants entiers attendus.'})
+        filtres[facette] = set(valeurs)
+
+    for borne in ('prix_min', 'prix_max'):
+        valeur = params.get(borne)
+        if not valeur:
+            continue
+        try:
+            filtres[borne] = Decimal(valeur)
+        except InvalidOperation:
+            raise ValidationError({borne: 'Nombre attendu.'})
+
+    return filtres
+
+
+def _filtre_prix(filtres: dict) -> Q:
+    condition = Q()
+    if 'prix_min' in filtres:
+        condition &= Q(prix_ht__gte=filtres['prix_min'])
+    if 'prix_max' in filtres:
+        condition &= Q(prix_ht__lte=filtres['prix_max'])
+    return condition
+
+
+def filtrer_produits(queryset, filtres: dict):
+    """Applique tous les filtres au queryset"""
+    condition = _filtre_prix(filtres)
+    for facette, valeur in filtres.items():
+        if facette in FACETTES_BOOLEENNES:
+            condition &= Q(**{facette: valeur})
+        elif facette in FACETTES_VALEURS:
+            condition &= Q(**{f'{_colonne(facette)}__in': valeur})
+    return queryset.filter(condition)
+
+
+def _satisfait(combinaison: dict, facette: str, valeur) -> bool:
+    if facette in FACETTES_BOOLEENNES:
+        return combinaison[facette] == valeur
+    return combinaison[_colonne(facette)] in valeur
+
+
+def _formater_prix(prix):
+    return None if prix is None else str(Decimal(prix).quantize(Decimal('0.01')))
+
+
+def calculer_facettes(queryset, filtres: dict) -> dict:
+    """
+    Compte les produits par valeur de chaque facette en une seule requête
+
+    Les produits sont groupés par combinaison de toutes les facettes
+    (GROUP BY est_bio, est_local, ..., categorie_id, fournisseur_id, origine),
+    puis les comptes sont cumulés ici. Le compte d'une facette applique tous
+    les filtres sauf le sien : cocher "bio" n'efface pas le compte des
+    produits non bio, comme dans toute navigation à facettes.
+
+    Le filtre de prix s'applique à toutes les facettes ; la facette 'prix'
+    donne le prix HT minimum et maximum des produits retenus.
+    """
+    colonnes = list(FACETTES_BOOLEENNES) + list(FACETTES_VALEURS.values())
+    combinaisons = (
+        queryset.filter(_filtre_prix(filtres))
+        .order_by()
+        .values(*colonnes)
+        .annotate(total=Count('pk'), prix_min=Min('prix_ht'), prix_max=Max('prix_ht'))
+    )
+
+    filtres_facettes = [
+        (facette, valeur) for facette, valeur in filtres.items()
+        if facette in FACETTES_BOOLEENNES or facette in FACETTES_VALEURS
+    ]
+    comptes = {facette: {} for facette in (*FACETTES_BOOLEENNES, *FACETTES_VALEURS)}
+    total = 0
+    prix_min = prix_max = None
+
+    for combinaison in combinaisons:
+        echecs = [facette for facette, valeur in filtres_facettes if not _satisfait(combinaison, facette, valeur)]
+        if len(echecs) > 1:
+            continue
+
+        for facette, compte in comptes.items():
+            # Une combinaison qui échoue sur une seule facette compte pour celle-ci uniquement
+            if echecs and echecs[0] != facette:
+                continue
+            valeur = combinaison[_colonne(facette)]
+            if valeur is None or valeur == '':
+                continue
+            compte[valeur] = compte.get(valeur, 0) + combinaison['total']
+
+        if not echecs:
+            total += combinaison['total']
+            if prix_min is None or combinaison['prix_min'] < prix_min:
+                prix_min = combinaison['prix_min']
+            if prix_max is None or combinaison['prix_max'] > prix_max:
+                prix_max = combinaison['prix_max']
+
+    facettes = {
+        facette: {'true': comptes[facette].get(True, 0), 'false': comptes[facette].get(False, 0)}
+        for facette in FACETTES_BOOLEENNES
+    }
+    for facette in FACETTES_VALEURS:
+        facettes[facette] = [
+            {'valeur': valeur, 'count': compte}
+            for valeur, compte in sorted(comptes[facette].items(), key=lambda item: (-item[1], str(item[0])))
+        ]
+    # Même format que les prix sérialisés ("12.50")
+    facettes['prix'] = {
+        'min': _formater_prix(prix_min),
+        'max': _formater_prix(prix_max),
+    }
+
+    return {'total': total, 'facettes': facettes}
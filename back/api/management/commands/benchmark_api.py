@@ -0,0 +1,431 @@
+"""
+Command Django de benchmark des endpoints de l'API sur un jeu de données généré
+
+Crée hors ligne N fournisseurs, produits (image synthétique générée en local),
+clients avec panier actif et commandes, livreurs avec tarifs et points relais,
+puis mesure pour chaque endpoint les percentiles de latence et le nombre de
+requêtes SQL. Le rapport JSON peut être comparé à celui d'un autre commit.
+
+Les données sont créées dans une transaction annulée à la fin : la base n'est
+pas modifiée (sauf avec --conserver).
+
+Usage:
+  python manage.py benchmark_api
+  python manage.py benchmark_api --produits 5000 --clients 100 --iterations 100
+  python manage.py benchmark_api --sans-cache
+  python manage.py benchmark_api --rapport avant.json
+  python manage.py benchmark_api --rapport apres.json --comparer avant.json
+"""
+
+import json
+import platform
+import random
+import subprocess
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client as ClientHttp, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from PIL import Image
+
+from clients.models import Client
+from commandes.models import Commande
+from fournisseur.models import Fournisseur
+from livraisons.models import Livreur, PointRelais, Tarif
+from livraisons.tarifs import invalider_index_tarifs
+from paniers.models import LignePanier, Panier, prix_figes, recalculer_totaux_paniers
+from produits.models import Categorie, Produit, SousCategorie, SousSousCategorie, recalculer_compteurs_produits
+from produits.utils import incrementer_version_catalogue
+from produits.utils.product_icons import get_smart_product_icon
+
+# Centre du jeu de points relais (Montpellier) et rayon de dispersion en degrés
+CENTRE_POINTS_RELAIS = (43.6108, 3.8767)
+DISPERSION_POINTS_RELAIS = 0.5
+
+NOMS_PRODUITS = (
+    'Pommes golden', 'Poires williams', 'Tomates cerises', 'Carottes fanes',
+    'Miel de lavande', 'Huile d\'olive vierge', 'Fromage de chèvre', 'Pain de campagne',
+    'Confiture d\'abricot', 'Vin rouge du Languedoc', 'Oeufs fermiers', 'Salade batavia',
+)
+ORIGINES = ('France', 'Espagne', 'Italie', 'Occitanie', 'Provence')
+STATUTS_COMMANDES = ('en_attente', 'en_cours', 'en_livraison', 'terminee', 'annulee')
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class _Annulation(Exception):
+    """Levée pour annuler la transaction contenant le jeu de données"""
+
+
+def _percentile(valeurs_triees, p: float) -> float:
+    """Percentile par interpolation linéaire sur une liste triée"""
+    if len(valeurs_triees) == 1:
+        return valeurs_triees[0]
+    rang = (len(valeurs_triees) - 1) * p / 100
+    bas = int(rang)
+    haut = min(bas + 1, len(valeurs_triees) - 1)
+    return valeurs_triees[bas] + (valeurs_triees[haut] - valeurs_triees[bas]) * (rang - bas)
+
+
+def _commit_courant():
+    try:
+        sortie = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return sortie.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = 'Mesure latence et requêtes SQL des endpoints de l\'API sur un jeu de données généré'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fournisseurs', type=int, default=20, help='Nombre de fournisseurs (défaut: 20)')
+        parser.add_argument('--produits', type=int, default=2000, help='Nombre de produits (défaut: 2000)')
+        parser.add_argument('--clients', type=int, default=50, help='Nombre de clients (défaut: 50)')
+        parser.add_argument(
+            '--lignes-panier', type=int, default=10,
+            help='Lignes par panier et par commande (défaut: 10)'
+        )
+        parser.add_argument('--commandes', type=int, default=5, help='Commandes par client (défaut: 5)')
+        parser.add_argument('--livreurs', type=int, default=10, help='Nombre de livreurs (défaut: 10)')
+        parser.add_argument('--points-relais', type=int, default=500, help='Nombre de points relais (défaut: 500)')
+        parser.add_argument(
+            '--iterations', type=int, default=50,
+            help='Appels mesurés par endpoint, après un premier appel mesuré à part (défaut: 50)'
+        )
+        parser.add_argument('--graine', type=int, default=42, help='Graine du générateur aléatoire (défaut: 42)')
+        parser.add_argument(
+            '--rapport', default='benchmark_api.json',
+            help='Fichier JSON du rapport (défaut: benchmark_api.json)'
+        )
+        parser.add_argument('--comparer', help='Rapport JSON précédent à comparer avec celui-ci')
+        parser.add_argument(
+            '--sans-cache', action='store_true',
+            help='Vider le cache avant chaque appel (mesure la construction des réponses du catalogue)'
+        )
+        parser.add_argument(
+            '--conserver', action='store_true',
+            help='Conserver le jeu de données en base au lieu d\'annuler la transaction'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations doit être supérieur ou égal à 1')
+
+        precedent = None
+        if options['comparer']:
+            try:
+                with open(options['comparer'], encoding='utf-8') as fichier:
+                    precedent = json.load(fichier)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Rapport à comparer illisible : {e}')
+
+        random.seed(options['graine'])
+        chemin_image = None
+        try:
+            with transaction.atomic():
+                debut = time.perf_counter()
+                donnees = self._generer(options)
+                chemin_image = donnees['image']
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ Jeu de données créé en {time.perf_counter() - debut:.1f} s'
+                ))
+
+                resultats = self._mesurer(donnees, options['iterations'], options['sans_cache'])
+                if not options['conserver']:
+                    raise _Annulation()
+        except _Annulation:
+            pass
+        finally:
+            if chemin_image and not options['conserver']:
+                default_storage.delete(chemin_image)
+            # Les réponses mises en cache décrivent un catalogue qui n'existe plus
+            incrementer_version_catalogue()
+
+        rapport = {
+            'date': timezone.now().isoformat(),
+            'commit': _commit_courant(),
+            'environnement': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'base': connection.vendor,
+            },
+            'parametres': {
+                cle: options[cle] for cle in (
+                    'fournisseurs', 'produits', 'clients', 'lignes_panier', 'commandes',
+                    'livreurs', 'points_relais', 'iterations', 'graine', 'sans_cache',
+                )
+            },
+            'endpoints': resultats,
+        }
+        with open(options['rapport'], 'w', encoding='utf-8') as fichier:
+            json.dump(rapport, fichier, indent=2, ensure_ascii=False)
+
+        self._afficher(resultats, precedent)
+        self.stdout.write(self.style.SUCCESS(f'✓ Rapport écrit dans {options["rapport"]}'))
+
+    # ===========================
+    # JEU DE DONNÉES
+    # ===========================
+
+    def _generer(self, options) -> dict:
+        self.stdout.write(self.style.HTTP_INFO('🌱 Génération du jeu de données...'))
+        suffixe = uuid.uuid4().hex[:8]
+        mot_de_passe = make_password('benchmark')
+
+        image = self._image_synthetique(suffixe)
+
+        categories = Categorie.objects.bulk_create([
+            Categorie(nom=f'Bench {suffixe} catégorie {i}', slug=f'bench-{suffixe}-categorie-{i}', ordre=i)
+            for i in range(8)
+        ])
+        souscategories = SousCategorie.objects.bulk_create([
+            SousCategorie(categorie=categorie, nom=f'Sous-catégorie {j}', slug=f'bench-{suffixe}-{categorie.ordre}-{j}')
+            for categorie in categories for j in range(4)
+        ])
+        soussouscategories = SousSousCategorie.objects.bulk_create([
+            SousSousCategorie(souscategorie=souscategorie, nom=f'Sous-sous-catégorie {k}', slug=f'bench-{suffixe}-{k}')
+            for souscategorie in souscategories for k in range(3)
+        ])
+
+        fournisseurs = Fournisseur.objects.bulk_create([
+            Fournisseur(
+                nom=f'Ferme {i}', prenom='Benchmark', password=mot_de_passe,
+                email=f'bench-{suffixe}-fournisseur-{i}@example.fr', metier='Producteur',
+                contact='Benchmark', tel='0600000000', adresse=f'{i} chemin des Vignes',
+                code_postal='34000', ville='Montpellier',
+            )
+            for i in range(options['fournisseurs'])
+        ])
+        self.stdout.write(f'  • {len(fournisseurs)} fournisseur(s), {len(soussouscategories)} sous-sous-catégorie(s)')
+
+        produits = []
+        for i in range(options['produits']):
+            soussouscategorie = random.choice(soussouscategories)
+            souscategorie = soussouscategorie.souscategorie
+            nom = f'{random.choice(NOMS_PRODUITS)} {i}'
+            description = f'{nom} de nos producteurs, récolte de saison'
+            en_promotion = random.random() < 0.2
+            produits.append(Produit(
+                numero_unique=f'BENCH-{suffixe}-{i}',
+                slug=f'bench-{suffixe}-{i}',
+                nom=nom,
+                description_courte=description,
+                description_longue=description * 5,
+                icone_produit=get_smart_product_icon(nom, description),
+                categorie=souscategorie.categorie,
+                souscategorie=souscategorie,
+                soussouscategorie=soussouscategorie,
+                image_principale=image,
+                prix_ht=Decimal(random.randint(50, 5000)) / 100,
+                tva=Decimal('5.50'),
+                stock_actuel=random.randint(0, 200),
+                en_promotion=en_promotion,
+                pourcentage_promotion=Decimal('10.00') if en_promotion else Decimal('0.00'),
+                est_bio=random.random() < 0.3,
+                est_local=random.random() < 0.5,
+                poids=Decimal(random.randint(1, 300)) / 100,
+                fournisseur=random.choice(fournisseurs) if fournisseurs else None,
+                origine=random.choice(ORIGINES),
+            ))
+        produits = Produit.objects.bulk_create(produits, batch_size=1000)
+        recalculer_compteurs_produits()
+        self.stdout.write(f'  • {len(produits)} produit(s)')
+
+        expiration = timezone.now() + timedelta(days=1)
+        clients = Client.objects.bulk_create([
+            Client(
+                username=f'bench-{suffixe}-{i}', email=f'bench-{suffixe}-client-{i}@example.fr',
+                password=mot_de_passe, nom='Benchmark', prenom=f'Client {i}',
+                session_token=uuid.uuid4().hex, token_expiration=expiration,
+            )
+            for i in range(options['clients'])
+        ])
+
+        paniers_actifs = [Panier(client=client, statut='actif') for client in clients]
+        paniers_commandes = [
+            Panier(client=client, statut='termine')
+            for client in clients for _ in range(options['commandes'])
+        ]
+        paniers = Panier.objects.bulk_create(paniers_actifs + paniers_commandes)
+
+        nb_lignes = min(options['lignes_panier'], len(produits))
+        LignePanier.objects.bulk_create([
+            LignePanier(panier=panier, produit=produit, quantite=random.randint(1, 5), **prix_figes(produit))
+            for panier in paniers for produit in random.sample(produits, nb_lignes)
+        ], batch_size=1000)
+        recalculer_totaux_paniers(panier.pk for panier in paniers)
+
+        livreurs = Livreur.objects.bulk_create([
+            Livreur(
+                nom=f'Transport {i}', telephone='0400000000',
+                email=f'bench-{suffixe}-livreur-{i}@example.fr',
+                type_service='express' if i % 3 == 0 else 'standard',
+            )
+            for i in range(options['livreurs'])
+        ])
+        Tarif.objects.bulk_create([
+            Tarif(
+                livreur=livreur, poids_min=Decimal(borne) + Decimal('0.01'), poids_max=Decimal(borne + 5),
+                prix_ht=Decimal(5 + borne), prix_ttc=Decimal(5 + borne) * Decimal('1.20'),
+            )
+            for livreur in livreurs for borne in range(0, 50, 5)
+        ])
+        invalider_index_tarifs()
+
+        Commande.objects.bulk_create([
+            Commande(
+                client=panier.client, panier=panier, livreur=random.choice(livreurs) if livreurs else None,
+                numero_commande=f'BENCH-{suffixe}-{i}', statut=random.choice(STATUTS_COMMANDES),
+                total=Decimal(random.randint(1000, 20000)) / 100,
+            )
+            for i, panier in enumerate(paniers_commandes)
+        ], batch_size=1000)
+        self.stdout.write(
+            f'  • {len(clients)} client(s), {len(paniers_commandes)} commande(s), '
+            f'{nb_lignes} ligne(s) par panier'
+        )
+
+        latitude, longitude = CENTRE_POINTS_RELAIS
+        points_relais = [
+            PointRelais(
+                nom=f'Relais {i}', adresse=f'{i} rue du Commerce', code_postal='34000', ville='Montpellier',
+                latitude=Decimal(latitude + random.uniform(-1, 1) * DISPERSION_POINTS_RELAIS).quantize(Decimal('0.000001')),
+                longitude=Decimal(longitude + random.uniform(-1, 1) * DISPERSION_POINTS_RELAIS).quantize(Decimal('0.000001')),
+            )
+            for i in range(options['points_relais'])
+        ]
+        PointRelais.objects.bulk_create(points_relais, batch_size=1000)
+        self.stdout.write(f'  • {len(livreurs)} livreur(s), {options["points_relais"]} point(s) relais')
+
+        # Les réponses du catalogue en cache ne doivent pas servir l'ancien catalogue
+        incrementer_version_catalogue()
+        cache.clear()
+
+        return {'image': image, 'clients': clients, 'centre': CENTRE_POINTS_RELAIS}
+
+    @staticmethod
+    def _image_synthetique(suffixe: str) -> str:
+        """Enregistre une image PNG générée localement, partagée par tous les produits"""
+        image = Image.new('RGB', (400, 400))
+        image.putdata([(x % 256, y % 256, (x + y) % 256) for y in range(400) for x in range(400)])
+        tampon = BytesIO()
+        image.save(tampon, format='PNG')
+        return default_storage.save(f'benchmark/produit-{suffixe}.png', ContentFile(tampon.getvalue()))
+
+    # ===========================
+    # MESURES
+    # ===========================
+
+    def _scenarios(self, donnees):
+        """(nom, fonction exécutant un appel et retournant la réponse)"""
+        http = ClientHttp(raise_request_exception=False)
+        client = donnees['clients'][0] if donnees['clients'] else None
+        entetes = {'HTTP_AUTHORIZATION': f'Token {client.session_token}'} if client else {}
+        latitude, longitude = donnees['centre']
+
+        scenarios = [
+            ('magasin', lambda: http.get('/api/magasin/')),
+            ('categories', lambda: http.get('/api/categories/')),
+            ('livreurs', lambda: http.get('/api/livreur/')),
+        ]
+        if client is None:
+            return scenarios
+
+        scenarios += [
+            ('panier', lambda: http.get(f'/api/{client.pk}/panier/', **entetes)),
+            ('commandes', lambda: http.get(f'/api/{client.pk}/commandes/', **entetes)),
+        ]
+
+        corps = json.dumps({'latitude': latitude, 'longitude': longitude})
+        try:
+            url = reverse('points_relais_proches', args=[client.pk])
+            scenarios.append((
+                'points_relais_proches',
+                lambda: http.post(url, corps, content_type='application/json', **entetes)
+            ))
+        except NoReverseMatch:
+            # Vue non routée dans ce projet : appelée directement, sans middleware
+            from livraisons.views import points_relais_proches
+            fabrique = RequestFactory()
+            entete_vue = {'HTTP_AUTHORIZATION': client.session_token}
+
+            def appeler():
+                requete = fabrique.post('/', corps, content_type='application/json', **entete_vue)
+                return points_relais_proches(requete, client.pk)
+
+            scenarios.append(('points_relais_proches', appeler))
+        return scenarios
+
+    def _mesurer(self, donnees, iterations: int, sans_cache: bool) -> dict:
+        self.stdout.write(self.style.HTTP_INFO(f'⏱️  Mesure des endpoints ({iterations} appel(s) chacun)'))
+        resultats = {}
+        for nom, appeler in self._scenarios(donnees):
+            # Premier appel à part : il remplit les caches (catalogue, connexions)
+            with CaptureQueriesContext(connection) as requetes:
+                debut = time.perf_counter()
+                reponse = appeler()
+                premier = time.perf_counter() - debut
+
+            durees, nb_requetes = [], []
+            for _ in range(iterations):
+                if sans_cache:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as requetes_appel:
+                    debut = time.perf_counter()
+                    reponse = appeler()
+                    durees.append(time.perf_counter() - debut)
+                nb_requetes.append(len(requetes_appel))
+
+            durees.sort()
+            resultats[nom] = {
+                'statut': reponse.status_code,
+                'taille_octets': len(reponse.content),
+                'premier_appel': {
+                    'latence_ms': round(premier * 1000, 2),
+                    'requetes_sql': len(requetes),
+                },
+                'latence_ms': {
+                    **{f'p{p}': round(_percentile(durees, p) * 1000, 2) for p in PERCENTILES},
+                    'min': round(durees[0] * 1000, 2),
+                    'max': round(durees[-1] * 1000, 2),
+                    'moyenne': round(sum(durees) / len(durees) * 1000, 2),
+                },
+                'requetes_sql': {'min': min(nb_requetes), 'max': max(nb_requetes)},
+            }
+        return resultats
+
+    def _afficher(self, resultats: dict, precedent) -> None:
+        anciens = (precedent or {}).get('endpoints', {})
+        for nom, resultat in resultats.items():
+            latence = resultat['latence_ms']
+            ligne = (
+                f'  • {nom:<22} {resultat["statut"]}  '
+                f'p50 {latence["p50"]:>8.2f} ms  p95 {latence["p95"]:>8.2f} ms  '
+                f'SQL {resultat["requetes_sql"]["max"]:>3} (1er appel {resultat["premier_appel"]["requetes_sql"]})'
+            )
+            ancien = anciens.get(nom)
+            if ancien:
+                ecart = latence['p50'] - ancien['latence_ms']['p50']
+                ecart_sql = resultat['requetes_sql']['max'] - ancien['requetes_sql']['max']
+                ligne += f'  [p50 {ecart:+.2f} ms, SQL {ecart_sql:+d}]'
+            if resultat['statut'] >= 400:
+                self.stdout.write(self.style.WARNING(ligne))
+            else:
+                self.stdout.write(ligne)
@@ -0,0 +1,146 @@
+"""
+Command Django pour comparer ProduitSerializer et la lecture rapide des listes
+
+Mesure, pour la représentation compacte et la représentation complète, le
+temps de lecture + sérialisation de N produits avec DRF puis avec
+ProduitLectureRapide, puis celui de N lignes de panier avec le produit
+imbriqué (LignePanierSerializer) et en représentation compacte
+(LignePanierCompacteSerializer). Les produits manquants sont créés dans une
+transaction annulée à la fin : la base n'est pas modifiée.
+
+Usage:
+  python manage.py benchmark_serialisation
+  python manage.py benchmark_serialisation --nombre 5000 --repetitions 5
+"""
+
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.serializers import (
+    CHAMPS_PRODUIT_COMPACT,
+    COLONNES_PRODUIT_LIGNE,
+    LignePanierCompacteSerializer,
+    LignePanierSerializer,
+    ProduitLectureRapide,
+    ProduitSerializer,
+)
+from api.projection import projeter_produits
+from paniers.models import LignePanier, prix_figes
+from produits.models import Produit
+
+
+class _Annulation(Exception):
+    """Levée pour annuler la transaction contenant les produits de test"""
+
+
+class Command(BaseCommand):
+    help = 'Compare le temps de sérialisation des listes de produits (DRF / lecture rapide)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nombre',
+            type=int,
+            default=5000,
+            help='Nombre de produits sérialisés (défaut: 5000)'
+        )
+        parser.add_argument(
+            '--repetitions',
+            type=int,
+            default=3,
+            help='Nombre de mesures, la meilleure est retenue (défaut: 3)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._mesurer(options['nombre'], options['repetitions'])
+                raise _Annulation()
+        except _Annulation:
+            pass
+
+    def _mesurer(self, nombre, repetitions):
+        manquants = nombre - Produit.objects.count()
+        if manquants > 0:
+            self.stdout.write(f'  • Création temporaire de {manquants} produit(s)...')
+            self._creer_produits(manquants)
+
+        produits = Produit.objects.order_by('-date_creation', 'pk')[:nombre]
+
+        self.stdout.write(self.style.HTTP_INFO(f'⏱️  Sérialisation de {nombre} produits'))
+        for libelle, champs in (('compacte', CHAMPS_PRODUIT_COMPACT), ('complète', None)):
+            duree_drf = self._meilleur_temps(
+                lambda: ProduitSerializer(
+                    produits.select_related('fournisseur'), many=True, champs=champs
+                ).data,
+                repetitions
+            )
+            rapide = ProduitLectureRapide(champs)
+            duree_rapide = self._meilleur_temps(lambda: rapide.serialiser(produits), repetitions)
+
+            self.stdout.write(
+                f'  • Représentation {libelle}: DRF {duree_drf * 1000:.0f} ms, '
+                f'lecture rapide {duree_rapide * 1000:.0f} ms '
+                f'(x{duree_drf / duree_rapide:.1f})'
+            )
+
+        self._mesurer_lignes(produits, repetitions)
+
+    def _mesurer_lignes(self, produits, repetitions):
+        # Lignes non enregistrées : seule la sérialisation est mesurée, chaque
+        # représentation avec les colonnes produit qu'elle lit en production
+        prix = [prix_figes(produit) for produit in produits]
+
+        def construire_lignes(queryset):
+            return [
+                LignePanier(produit=produit, quantite=i % 5 + 1, **prix[i])
+                for i, produit in enumerate(queryset)
+            ]
+
+        lignes_completes = construire_lignes(projeter_produits(produits, CHAMPS_PRODUIT_COMPACT))
+        lignes_compactes = construire_lignes(produits.only(*COLONNES_PRODUIT_LIGNE))
+
+        self.stdout.write(self.style.HTTP_INFO(f'⏱️  Sérialisation de {len(lignes_completes)} lignes de panier'))
+        duree_completes = self._meilleur_temps(
+            lambda: LignePanierSerializer(lignes_completes, many=True).data, repetitions
+        )
+        duree_compactes = self._meilleur_temps(
+            lambda: LignePanierCompacteSerializer(lignes_compactes, many=True).data, repetitions
+        )
+        self.stdout.write(
+            f'  • Lignes: produit imbriqué {duree_completes * 1000:.0f} ms, '
+            f'compactes {duree_compactes * 1000:.0f} ms '
+            f'(x{duree_completes / duree_compactes:.1f})'
+        )
+
+    @staticmethod
+    def _meilleur_temps(fonction, repetitions) -> float:
+        durees = []
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            fonction()
+            durees.append(time.perf_counter() - debut)
+        return min(durees)
+
+    @staticmethod
+    def _creer_produits(nombre):
+        produits = []
+        for i in range(nombre):
+            suffixe = uuid.uuid4().hex[:12]
+            produits.append(Produit(
+                numero_unique=f'BENCH-{suffixe}',
+                slug=f'bench-{suffixe}',
+                nom=f'Produit de test {i}',
+                description_courte='Pommes golden du verger',
+                description_longue='Description détaillée ' * 20,
+                icone_produit='🍎',
+                prix_ht=Decimal('2.35'),
+                tva=Decimal('5.50'),
+                stock_actuel=i % 50,
+                en_promotion=i % 3 == 0,
+                pourcentage_promotion=Decimal('10.00') if i % 3 == 0 else Decimal('0.00'),
+            ))
+        Produit.objects.bulk_create(produits, batch_size=1000)
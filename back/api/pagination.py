@@ -0,0 +1,166 @@
+"""
+Pagination et streaming des listes volumineuses de l'API (catalogue, commandes)
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# ===================================
+# PAGINATION PAR CURSEUR (KEYSET)
+# ===================================
+
+class KeysetPagination:
+    """
+    Pagination par curseur sur la clé stable (-<champ_date>, pk)
+
+    Contrairement à LIMIT/OFFSET, chaque page est lue avec un simple
+    WHERE sur la clé : le coût d'une page ne dépend pas de sa position
+    et un objet ajouté pendant la navigation ne décale pas les pages.
+
+    Paramètres de requête :
+        cursor: curseur opaque renvoyé dans le champ `next`
+        page_size: taille de page (bornée par `max_page_size`)
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 200
+    champ_date = 'date_creation'
+
+    @property
+    def ordering(self):
+        return (f'-{self.champ_date}', 'pk')
+
+    def est_demandee(self, request) -> bool:
+        """La pagination est activée dès qu'un curseur ou une taille de page est fourni"""
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_page_size(self, request) -> int:
+        valeur = request.query_params.get(self.page_size_query_param)
+        if valeur is None:
+            return self.page_size
+        try:
+            taille = int(valeur)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Doit être un entier.'})
+        if taille <= 0:
+            raise ValidationError({self.page_size_query_param: 'Doit être strictement positif.'})
+        return min(taille, self.max_page_size)
+
+    def encoder_curseur(self, obj) -> str:
+        # Accepte une instance ou une ligne values() contenant champ_date et id
+        if isinstance(obj, dict):
+            date, pk = obj[self.champ_date], obj['id']
+        else:
+            date, pk = getattr(obj, self.champ_date), obj.pk
+        brut = f"{date.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(brut.encode()).decode()
+
+    def decoder_curseur(self, curseur: str):
+        try:
+            brut = base64.urlsafe_b64decode(curseur.encode()).decode()
+            date_str, pk_str = brut.rsplit('|', 1)
+            date = parse_datetime(date_str)
+            pk = int(pk_str)
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError({self.cursor_query_param: 'Curseur invalide.'})
+        if date is None:
+            raise ValidationError({self.cursor_query_param: 'Curseur invalide.'})
+        return date, pk
+
+    def paginate_queryset(self, queryset, request) -> list:
+        """Retourne les objets de la page demandée (page_size + 1 lus pour détecter la suite)"""
+        self.request = request
+        taille = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        curseur = request.query_params.get(self.cursor_query_param)
+        if curseur:
+            date, pk = self.decoder_curseur(curseur)
+            queryset = queryset.filter(
+                Q(**{f'{self.champ_date}__lt': date})
+                | Q(**{self.champ_date: date, 'pk__gt': pk})
+            )
+
+        objets = list(queryset[:taille + 1])
+        self.a_suivant = len(objets) > taille
+        objets = objets[:taille]
+        self.dernier = objets[-1] if objets else None
+        return objets
+
+    def get_next_link(self):
+        if not self.a_suivant or self.dernier is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encoder_curseur(self.dernier))
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_data(self, data) -> dict:
+        return {
+            'next': self.get_next_link(),
+            'first': self.get_first_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data) -> Response:
+        return Response(self.get_paginated_data(data))
+
+
+class CatalogueKeysetPagination(KeysetPagination):
+    """Pages du catalogue, des produits les plus récents aux plus anciens"""
+    page_size = getattr(settings, 'CATALOGUE_PAGE_SIZE', 50)
+    max_page_size = getattr(settings, 'CATALOGUE_MAX_PAGE_SIZE', 200)
+    champ_date = 'date_creation'
+
+
+class CommandesKeysetPagination(KeysetPagination):
+    """Pages des commandes d'un client, des plus récentes aux plus anciennes"""
+    page_size = getattr(settings, 'COMMANDES_PAGE_SIZE', 20)
+    max_page_size = getattr(settings, 'COMMANDES_MAX_PAGE_SIZE', 100)
+    champ_date = 'date_commande'
+
+
+# ===================================
+# STREAMING NDJSON
+# ===================================
+
+def streaming_demande(request) -> bool:
+    """Le mode streaming est opt-in via ?stream=ndjson"""
+    return request.query_params.get('stream') == 'ndjson'
+
+
+def reponse_ndjson(queryset, representer, chunk_size: int = 500) -> StreamingHttpResponse:
+    """
+    Écrit les objets un par un (une ligne JSON par objet) au fil de la lecture en base
+
+    Args:
+        representer: fonction objet -> dict (ex: serializer.to_representation)
+
+    `iterator()` lit le queryset par blocs sans remplir le cache du queryset :
+    la mémoire reste constante quelle que soit la taille du catalogue et le
+    premier octet part avant que la requête ait fini d'être consommée.
+    """
+    def generer():
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield json.dumps(
+                representer(obj),
+                cls=JSONEncoder,
+                ensure_ascii=False
+            ) + '\n'
+
+    return StreamingHttpResponse(generer(), content_type='application/x-ndjson')
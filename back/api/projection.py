@@ -0,0 +1,61 @@
+"""
+Sélection des champs produits renvoyés par l'API (?fields= / ?view=)
+et projection correspondante des requêtes SQL
+"""
+from typing import List, Optional
+
+from rest_framework.exceptions import ValidationError
+
+from .serializers import CHAMPS_PRODUIT_COMPACT, COLONNES_CHAMPS_PRODUIT, ProduitSerializer
+
+VUE_COMPACTE = 'compact'
+VUE_COMPLETE = 'complet'
+
+
+def champs_produit_demandes(request, par_defaut: Optional[List[str]] = CHAMPS_PRODUIT_COMPACT) -> Optional[List[str]]:
+    """
+    Champs produits à sérialiser pour cette requête
+
+    - ?fields=id,nom,prix_ht : uniquement ces champs
+    - ?view=compact : représentation compacte (CHAMPS_PRODUIT_COMPACT)
+    - ?view=complet : tous les champs (None)
+    - sinon : `par_defaut`
+    """
+    params = request.query_params
+    if params.get('fields'):
+        champs = [champ.strip() for champ in params['fields'].split(',') if champ.strip()]
+        inconnus = set(champs) - set(ProduitSerializer().fields)
+        if inconnus:
+            raise ValidationError({'fields': f"Champs inconnus : {', '.join(sorted(inconnus))}"})
+        return champs
+
+    vue = params.get('view')
+    if vue == VUE_COMPACTE:
+        return CHAMPS_PRODUIT_COMPACT
+    if vue == VUE_COMPLETE:
+        return None
+    if vue:
+        raise ValidationError({'view': f"Valeurs possibles : {VUE_COMPACTE}, {VUE_COMPLETE}"})
+    return par_defaut
+
+
+def projeter_produits(queryset, champs: Optional[List[str]]):
+    """
+    Limite le SELECT aux colonnes nécessaires pour sérialiser `champs`
+
+    La clé de pagination (date_creation, pk) est toujours lue. Les jointures
+    sont recalculées : seul le fournisseur est joint, et seulement si son nom
+    est demandé.
+    """
+    if champs is None:
+        return queryset
+
+    colonnes = {'id', 'date_creation'}
+    for champ in champs:
+        colonnes.update(COLONNES_CHAMPS_PRODUIT.get(champ, [champ]))
+
+    relations = {colonne.split('__')[0] for colonne in colonnes if '__' in colonne}
+    queryset = queryset.select_related(None)
+    if relations:
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*colonnes)
@@ -1,10 +1,17 @@
-from rest_framework import serializers
+from decimal import Decimal
+from functools import lru_cache
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from clients.models import Client
 from fournisseur.models import Fournisseur
 from produits.models import Produit,Categorie,SousCategorie,SousSousCategorie
-from paniers.models import Panier, LignePanier
+from paniers.models import OPERATIONS_PANIER, Panier, LignePanier
 from commandes.models import Commande
 from livraisons.models import Livreur,Tarif
+from livraisons.geocodage import coordonnees_exactes
+from livraisons.tarifs import DELAIS_LIVRAISON
 
 
 # ============= AUTH SERIALIZERS =============
@@ -86,8 +93,8 @@ class AdresseLivraisonSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = AdresseLivraison
-        fields = ['pk', 'adresse', 'code_postal', 'ville', 'pays']
-        read_only_fields = ['pk']
+        fields = ['pk', 'adresse', 'code_postal', 'ville', 'pays', 'latitude', 'longitude']
+        read_only_fields = ['pk', 'latitude', 'longitude']
 
     def validate_code_postal(self, value):
         """Validation du code postal"""
@@ -144,7 +151,34 @@ class PasswordChangeSerializer(serializers.Serializer):
 
 
 # ============= PRODUIT SERIALIZERS =============
-class ProduitSerializer(serializers.ModelSerializer):
+# Représentation compacte des produits : listes du magasin, lignes de panier et de commande
+CHAMPS_PRODUIT_COMPACT = [
+    'id', 'numero_unique', 'nom', 'slug', 'description_courte', 'icone_produit',
+    'image_principale', 'prix_ht', 'tva', 'en_promotion', 'pourcentage_promotion',
+    'stock_actuel', 'statut', 'est_nouveaute', 'est_bio', 'est_local',
+    'poids', 'unite_mesure', 'origine',
+    'categorie', 'souscategorie', 'soussouscategorie', 'fournisseur', 'fournisseur_nom',
+]
+
+# Colonnes à lire en base pour les champs sérialisés qui ne sont pas des colonnes
+COLONNES_CHAMPS_PRODUIT = {
+    'fournisseur_nom': ['fournisseur__nom'],
+    'icone_produit': ['icone_produit', 'nom', 'description_courte'],
+}
+
+
+class ChampsDynamiquesMixin:
+    """Restreint les champs sérialisés : Serializer(objets, champs=['id', 'nom'])"""
+
+    def __init__(self, *args, **kwargs):
+        champs = kwargs.pop('champs', None)
+        super().__init__(*args, **kwargs)
+        if champs is not None:
+            for nom in set(self.fields) - set(champs):
+                self.fields.pop(nom)
+
+
+class ProduitSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     fournisseur_nom = serializers.CharField(source='fournisseur.nom', read_only=True)
     image_principale = serializers.SerializerMethodField()
     icone_produit = serializers.SerializerMethodField()
@@ -164,11 +198,157 @@ class ProduitSerializer(serializers.ModelSerializer):
 
     def get_icone_produit(self, obj):
         """Retourne l'icône intelligente du produit basée sur son nom"""
+        if obj.icone_produit:
+            return obj.icone_produit
+        # Produit pas encore rempli par `remplir_icones_produits`
         from produits.utils import get_smart_product_icon
         return get_smart_product_icon(obj.nom, obj.description_courte or "")
 
 
-class ProduitDetailSerializer(serializers.ModelSerializer):
+# Valeur retournée par un convertisseur quand DRF omettrait la clé
+_OMIS = object()
+
+# Jeux de champs (?fields=) dont les convertisseurs restent préparés
+TAILLE_CACHE_PLANS_PRODUIT = 64
+
+# Champs DRF dont to_representation ne modifie pas une valeur lue en base
+_CHAMPS_IDENTITE = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class ProduitLectureRapide:
+    """
+    Représentation lecture seule des produits construite depuis des lignes values()
+
+    Donne exactement la sortie de ProduitSerializer (mêmes clés, même ordre,
+    mêmes formats) sans instancier de modèles ni appeler to_representation
+    champ par champ : les convertisseurs sont préparés une fois par jeu de
+    champs puis appliqués directement aux dictionnaires renvoyés par la base.
+
+    Usage:
+        rapide = ProduitLectureRapide(champs)
+        donnees = rapide.serialiser(queryset)
+    """
+    def __init__(self, champs=None):
+        # L'ordre et les doublons de ?fields= ne changent pas la représentation
+        self.colonnes, fabriques = _plan_lecture_rapide(None if champs is None else frozenset(champs))
+        # Fuseau lu une fois par représentation plutôt qu'une fois par date
+        fuseau = timezone.get_current_timezone() if settings.USE_TZ else None
+        self.convertisseurs = [(nom, fabrique(fuseau)) for nom, fabrique in fabriques]
+
+    @classmethod
+    def _preparer(cls, champs):
+        if champs is not None:
+            inconnus = champs - set(ProduitSerializer().fields)
+            if inconnus:
+                raise ValueError(f"Champs produit inconnus : {', '.join(sorted(inconnus))}")
+        serializer = ProduitSerializer(champs=champs)
+        colonnes = {'id', 'date_creation'}
+        fabriques = []
+        for nom, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            colonnes.update(COLONNES_CHAMPS_PRODUIT.get(nom, [nom]))
+            fabriques.append((nom, cls._fabrique(nom, field)))
+        return sorted(colonnes), fabriques
+
+    @staticmethod
+    def _fabrique(nom, field):
+        """Retourne fuseau -> convertisseur(ligne) pour un champ du serializer"""
+        if nom == 'image_principale':
+            base = settings.MEDIA_BASE_URL
+            return lambda fuseau: lambda ligne: (
+                f"{base}{ligne['image_principale']}" if ligne['image_principale'] else None
+            )
+
+        if nom == 'icone_produit':
+            from produits.utils import get_smart_product_icon
+            return lambda fuseau: lambda ligne: ligne['icone_produit'] or get_smart_product_icon(
+                ligne['nom'], ligne['description_courte'] or ""
+            )
+
+        if nom == 'fournisseur_nom':
+            # Sans fournisseur, DRF omet la clé (SkipField)
+            return lambda fuseau: lambda ligne: (
+                _OMIS if ligne['fournisseur__nom'] is None else ligne['fournisseur__nom']
+            )
+
+        source = field.source
+        if (
+            isinstance(field, serializers.DecimalField)
+            and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+            and not field.localize
+        ):
+            quantum = Decimal(1).scaleb(-field.decimal_places)
+
+            def decimal(ligne):
+                valeur = ligne[source]
+                return None if valeur is None else '{:f}'.format(Decimal(valeur).quantize(quantum))
+            return lambda fuseau: decimal
+
+        if (
+            isinstance(field, serializers.DateTimeField)
+            and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601
+            and getattr(field, 'timezone', None) is None
+            and settings.USE_TZ
+        ):
+            def fabrique_date(fuseau):
+                def date_heure(ligne):
+                    valeur = ligne[source]
+                    if not valeur:
+                        return None
+                    if timezone.is_aware(valeur):
+                        valeur = valeur.astimezone(fuseau)
+                    else:
+                        valeur = field.enforce_timezone(valeur)
+                    texte = valeur.isoformat()
+                    return texte[:-6] + 'Z' if texte.endswith('+00:00') else texte
+                return date_heure
+            return fabrique_date
+
+        if isinstance(field, serializers.FileField):
+            storage = Produit._meta.get_field(source).storage
+            if getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+                return lambda fuseau: lambda ligne: storage.url(ligne[source]) if ligne[source] else None
+            return lambda fuseau: lambda ligne: ligne[source] or None
+
+        if isinstance(field, _CHAMPS_IDENTITE):
+            return lambda fuseau: lambda ligne: ligne[source]
+
+        def generique(ligne):
+            valeur = ligne[source]
+            return None if valeur is None else field.to_representation(valeur)
+        return lambda fuseau: generique
+
+    def representer(self, ligne: dict) -> dict:
+        donnees = {}
+        for nom, convertir in self.convertisseurs:
+            valeur = convertir(ligne)
+            if valeur is not _OMIS:
+                donnees[nom] = valeur
+        return donnees
+
+    def lignes(self, queryset):
+        """Queryset values() limité aux colonnes nécessaires"""
+        return queryset.values(*self.colonnes)
+
+    def serialiser(self, queryset) -> list:
+        return [self.representer(ligne) for ligne in self.lignes(queryset)]
+
+
+@lru_cache(maxsize=TAILLE_CACHE_PLANS_PRODUIT)
+def _plan_lecture_rapide(champs):
+    """Colonnes et convertisseurs de ProduitLectureRapide pour un jeu de champs (frozenset ou None)"""
+    return ProduitLectureRapide._preparer(champs)
+
+
+class ProduitDetailSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     fournisseur = serializers.StringRelatedField()
     image_principale = serializers.SerializerMethodField()
     icone_produit = serializers.SerializerMethodField()
@@ -188,13 +368,16 @@ class ProduitDetailSerializer(serializers.ModelSerializer):
 
     def get_icone_produit(self, obj):
         """Retourne l'icône intelligente du produit basée sur son nom"""
+        if obj.icone_produit:
+            return obj.icone_produit
+        # Produit pas encore rempli par `remplir_icones_produits`
         from produits.utils import get_smart_product_icon
         return get_smart_product_icon(obj.nom, obj.description_courte or "")
 
 
 # ============= PANIER SERIALIZERS =============
 class LignePanierSerializer(serializers.ModelSerializer):
-    produit = ProduitSerializer(read_only=True)
+    produit = ProduitSerializer(read_only=True, champs=CHAMPS_PRODUIT_COMPACT)
     produit_id = serializers.PrimaryKeyRelatedField(
         queryset=Produit.objects.all(),
         source='produit',
@@ -212,18 +395,25 @@ class LignePanierSerializer(serializers.ModelSerializer):
         fields = ['id', 'produit', 'produit_id', 'quantite', 'prix_unitaire', 'sous_total', 'prix_unitaire_ttc', 'sous_total_ttc', 'produit_nom', 'produit_image']
         read_only_fields = ['id', 'prix_unitaire', 'prix_unitaire_ttc', 'sous_total_ttc']
 
+    def update(self, instance, validated_data):
+        # Changement de produit : la ligne prend les prix du nouveau produit
+        produit = validated_data.get('produit')
+        if produit is not None and produit.pk != instance.produit_id:
+            instance.figer_prix(produit)
+        return super().update(instance, validated_data)
+
     def get_prix_unitaire(self, obj):
-        """Retourne le prix unitaire HT du produit"""
-        return float(obj.produit.prix_ht)
+        """Retourne le prix unitaire HT figé dans la ligne"""
+        return float(obj.prix_unitaire_ht)
 
     def get_sous_total(self, obj):
         """Retourne le sous-total HT de la ligne"""
         return float(obj.sous_total)
 
     def get_prix_unitaire_ttc(self, obj):
-        """Retourne le prix unitaire TTC du produit"""
-        prix_ht = float(obj.produit.prix_ht)
-        tva_rate = float(obj.produit.tva) / 100
+        """Retourne le prix unitaire TTC figé dans la ligne"""
+        prix_ht = float(obj.prix_unitaire_ht)
+        tva_rate = float(obj.taux_tva) / 100
         prix_ttc = prix_ht * (1 + tva_rate)
         return float(prix_ttc)
 
@@ -241,8 +431,55 @@ class LignePanierSerializer(serializers.ModelSerializer):
         return None
 
 
+# Colonnes du produit lues pour la représentation compacte des lignes
+COLONNES_PRODUIT_LIGNE = ['id', 'nom', 'image_principale']
+
+
+class LignePanierCompacteSerializer(serializers.BaseSerializer):
+    """
+    Représentation compacte d'une ligne de panier ou de commande (lecture seule)
+
+    Ne contient du produit que son identifiant, son nom et son image ; les
+    prix unitaires (figés dans la ligne) et totaux de la ligne sont calculés
+    une seule fois par ligne. Le produit n'a besoin que des colonnes
+    COLONNES_PRODUIT_LIGNE.
+    """
+
+    def to_representation(self, ligne):
+        produit = ligne.produit
+        prix_unitaire = float(ligne.prix_unitaire_ht)
+        prix_unitaire_ttc = prix_unitaire * (1 + float(ligne.taux_tva) / 100)
+        return {
+            'id': ligne.pk,
+            'produit_id': ligne.produit_id,
+            'produit_nom': produit.nom,
+            'produit_image': (
+                f"{settings.MEDIA_BASE_URL}{produit.image_principale}"
+                if produit.image_principale else None
+            ),
+            'quantite': ligne.quantite,
+            'prix_unitaire': prix_unitaire,
+            'prix_unitaire_ttc': prix_unitaire_ttc,
+            'sous_total': float(ligne.quantite * ligne.prix_unitaire_ht),
+            'sous_total_ttc': prix_unitaire_ttc * ligne.quantite,
+        }
+
+
+def serialiser_lignes(lignes, context) -> list:
+    """
+    Sérialise les lignes d'un panier ou d'une commande
+
+    Représentation compacte par défaut ; la représentation avec le produit
+    imbriqué (LignePanierSerializer) si le contexte contient
+    `lignes_completes` (paramètre ?lignes=completes).
+    """
+    if context.get('lignes_completes'):
+        return LignePanierSerializer(lignes, many=True, context=context).data
+    return LignePanierCompacteSerializer(lignes, many=True, context=context).data
+
+
 class PanierSerializer(serializers.ModelSerializer):
-    lignes = LignePanierSerializer(many=True, read_only=True)
+    lignes = serializers.SerializerMethodField()
     total = serializers.SerializerMethodField()
     total_ht = serializers.SerializerMethodField()
     total_tva = serializers.SerializerMethodField()
@@ -250,39 +487,74 @@ class PanierSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Panier
-        fields = ['id', 'client', 'date_creation', 'lignes', 'total', 'total_ht', 'total_tva', 'total_ttc']
-        read_only_fields = ['id', 'client', 'date_creation']
+        fields = ['id', 'client', 'date_creation', 'revision', 'lignes', 'total', 'total_ht', 'total_tva', 'total_ttc']
+        read_only_fields = ['id', 'client', 'date_creation', 'revision']
+
+    def get_lignes(self, obj):
+        """Retourne les lignes du panier (compactes par défaut)"""
+        return serialiser_lignes(obj.lignes.all(), self.context)
 
     def get_total(self, obj):
         """Retourne le total HT du panier"""
-        return float(obj.calculer_total())
+        return float(obj.total_ht)
 
     def get_total_ht(self, obj):
         """Retourne le total HT du panier"""
-        return float(obj.calculer_total())
+        return float(obj.total_ht)
 
     def get_total_tva(self, obj):
-        """Calcule le montant total de la TVA"""
-        total_ht = obj.calculer_total()
-        total_tva = 0
-        for ligne in obj.lignes.all():
-            prix_ht = float(ligne.produit.prix_ht)
-            tva_rate = float(ligne.produit.tva) / 100
-            tva_ligne = prix_ht * tva_rate * ligne.quantite
-            total_tva += tva_ligne
-        return float(total_tva)
+        """Retourne le montant total de la TVA"""
+        return float(obj.total_tva)
 
     def get_total_ttc(self, obj):
         """Retourne le total TTC du panier (HT + TVA)"""
-        total_ht = self.get_total_ht(obj)
-        total_tva = self.get_total_tva(obj)
-        return float(total_ht + total_tva)
+        return float(obj.total_ttc)
+
+
+class TotauxPanierSerializer(serializers.ModelSerializer):
+    """Totaux et révision du panier, sans les lignes (réponses delta)"""
+    total = serializers.FloatField(source='total_ht', read_only=True)
+    total_ht = serializers.FloatField(read_only=True)
+    total_tva = serializers.FloatField(read_only=True)
+    total_ttc = serializers.FloatField(read_only=True)
+    poids_total = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Panier
+        fields = ['id', 'revision', 'total', 'total_ht', 'total_tva', 'total_ttc', 'poids_total', 'nb_articles']
+        read_only_fields = fields
+
+
+class OperationPanierSerializer(serializers.Serializer):
+    """Opération d'un lot appliqué au panier (POST /api/<pk-client>/panier/lot/)"""
+
+    operation = serializers.ChoiceField(choices=OPERATIONS_PANIER)
+    produit_id = serializers.IntegerField(min_value=1)
+    quantite = serializers.IntegerField(min_value=0, default=1)
+
+    def validate(self, data):
+        if data['operation'] != 'definir' and data['quantite'] < 1:
+            raise serializers.ValidationError({'quantite': 'Doit être supérieure ou égale à 1.'})
+        return data
+
+
+class LotOperationsPanierSerializer(serializers.Serializer):
+    """Lot d'opérations appliqué au panier en une transaction"""
+
+    operations = OperationPanierSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=getattr(settings, 'PANIER_MAX_OPERATIONS', 200)
+    )
 
 
 # ============= COMMANDE SERIALIZERS =============
 class CommandeSerializer(serializers.ModelSerializer):
+    """
+    Commande dans une liste : montants lus sur la commande, sans les lignes
+    (les lignes sont servies par CommandeDetailSerializer)
+    """
     client_nom = serializers.CharField(source='client.get_full_name', read_only=True)
-    lignes = serializers.SerializerMethodField()
     montant_total_ttc = serializers.SerializerMethodField()
     montant_total_ht = serializers.SerializerMethodField()
     montant_total_tva = serializers.SerializerMethodField()
@@ -292,37 +564,13 @@ class CommandeSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['id', 'numero_commande', 'date_commande', 'client']
 
-    def get_lignes(self, obj):
-        """Récupère les lignes du panier associé à la commande"""
-        if obj.panier:
-            lignes = obj.panier.lignes.all()
-            return LignePanierSerializer(lignes, many=True).data
-        return []
-
     def get_montant_total_ht(self, obj):
-        """Calcule le montant total HT à partir des lignes du panier"""
-        if obj.panier:
-            from decimal import Decimal
-            total_ht = Decimal('0.00')
-            for ligne in obj.panier.lignes.all():
-                # Calcul HT = quantité × prix_unitaire (qui est supposé être HT)
-                prix_ht = ligne.produit.prix_ht if hasattr(ligne.produit, 'prix_ht') else ligne.prix_unitaire
-                total_ht += ligne.quantite * prix_ht
-            return str(total_ht)
-        return "0.00"
+        """Montant HT figé à la création de la commande"""
+        return str(obj.total_ht)
 
     def get_montant_total_tva(self, obj):
-        """Calcule le montant total de TVA"""
-        if obj.panier:
-            from decimal import Decimal
-            total_tva = Decimal('0.00')
-            for ligne in obj.panier.lignes.all():
-                # Calcul TVA = quantité × prix_unitaire × (taux_tva / 100)
-                prix_ht = ligne.produit.prix_ht if hasattr(ligne.produit, 'prix_ht') else ligne.prix_unitaire
-                taux_tva = ligne.produit.tva if hasattr(ligne.produit, 'tva') else Decimal('20.00')
-                total_tva += ligne.quantite * prix_ht * (taux_tva / 100)
-            return str(total_tva)
-        return "0.00"
+        """Montant de TVA figé à la création de la commande"""
+        return str(obj.total_tva)
 
     def get_montant_total_ttc(self, obj):
         """Calcule le montant total TTC"""
@@ -344,34 +592,16 @@ class CommandeDetailSerializer(serializers.ModelSerializer):
     def get_lignes(self, obj):
         """Récupère les lignes du panier associé à la commande"""
         if obj.panier:
-            lignes = obj.panier.lignes.all()
-            return LignePanierSerializer(lignes, many=True).data
+            return serialiser_lignes(obj.panier.lignes.all(), self.context)
         return []
 
     def get_montant_total_ht(self, obj):
-        """Calcule le montant total HT à partir des lignes du panier"""
-        if obj.panier:
-            from decimal import Decimal
-            total_ht = Decimal('0.00')
-            for ligne in obj.panier.lignes.all():
-                # Calcul HT = quantité × prix_unitaire (qui est supposé être HT)
-                prix_ht = ligne.produit.prix_ht if hasattr(ligne.produit, 'prix_ht') else ligne.prix_unitaire
-                total_ht += ligne.quantite * prix_ht
-            return str(total_ht)
-        return "0.00"
+        """Montant HT figé à la création de la commande"""
+        return str(obj.total_ht)
 
     def get_montant_total_tva(self, obj):
-        """Calcule le montant total de TVA"""
-        if obj.panier:
-            from decimal import Decimal
-            total_tva = Decimal('0.00')
-            for ligne in obj.panier.lignes.all():
-                # Calcul TVA = quantité × prix_unitaire × (taux_tva / 100)
-                prix_ht = ligne.produit.prix_ht if hasattr(ligne.produit, 'prix_ht') else ligne.prix_unitaire
-                taux_tva = ligne.produit.tva if hasattr(ligne.produit, 'tva') else Decimal('20.00')
-                total_tva += ligne.quantite * prix_ht * (taux_tva / 100)
-            return str(total_tva)
-        return "0.00"
+        """Montant de TVA figé à la création de la commande"""
+        return str(obj.total_tva)
 
     def get_montant_total_ttc(self, obj):
         """Calcule le montant total TTC"""
@@ -381,39 +611,30 @@ class CommandeDetailSerializer(serializers.ModelSerializer):
 
 # ============= CATEGORIE SERIALIZERS =============
 class SousSousCategorieSerializer(serializers.ModelSerializer):
-    nb_produits = serializers.SerializerMethodField()
+    nb_produits = serializers.IntegerField(source='nb_produits_actifs', read_only=True)
 
     class Meta:
         model = SousSousCategorie
         fields = ['pk', 'nom', 'slug', 'description', 'icone', 'est_active', 'ordre', 'nb_produits']
 
-    def get_nb_produits(self, obj):
-        return obj.produits.filter(est_actif=True).count()
-
 
 class SousCategorieSerializer(serializers.ModelSerializer):
     soussouscategories = SousSousCategorieSerializer(many=True, read_only=True)
-    nb_produits = serializers.SerializerMethodField()
+    nb_produits = serializers.IntegerField(source='nb_produits_actifs', read_only=True)
 
     class Meta:
         model = SousCategorie
         fields = ['pk', 'nom', 'slug', 'description', 'icone', 'est_active', 'ordre', 'soussouscategories', 'nb_produits']
 
-    def get_nb_produits(self, obj):
-        return obj.produits.filter(est_actif=True).count()
-
 
 class CategorieSerializer(serializers.ModelSerializer):
     souscategories = SousCategorieSerializer(many=True, read_only=True)
-    nb_produits = serializers.SerializerMethodField()
+    nb_produits = serializers.IntegerField(source='nb_produits_actifs', read_only=True)
 
     class Meta:
         model = Categorie
         fields = ['pk', 'nom', 'slug', 'description', 'image', 'icone', 'est_active', 'ordre', 'souscategories', 'nb_produits']
 
-    def get_nb_produits(self, obj):
-        return obj.produits.filter(est_actif=True).count()
-
 
 # ============= FOURNISSEUR SERIALIZERS =============
 class FournisseurSerializer(serializers.ModelSerializer):
@@ -463,8 +684,42 @@ class LivreurSerializer(serializers.ModelSerializer):
 
     def get_delai_livraison(self, obj):
         """Retourne le délai de livraison en fonction du type de service"""
-        if obj.type_service == 'express':
-            return "24h"
-        return "3-5 jours"
+        return DELAIS_LIVRAISON.get(obj.type_service, DELAIS_LIVRAISON['standard'])
+
+
+class DemandeDevisLivraisonSerializer(serializers.Serializer):
+    """
+    Paramètres du devis de livraison
+
+    Le poids est celui du panier du client, ou `poids` pour un devis anonyme.
+    La destination (code postal et/ou coordonnées) sélectionne les points
+    relais disponibles : ceux à moins de `rayon_km`, ou les `nb_points_relais`
+    plus proches dans ce rayon. Pour un panier, elle sert aussi (avec `ville`)
+    à signaler les fournisseurs qui ne livrent pas l'adresse. Sans
+    coordonnées, celles de la commune du code postal sont prises dans la table
+    locale ; un code postal absent de la table garde la recherche des points
+    relais par code postal.
+    """
+
+    poids = serializers.DecimalField(max_digits=8, decimal_places=3, min_value=Decimal('0.001'), required=False)
+    code_postal = serializers.RegexField(r'^\d{5}$', required=False)
+    ville = serializers.CharField(max_length=100, required=False)
+    latitude = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    longitude = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    rayon_km = serializers.FloatField(
+        min_value=0.1,
+        max_value=getattr(settings, 'POINTS_RELAIS_RAYON_MAX_KM', 50),
+        default=10
+    )
+    nb_points_relais = serializers.IntegerField(min_value=1, max_value=50, required=False)
+
+    def validate(self, data):
+        if ('latitude' in data) != ('longitude' in data):
+            raise serializers.ValidationError('latitude et longitude doivent être fournies ensemble.')
+        if 'latitude' not in data and 'code_postal' in data:
+            position = coordonnees_exactes(data['code_postal'], data.get('ville'))
+            if position is not None:
+                data['latitude'], data['longitude'] = position
+        return data
 
 
@@ -1,3 +1,308 @@
-from django.test import TestCase
+import gzip
+import json
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from clients.models import Client
+from fournisseur.models import Fournisseur
+from paniers.models import Panier
+from produits.models import Categorie, Produit
+from produits.utils import get_version_catalogue
+
+from .compression import BROTLI, encodages_disponibles
+from .serializers import CHAMPS_PRODUIT_COMPACT, ProduitLectureRapide, ProduitSerializer, _plan_lecture_rapide
+
+
+MEDIA_TEST = tempfile.mkdtemp()
+
+
+def creer_client(nom):
+    """Client connecté, et l'en-tête d'authentification de ses requêtes"""
+    client = Client.objects.create(
+        username=nom, email=f'{nom}@example.fr', password=make_password('motdepasse'),
+        session_token=uuid.uuid4().hex, token_expiration=timezone.now() + timedelta(days=1)
+    )
+    return client, {'HTTP_AUTHORIZATION': f'Token {client.session_token}'}
+
+
+def figer_version_catalogue(test):
+    """Version du catalogue lue une fois pour tout le test : les requêtes comptées sont celles des réponses"""
+    relecture = mock.patch('utils.version_partagee.DUREE_VERSION_LOCALE', float('inf'))
+    relecture.start()
+    test.addCleanup(relecture.stop)
+    get_version_catalogue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST)
+class ProduitLectureRapideTests(TestCase):
+    """La représentation rapide doit être identique à celle de ProduitSerializer"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEST, ignore_errors=True)
+
+    def setUp(self):
+        fournisseur = Fournisseur(
+            nom='Durand', prenom='Marie', email='durand@example.fr', metier='Maraîchère',
+            contact='Marie', tel='0600000000', adresse='1 chemin des Vignes',
+            code_postal='34000', ville='Montpellier'
+        )
+        fournisseur.set_password('motdepasse')
+        fournisseur.save()
+        categorie = Categorie.objects.create(nom='Fruits')
+
+        Produit.objects.create(
+            nom='Pêches blanches', description_courte='Pêches de vigne', prix_ht=Decimal('3.5'),
+            tva=Decimal('5.50'), stock_actuel=12, en_promotion=True,
+            pourcentage_promotion=Decimal('15'), est_bio=True, poids=Decimal('1.250'),
+            categorie=categorie, fournisseur=fournisseur, origine='Occitanie',
+            image_principale='produits/peches.jpg'
+        )
+        Produit.objects.create(nom='Article sans fournisseur', prix_ht=Decimal('10.00'))
+        produit = Produit.objects.create(nom='Miel de garrigue', prix_ht=Decimal('8.90'))
+        # Produit antérieur au remplissage de la colonne icone_produit
+        Produit.objects.filter(pk=produit.pk).update(icone_produit='')
+
+    def assertParite(self, champs):
+        produits = Produit.objects.all()
+        attendu = JSONRenderer().render(ProduitSerializer(produits, many=True, champs=champs).data)
+        obtenu = JSONRenderer().render(ProduitLectureRapide(champs).serialiser(produits))
+        self.assertEqual(obtenu, attendu)
+
+    def test_parite_representation_complete(self):
+        self.assertParite(None)
+
+    def test_parite_representation_compacte(self):
+        self.assertParite(CHAMPS_PRODUIT_COMPACT)
+
+    def test_plan_partage_quel_que_soit_l_ordre(self):
+        ProduitLectureRapide(['nom', 'id'])
+        avant = _plan_lecture_rapide.cache_info()
+
+        rapide = ProduitLectureRapide(['id', 'nom', 'nom'])
+
+        self.assertEqual(_plan_lecture_rapide.cache_info().hits, avant.hits + 1)
+        self.assertEqual(_plan_lecture_rapide.cache_info().currsize, avant.currsize)
+        self.assertEqual([nom for nom, _ in rapide.convertisseurs], ['id', 'nom'])
+        with self.assertRaises(ValueError):
+            ProduitLectureRapide(['nom', 'inexistant'])
+
+    def test_parite_fuseau_actif(self):
+        with timezone.override('Europe/Paris'):
+            self.assertParite(None)
+
+    def test_parite_champs_demandes(self):
+        self.assertParite(['id', 'nom', 'prix_ht', 'fournisseur_nom', 'image_principale'])
+
+
+class LignePanierVueTests(TestCase):
+    def setUp(self):
+        self.client_panier, self.entetes = creer_client('martin')
+        produit = Produit.objects.create(nom='Pommes golden', prix_ht=Decimal('2.35'), tva=Decimal('5.50'))
+        panier = Panier.objects.create(client=self.client_panier)
+        panier.ajouter_produit(produit, 3)
+        self.url = f'/api/{self.client_panier.pk}/panier/{panier.lignes.get().pk}/'
+        self.ligne_du_panier = self.client.get(f'/api/{self.client_panier.pk}/panier/', **self.entetes).json()['lignes'][0]
+
+    def test_meme_representation_que_le_panier(self):
+        self.assertEqual(self.client.get(self.url, **self.entetes).json(), self.ligne_du_panier)
+
+        ligne = self.client.put(self.url, {'quantite': 5}, content_type='application/json', **self.entetes).json()
+        self.assertEqual(ligne, {**self.ligne_du_panier, 'quantite': 5,
+                                 'sous_total': 11.75, 'sous_total_ttc': ligne['prix_unitaire_ttc'] * 5})
+
+    def test_representation_complete_sur_demande(self):
+        ligne = self.client.get(f'{self.url}?lignes=completes', **self.entetes).json()
+        self.assertEqual(ligne['produit']['nom'], 'Pommes golden')
+
+
+class CatalogueCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        figer_version_catalogue(self)
+        Categorie.objects.create(nom='Fruits')
+        Produit.objects.create(nom='Pommes golden', prix_ht=Decimal('2.50'))
+
+    def test_etag_et_304_sans_requete(self):
+        for url in ('/api/magasin/', '/api/categories/', '/api/fournisseurs/'):
+            reponse = self.client.get(url)
+            self.assertEqual(reponse.status_code, 200)
+
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=reponse['ETag']).status_code, 304)
+                self.assertEqual(self.client.get(url).content, reponse.content)
+
+    def test_nouvelle_version_du_catalogue(self):
+        etag = self.client.get('/api/magasin/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Produit.objects.create(nom='Poires', prix_ht=Decimal('3.00'))
+
+        reponse = self.client.get('/api/magasin/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertNotEqual(reponse['ETag'], etag)
+
+    def test_une_entree_par_hote_et_parametres(self):
+        etag = self.client.get('/api/magasin/')['ETag']
+        self.assertNotEqual(self.client.get('/api/magasin/', HTTP_HOST='api.example.fr')['ETag'], etag)
+        self.assertNotEqual(self.client.get('/api/magasin/', secure=True)['ETag'], etag)
+        self.assertNotEqual(self.client.get('/api/magasin/?page_size=1')['ETag'], etag)
+
+
+class PaginationCurseurTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        maintenant = timezone.now()
+        for i in range(7):
+            produit = Produit.objects.create(nom=f'Produit {i}', prix_ht=Decimal('2.50'))
+            # Deux produits par date de création : l'identifiant départage
+            Produit.objects.filter(pk=produit.pk).update(date_creation=maintenant - timedelta(minutes=i // 2))
+
+    def test_parcours_complet_par_curseur(self):
+        vus, url = [], '/api/magasin/?page_size=3'
+        while url:
+            reponse = self.client.get(url)
+            self.assertEqual(reponse.status_code, 200)
+            vus += [produit['id'] for produit in reponse.json()['results']]
+            url = reponse.json()['next']
+
+        self.assertEqual(vus, list(Produit.objects.order_by('-date_creation', 'pk').values_list('pk', flat=True)))
+
+    def test_curseur_invalide(self):
+        self.assertEqual(self.client.get('/api/magasin/?cursor=zzz').status_code, 400)
+        self.assertEqual(self.client.get('/api/magasin/?page_size=3&cursor=zzz').status_code, 400)
+
+
+class FacettesCatalogueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        figer_version_catalogue(self)
+        self.fruits = Categorie.objects.create(nom='Fruits')
+        self.legumes = Categorie.objects.create(nom='Légumes')
+        for nom, categorie, bio, origine, prix in (
+            ('Pommes', self.fruits, True, 'France', '2'),
+            ('Oranges', self.fruits, False, 'Espagne', '5'),
+            ('Carottes', self.legumes, True, 'France', '9'),
+        ):
+            Produit.objects.create(nom=nom, categorie=categorie, est_bio=bio, origine=origine, prix_ht=Decimal(prix))
+        Produit.objects.create(nom='Navets', categorie=self.legumes, est_bio=True, est_actif=False, prix_ht=Decimal('1'))
+
+    def test_comptes_sans_le_filtre_de_la_facette(self):
+        with self.assertNumQueries(2):
+            reponse = self.client.get('/api/magasin/filtres/', {'est_bio': 'true', 'categorie': self.fruits.pk}).json()
+
+        self.assertEqual(([produit['nom'] for produit in reponse['results']], reponse['total']), (['Pommes'], 1))
+        facettes = reponse['facettes']
+        # Chaque facette est comptée avec les autres filtres seulement
+        self.assertEqual(facettes['est_bio'], {'true': 1, 'false': 1})
+        self.assertEqual(facettes['categorie'], [
+            {'valeur': self.fruits.pk, 'count': 1}, {'valeur': self.legumes.pk, 'count': 1},
+        ])
+        self.assertEqual(facettes['origine'], [{'valeur': 'France', 'count': 1}])
+
+    def test_prix_et_pagination(self):
+        reponse = self.client.get('/api/magasin/filtres/', {'prix_max': '6', 'page_size': 1}).json()
+        self.assertEqual((reponse['total'], len(reponse['results'])), (2, 1))
+        self.assertIsNotNone(reponse['next'])
+        self.assertEqual(reponse['facettes']['prix'], {'min': '2.00', 'max': '5.00'})
+
+    def test_filtre_invalide(self):
+        self.assertEqual(self.client.get('/api/magasin/filtres/', {'est_bio': 'peut-etre'}).status_code, 400)
+
+
+class PanierDeltaTests(TestCase):
+    def setUp(self):
+        self.client_panier, self.entetes = creer_client('eve')
+        self.url = f'/api/{self.client_panier.pk}/panier/'
+        self.produits = [Produit.objects.create(nom=f'Produit {i}', prix_ht=Decimal('2.00')) for i in range(3)]
+        for produit in self.produits:
+            self.client.post(self.url, {'produit_id': produit.pk, 'quantite': 1}, **self.entetes)
+        self.revision = self.client.get(self.url, **self.entetes).json()['revision']
+
+    def test_ecritures_renvoient_le_delta(self):
+        delta = self.client.post(
+            f'{self.url}?reponse=delta', {'produit_id': self.produits[0].pk, 'quantite': 2}, **self.entetes
+        ).json()
+        self.assertEqual(delta['panier']['revision'], self.revision + 1)
+        self.assertEqual(delta['panier']['total_ht'], 10.0)
+        ligne, = delta['lignes']
+        self.assertEqual(ligne['quantite'], 3)
+
+        delta = self.client.put(
+            f"{self.url}{ligne['id']}/?reponse=delta", {'quantite': 5}, content_type='application/json', **self.entetes
+        ).json()
+        self.assertEqual((delta['panier']['revision'], delta['panier']['nb_articles']), (self.revision + 2, 7))
+
+        delta = self.client.delete(f"{self.url}{ligne['id']}/?reponse=delta", **self.entetes).json()
+        self.assertEqual((delta['lignes'], delta['lignes_supprimees']), ([], [ligne['id']]))
+        self.assertEqual((delta['panier']['revision'], delta['panier']['nb_articles']), (self.revision + 3, 2))
+
+    def test_lot_d_operations(self):
+        operations = [
+            {'operation': 'definir', 'produit_id': self.produits[1].pk, 'quantite': 0},
+            {'operation': 'ajouter', 'produit_id': self.produits[0].pk},
+        ]
+        delta = self.client.post(
+            f'{self.url}lot/?reponse=delta', {'operations': operations}, content_type='application/json', **self.entetes
+        ).json()
+        self.assertEqual((len(delta['lignes']), len(delta['lignes_supprimees'])), (1, 1))
+        # Le lot est appliqué en une écriture : une seule révision
+        self.assertEqual(delta['panier']['revision'], self.revision + 1)
+
+
+class CompressionCatalogueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        figer_version_catalogue(self)
+        for i in range(30):
+            categorie = Categorie.objects.create(nom=f'Catégorie numéro {i}')
+            Produit.objects.create(
+                nom=f'Produit {i}', categorie=categorie, prix_ht=Decimal('2.50'),
+                description_courte='Une description assez longue pour être compressée',
+            )
+
+    def test_une_variante_par_encodage(self):
+        brut = self.client.get('/api/categories/')
+        self.assertNotIn('Content-Encoding', brut)
+
+        compresse = self.client.get('/api/categories/', HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(compresse['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compresse['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(compresse.content)), json.loads(brut.content))
+        self.assertTrue(compresse['ETag'].endswith('-gzip"'))
+        self.assertNotEqual(compresse['ETag'], brut['ETag'])
+
+        # Variante compressée servie depuis le cache
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.client.get('/api/categories/', HTTP_ACCEPT_ENCODING='gzip, br;q=0').content, compresse.content
+            )
+
+    def test_304_quel_que_soit_l_encodage(self):
+        etag_gzip = self.client.get('/api/categories/', HTTP_ACCEPT_ENCODING='gzip, br;q=0')['ETag']
+        reponse = self.client.get('/api/categories/', HTTP_ACCEPT_ENCODING='identity', HTTP_IF_NONE_MATCH=etag_gzip)
+        self.assertEqual(reponse.status_code, 304)
+        # ETag affaibli par un intermédiaire qui a décompressé la réponse
+        reponse = self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=f'W/{etag_gzip}')
+        self.assertEqual(reponse.status_code, 304)
+
+    def test_brotli_prefere(self):
+        if BROTLI not in encodages_disponibles():
+            self.skipTest("module brotli absent")
+        reponse = self.client.get('/api/categories/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(reponse['Content-Encoding'], 'br')
+        self.assertTrue(reponse['ETag'].endswith('-br"'))
@@ -43,6 +43,8 @@ urlpatterns = [
     
     # Panier
     path('<int:pk_client>/panier/', panier_view, name='client-panier'),
+    path('<int:pk_client>/panier/lot/', panier_lot_view, name='panier-lot'),
+    path('<int:pk_client>/panier/revalider/', panier_revalider_view, name='panier-revalider'),
     path('<int:pk_client>/panier/<int:pk_ligne>/', ligne_panier_view, name='ligne-panier'),
 
     # Commandes
@@ -60,6 +62,8 @@ urlpatterns = [
 
     # ============= ROUTES GLOBALES =============
     path('magasin/', magasin_view, name='magasin'),
+    path('magasin/filtres/', magasin_filtres_view, name='magasin-filtres'),
+    path('magasin/recherche/', magasin_recherche_view, name='magasin-recherche'),
     path('magasin/<int:pk_produit>/', magasin_produit_view, name='magasin-produit'),
 
     # Categories et Fournisseurs publics
@@ -77,4 +81,8 @@ urlpatterns = [
     path('livreur/<int:pk_livreur>/', livreur_detail_view, name='livreur-detail'),
     path('livreur/<int:pk_livreur>/tarifs/', livreur_tarifs_view, name='livreur-tarifs'),
 
+    # ============= DEVIS DE LIVRAISON =============
+    path('livraison/devis/', devis_livraison_view, name='devis-livraison'),
+    path('<int:pk_client>/livraison/devis/', panier_devis_livraison_view, name='panier-devis-livraison'),
+
 ]
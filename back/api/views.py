@@ -3,15 +3,25 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import authenticate, login, logout
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.hashers import check_password
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 
 from .authentication import ClientTokenAuthentication
+from .cache import reponse_catalogue_cachee
+from .facettes import calculer_facettes, filtrer_produits, lire_filtres
+from .pagination import CatalogueKeysetPagination, CommandesKeysetPagination, reponse_ndjson, streaming_demande
+from .projection import champs_produit_demandes, projeter_produits
 
 from clients.models import Client, ClientToken
 from livraisons.models import Livreur, Tarif, PointRelais
+from fournisseur.livraison import get_index_zones_livraison
+from livraisons.tarifs import DELAIS_LIVRAISON, get_index_tarifs
+from paniers.models import CHAMPS_TOTAUX_PANIER, COLONNES_PRIX_PRODUIT, LignePanier
+from produits.models import TermeRecherche
 from .models import *
 from .serializers import *
 
@@ -383,11 +393,64 @@ def change_password(request, pk_client):
 
 
 # ============= PANIER VIEWS =============
+def _prefetch_produits_compacts(chemin):
+    """Précharge les produits des lignes en ne lisant que les colonnes de la représentation compacte"""
+    return Prefetch(chemin, queryset=projeter_produits(Produit.objects.all(), CHAMPS_PRODUIT_COMPACT))
+
+
+def _contexte_lignes(request) -> dict:
+    """Contexte des serializers de panier/commande : ?lignes=completes imbrique le produit dans chaque ligne"""
+    return {'lignes_completes': request.query_params.get('lignes') == 'completes'}
+
+
+def _prefetch_produits_lignes(chemin, contexte):
+    """Précharge les produits des lignes avec les seules colonnes que leur représentation utilise"""
+    if contexte.get('lignes_completes'):
+        return _prefetch_produits_compacts(chemin)
+    return Prefetch(chemin, queryset=Produit.objects.only(*COLONNES_PRODUIT_LIGNE))
+
+
+def _serialiser_ligne(pk_ligne, contexte) -> dict:
+    """Une ligne de panier, dans la même représentation que les lignes du panier"""
+    lignes = LignePanier.objects.filter(pk=pk_ligne).prefetch_related(_prefetch_produits_lignes('produit', contexte))
+    return serialiser_lignes(lignes, contexte)[0]
+
+
+def _delta_demande(request) -> bool:
+    """Réponse delta des écritures sur le panier, opt-in via ?reponse=delta"""
+    return request.query_params.get('reponse') == 'delta'
+
+
+def _reponse_panier_delta(request, panier_id, lignes, lignes_supprimees=()):
+    """
+    Réponse d'une écriture sur le panier limitée à ce qui a changé
+
+    Contient les lignes modifiées ou créées, les identifiants des lignes
+    supprimées et les totaux du panier avec sa révision : le client applique
+    ces changements à son panier local au lieu de le recharger en entier.
+    Si la révision reçue n'est pas celle attendue (révision connue + 1),
+    une autre écriture a eu lieu entre-temps et le panier doit être relu.
+    """
+    panier = Panier.objects.only('id', 'revision', *CHAMPS_TOTAUX_PANIER).get(pk=panier_id)
+    contexte = _contexte_lignes(request)
+    lignes = lignes.prefetch_related(_prefetch_produits_lignes('produit', contexte))
+    return Response({
+        'panier': TotauxPanierSerializer(panier).data,
+        'lignes': serialiser_lignes(lignes, contexte),
+        'lignes_supprimees': list(lignes_supprimees),
+    })
+
+
 @api_view(['GET', 'POST'])
 @authentication_classes([ClientTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def panier_view(request, pk_client):
-    """GET/POST /api/<pk-client>/panier"""
+    """
+    GET/POST /api/<pk-client>/panier
+
+    POST avec ?reponse=delta : retourne seulement la ligne ajoutée et les
+    totaux du panier (voir _reponse_panier_delta)
+    """
     client = get_object_or_404(Client, pk=pk_client)
 
     if client.username != request.user.username:
@@ -397,12 +460,11 @@ def panier_view(request, pk_client):
 
     if request.method == 'GET':
         # Optimisation : précharger les relations
+        contexte = _contexte_lignes(request)
         panier = Panier.objects.prefetch_related(
-            'lignes__produit__fournisseur',
-            'lignes__produit__categorie',
-            'lignes__produit__souscategorie'
+            _prefetch_produits_lignes('lignes__produit', contexte)
         ).get(pk=panier.pk)
-        serializers = PanierSerializer(panier)
+        serializers = PanierSerializer(panier, context=contexte)
         return Response(serializers.data)
 
     elif request.method == 'POST':
@@ -410,74 +472,161 @@ def panier_view(request, pk_client):
         produit_id = request.data.get('produit_id')
         quantite = request.data.get('quantite', 1)
 
-        produit = get_object_or_404(Produit, pk=produit_id)
+        try:
+            quantite = int(quantite)
+        except (TypeError, ValueError):
+            quantite = 0
+        if quantite < 1:
+            return Response({'error': 'Quantité invalide'}, status=status.HTTP_400_BAD_REQUEST)
 
-        ligne, created = LignePanier.objects.get_or_create(
-            panier=panier,
-            produit=produit,
-            defaults={'quantite': quantite}
-        )
+        # Colonnes nécessaires pour figer les prix d'une nouvelle ligne
+        produit = get_object_or_404(Produit.objects.only(*COLONNES_PRIX_PRODUIT), pk=produit_id)
 
-        if not created:
-            ligne.quantite += int(quantite)
-            ligne.save()
+        # Incrément atomique en base : pas de mise à jour perdue sous accès concurrents
+        panier.ajouter_produit(produit, quantite)
+
+        if _delta_demande(request):
+            return _reponse_panier_delta(
+                request, panier.pk, LignePanier.objects.filter(panier=panier, produit=produit)
+            )
 
         # Optimisation : précharger les relations
+        contexte = _contexte_lignes(request)
         panier = Panier.objects.prefetch_related(
-            'lignes__produit__fournisseur',
-            'lignes__produit__categorie',
-            'lignes__produit__souscategorie'
+            _prefetch_produits_lignes('lignes__produit', contexte)
         ).get(pk=panier.pk)
-        serializers = PanierSerializer(panier)
+        serializers = PanierSerializer(panier, context=contexte)
         return Response(serializers.data)
 
 
+@api_view(['POST'])
+@authentication_classes([ClientTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def panier_lot_view(request, pk_client):
+    """
+    POST /api/<pk-client>/panier/lot/
+
+    Applique un lot d'opérations au panier en une seule transaction
+    (recommande, liste enregistrée, synchronisation d'un panier hors ligne)
+    et retourne le panier final.
+
+    Corps : {"operations": [{"operation": "ajouter" | "retirer" | "definir",
+                             "produit_id": 12, "quantite": 2}, ...]}
+
+    Avec ?reponse=delta : retourne seulement les lignes touchées par le lot
+    et les totaux du panier (voir _reponse_panier_delta)
+    """
+    client = get_object_or_404(Client, pk=pk_client)
+
+    if client.username != request.user.username:
+        return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
+
+    lot = LotOperationsPanierSerializer(data=request.data)
+    if not lot.is_valid():
+        return Response(lot.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    operations = [
+        (op['operation'], op['produit_id'], op['quantite'])
+        for op in lot.validated_data['operations']
+    ]
+    panier, created = Panier.objects.get_or_create(client=client, commande__isnull=True)
+    try:
+        lignes_supprimees = panier.appliquer_operations(operations)
+    except DjangoValidationError as e:
+        return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+    if _delta_demande(request):
+        return _reponse_panier_delta(
+            request, panier.pk,
+            LignePanier.objects.filter(panier=panier, produit_id__in={op[1] for op in operations}),
+            lignes_supprimees
+        )
+
+    # Optimisation : précharger les relations
+    contexte = _contexte_lignes(request)
+    panier = Panier.objects.prefetch_related(
+        _prefetch_produits_lignes('lignes__produit', contexte)
+    ).get(pk=panier.pk)
+    serializers = PanierSerializer(panier, context=contexte)
+    return Response(serializers.data)
+
+
+@api_view(['POST'])
+@authentication_classes([ClientTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def panier_revalider_view(request, pk_client):
+    """
+    POST /api/<pk-client>/panier/revalider/
+
+    Rafraîchit les prix figés des lignes avec les prix actuels des produits
+    (avant le paiement par exemple) et retourne le panier ainsi que les
+    identifiants des lignes dont le prix a changé.
+    """
+    client = get_object_or_404(Client, pk=pk_client)
+
+    if client.username != request.user.username:
+        return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
+
+    panier, created = Panier.objects.get_or_create(client=client, commande__isnull=True)
+    lignes_modifiees = panier.revalider_prix()
+
+    contexte = _contexte_lignes(request)
+    panier = Panier.objects.prefetch_related(
+        _prefetch_produits_lignes('lignes__produit', contexte)
+    ).get(pk=panier.pk)
+    return Response({
+        'panier': PanierSerializer(panier, context=contexte).data,
+        'lignes_modifiees': [ligne.pk for ligne in lignes_modifiees],
+    })
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @authentication_classes([ClientTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def ligne_panier_view(request, pk_client, pk_ligne):
-    """GET/PUT/DELETE /api/<pk-client>/panier/<pk-ligne>"""
+    """
+    GET/PUT/DELETE /api/<pk-client>/panier/<pk-ligne>
+
+    PUT/DELETE avec ?reponse=delta : retourne la ligne modifiée (ou
+    l'identifiant de la ligne supprimée) et les totaux du panier
+    """
     client = get_object_or_404(Client, pk=pk_client)
 
     if client.username != request.user.username:
         return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
 
-    # Optimisation : précharger les relations
-    ligne = get_object_or_404(
-        LignePanier.objects.select_related(
-            'produit__fournisseur',
-            'produit__categorie',
-            'produit__souscategorie',
-            'panier'
-        ),
-        pk=pk_ligne,
-        panier__client=client
-    )
+    ligne = get_object_or_404(LignePanier.objects.select_related('panier'), pk=pk_ligne, panier__client=client)
+    contexte = _contexte_lignes(request)
 
     if request.method == 'GET':
-        serializers = LignePanierSerializer(ligne)
-        return Response(serializers.data)
+        return Response(_serialiser_ligne(ligne.pk, contexte))
 
     elif request.method == 'PUT':
+        # Écriture validée par le serializer complet, réponse dans la représentation des lignes du panier
         serializers = LignePanierSerializer(ligne, data=request.data, partial=True)
         if serializers.is_valid():
             serializers.save()
-            # Recharger avec les relations
-            ligne = LignePanier.objects.select_related(
-                'produit__fournisseur',
-                'produit__categorie',
-                'produit__souscategorie'
-            ).get(pk=ligne.pk)
-            serializers = LignePanierSerializer(ligne)
-            return Response(serializers.data)
+            if _delta_demande(request):
+                return _reponse_panier_delta(request, ligne.panier_id, LignePanier.objects.filter(pk=ligne.pk))
+            return Response(_serialiser_ligne(ligne.pk, contexte))
         return Response(serializers.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
+        pk_ligne = ligne.pk
         ligne.delete()
+        if _delta_demande(request):
+            return _reponse_panier_delta(request, ligne.panier_id, LignePanier.objects.none(), [pk_ligne])
         return Response({'message': 'Ligne supprimée'}, status=status.HTTP_204_NO_CONTENT)
 
 
 # ============= COMMANDE VIEWS =============
+# Statuts de chaque onglet de la liste des commandes (?groupe=)
+GROUPES_STATUTS_COMMANDE = {
+    'en_cours': ['en_attente', 'en_cours', 'en_livraison'],
+    'historique': ['terminee', 'annulee'],
+}
+
+
 @api_view(['GET', 'POST'])
 @authentication_classes([ClientTokenAuthentication])
 @permission_classes([IsAuthenticated])
@@ -489,14 +638,28 @@ def commandes_view(request, pk_client):
         return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
-        commandes = Commande.objects.filter(client=client).order_by('-date_commande')
+        # Les montants sont stockés sur la commande : aucune ligne n'est chargée,
+        # le détail (commande_detail_view) sert les lignes
+        commandes = Commande.objects.filter(client=client).select_related('client')
+
+        # ?groupe=en_cours|historique, ?cursor= / ?page_size= : page keyset {next, first, results}
+        groupe = request.query_params.get('groupe')
+        paginator = CommandesKeysetPagination()
+        if groupe is not None or paginator.est_demandee(request):
+            if groupe is not None:
+                if groupe not in GROUPES_STATUTS_COMMANDE:
+                    return Response(
+                        {'groupe': f"Valeurs possibles : {', '.join(GROUPES_STATUTS_COMMANDE)}."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                commandes = commandes.filter(statut__in=GROUPES_STATUTS_COMMANDE[groupe])
+            page = paginator.paginate_queryset(commandes, request)
+            return paginator.get_paginated_response(CommandeSerializer(page, many=True).data)
 
         # Séparer les commandes en cours et l'historique
-        statuts_en_cours = ['en_attente', 'en_cours', 'en_livraison']
-        statuts_termines = ['terminee', 'annulee']
-
-        commandes_en_cours = commandes.filter(statut__in=statuts_en_cours)
-        historique_commandes = commandes.filter(statut__in=statuts_termines)
+        commandes = commandes.order_by('-date_commande')
+        commandes_en_cours = commandes.filter(statut__in=GROUPES_STATUTS_COMMANDE['en_cours'])
+        historique_commandes = commandes.filter(statut__in=GROUPES_STATUTS_COMMANDE['historique'])
 
         # Sérialiser les deux listes
         serializer_en_cours = CommandeSerializer(commandes_en_cours, many=True)
@@ -546,8 +709,15 @@ def commande_detail_view(request, pk_client, pk_commande):
     if client.username != request.user.username:
         return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
     
-    commande = get_object_or_404(Commande, pk=pk_commande, client=client)
-    serializers = CommandeDetailSerializer(commande)
+    contexte = _contexte_lignes(request)
+    commande = get_object_or_404(
+        Commande.objects.select_related('client', 'panier').prefetch_related(
+            _prefetch_produits_lignes('panier__lignes__produit', contexte)
+        ),
+        pk=pk_commande,
+        client=client
+    )
+    serializers = CommandeDetailSerializer(commande, context=contexte)
     return Response(serializers.data)
 
 
@@ -572,6 +742,34 @@ def client_fournisseurs_view(request, pk_client):
 
 
 # ============= MAGASIN (vue client) =============
+def _donnees_catalogue(request, produits, champs):
+    """
+    Sérialise le catalogue selon le mode demandé :
+    - ?cursor= / ?page_size= : page keyset {next, first, results}
+    - sinon : liste complète (comportement historique)
+    """
+    rapide = ProduitLectureRapide(champs)
+    paginator = CatalogueKeysetPagination()
+    if paginator.est_demandee(request):
+        page = paginator.paginate_queryset(rapide.lignes(produits), request)
+        return paginator.get_paginated_data([rapide.representer(ligne) for ligne in page])
+
+    return rapide.serialiser(produits)
+
+
+def _reponse_catalogue_ndjson(produits, champs):
+    rapide = ProduitLectureRapide(champs)
+    return reponse_ndjson(rapide.lignes(produits), rapide.representer)
+
+
+def _reponse_catalogue(request, produits):
+    """Réponse catalogue non cachée (?stream=ndjson pour un flux NDJSON)"""
+    champs = champs_produit_demandes(request)
+    if streaming_demande(request):
+        return _reponse_catalogue_ndjson(produits, champs)
+    return Response(_donnees_catalogue(request, produits, champs))
+
+
 @api_view(['GET'])
 @authentication_classes([ClientTokenAuthentication])
 @permission_classes([IsAuthenticated])
@@ -583,8 +781,7 @@ def magasin_client_view(request, pk_client):
         return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
 
     produits = Produit.objects.filter(est_actif=True)
-    serializers = ProduitSerializer(produits, many=True)
-    return Response(serializers.data)
+    return _reponse_catalogue(request, produits)
 
 
 @api_view(['GET'])
@@ -598,7 +795,7 @@ def magasin_produit_client_view(request, pk_client, pk_produit):
         return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
     
     produit = get_object_or_404(Produit, pk=pk_produit)
-    serializers = ProduitDetailSerializer(produit)
+    serializers = ProduitDetailSerializer(produit, champs=champs_produit_demandes(request, par_defaut=None))
     return Response(serializers.data)
 
 
@@ -645,21 +842,79 @@ class FournisseurViewSet(viewsets.ModelViewSet):
 
 
 # ============= ROUTES GLOBALES =============
+RECHERCHE_LIMITE_DEFAUT = 20
+RECHERCHE_LIMITE_MAX = 100
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def magasin_view(request):
-    """GET /api/magasin"""
-    # Optimisation: select_related pour les relations ForeignKey
-    produits = Produit.objects.filter(
-        est_actif=True
-    ).select_related(
-        'fournisseur',
-        'categorie',
-        'souscategorie',
-        'soussouscategorie'
+    """GET /api/magasin (?cursor=&page_size= pour paginer, ?stream=ndjson pour streamer)"""
+    produits = Produit.objects.filter(est_actif=True)
+    champs = champs_produit_demandes(request)
+    if streaming_demande(request):
+        return _reponse_catalogue_ndjson(produits, champs)
+    return reponse_catalogue_cachee(
+        request, 'magasin', lambda: _donnees_catalogue(request, produits, champs)
     )
-    serializers = ProduitSerializer(produits, many=True)
-    return Response(serializers.data)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def magasin_filtres_view(request):
+    """
+    GET /api/magasin/filtres/ - page filtrée + comptes de chaque facette
+
+    Filtres : est_bio, est_local, en_promotion, est_nouveaute (true/false),
+    categorie, souscategorie, soussouscategorie, fournisseur, origine
+    (valeurs séparées par des virgules), prix_min, prix_max (prix HT).
+    Pagination par curseur comme /api/magasin/ (?cursor=&page_size=).
+    """
+    filtres = lire_filtres(request)
+    champs = champs_produit_demandes(request)
+    produits = Produit.objects.filter(est_actif=True)
+
+    def construire():
+        rapide = ProduitLectureRapide(champs)
+        paginator = CatalogueKeysetPagination()
+        page = paginator.paginate_queryset(
+            rapide.lignes(filtrer_produits(produits, filtres)),
+            request
+        )
+        data = paginator.get_paginated_data([rapide.representer(ligne) for ligne in page])
+        data.update(calculer_facettes(produits, filtres))
+        return data
+
+    return reponse_catalogue_cachee(request, 'filtres', construire)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def magasin_recherche_view(request):
+    """GET /api/magasin/recherche/?q=<texte>&limit=<n> - recherche plein texte classée"""
+    requete = request.query_params.get('q', '').strip()
+    try:
+        limite = int(request.query_params.get('limit', RECHERCHE_LIMITE_DEFAUT))
+    except ValueError:
+        return Response({'error': 'limit doit être un entier'}, status=status.HTTP_400_BAD_REQUEST)
+    limite = max(1, min(limite, RECHERCHE_LIMITE_MAX))
+    champs = champs_produit_demandes(request)
+
+    def construire():
+        resultats = TermeRecherche.rechercher(requete, limite)
+        rapide = ProduitLectureRapide(champs)
+        lignes = {
+            ligne['id']: ligne
+            for ligne in rapide.lignes(Produit.objects.filter(pk__in=[pk for pk, _ in resultats]))
+        }
+        trouves = [rapide.representer(lignes[pk]) for pk, _ in resultats if pk in lignes]
+        return {
+            'q': requete,
+            'count': len(trouves),
+            'results': trouves,
+        }
+
+    return reponse_catalogue_cachee(request, 'recherche', construire)
 
 
 @api_view(['GET'])
@@ -667,7 +922,7 @@ def magasin_view(request):
 def magasin_produit_view(request, pk_produit):
     """GET /api/magasin/<pk-produit>"""
     produit = get_object_or_404(Produit, pk=pk_produit)
-    serializers = ProduitDetailSerializer(produit)
+    serializers = ProduitDetailSerializer(produit, champs=champs_produit_demandes(request, par_defaut=None))
     return Response(serializers.data)
 
 
@@ -676,14 +931,15 @@ def magasin_produit_view(request, pk_produit):
 @permission_classes([AllowAny])
 def categories_view(request):
     """GET /api/categories"""
-    categories = Categorie.objects.filter(
-        est_active=True
-    ).prefetch_related(
-        'souscategories__soussouscategories'
-    ).order_by('ordre')
-    from .serializers import CategorieSerializer
-    serializers = CategorieSerializer(categories, many=True)
-    return Response(serializers.data)
+    def construire():
+        categories = Categorie.objects.filter(
+            est_active=True
+        ).prefetch_related(
+            'souscategories__soussouscategories'
+        ).order_by('ordre')
+        return CategorieSerializer(categories, many=True).data
+
+    return reponse_catalogue_cachee(request, 'categories', construire)
 
 
 # ============= FOURNISSEURS PUBLICS =============
@@ -691,10 +947,11 @@ def categories_view(request):
 @permission_classes([AllowAny])
 def fournisseurs_view(request):
     """GET /api/fournisseurs"""
-    fournisseurs = Fournisseur.objects.all().order_by('-date_ajoutee')
-    from .serializers import FournisseurSerializer
-    serializers = FournisseurSerializer(fournisseurs, many=True)
-    return Response(serializers.data)
+    def construire():
+        fournisseurs = Fournisseur.objects.all().order_by('-date_ajoutee')
+        return FournisseurSerializer(fournisseurs, many=True).data
+
+    return reponse_catalogue_cachee(request, 'fournisseurs', construire)
 
 
 # ============= LIVREURS =============
@@ -738,3 +995,120 @@ def livreur_tarifs_view(request, pk_livreur):
     return Response(serializer.data)
 
 
+# ============= DEVIS DE LIVRAISON =============
+def _devis_livraison(poids, demande):
+    """
+    Livreurs éligibles et points relais pour un colis de `poids` kg
+
+    Les prix viennent de l'index des tarifs en mémoire (aucune requête après
+    le premier appel) ; les points relais sont lus en une requête.
+    """
+    livreurs = []
+    for cotation in get_index_tarifs().coter(poids):
+        livreur, prix = cotation['livreur'], cotation['prix_livraison']
+        if prix is None:
+            continue
+        livreurs.append({
+            'pk': livreur.pk,
+            'nom_entreprise': livreur.nom,
+            'type_service': livreur.type_service,
+            'delai_livraison': DELAIS_LIVRAISON.get(livreur.type_service, DELAIS_LIVRAISON['standard']),
+            'prix_livraison': float(round(prix, 2)),
+        })
+
+    if 'latitude' in demande and 'nb_points_relais' in demande:
+        proches = PointRelais.plus_proches(
+            demande['latitude'], demande['longitude'], demande['nb_points_relais'], demande['rayon_km']
+        )
+    elif 'latitude' in demande:
+        proches = PointRelais.proches(demande['latitude'], demande['longitude'], demande['rayon_km'])
+    elif 'code_postal' in demande:
+        proches = [
+            (point, None)
+            for point in PointRelais.objects.filter(est_actif=True, code_postal=demande['code_postal'])
+        ]
+    else:
+        proches = []
+
+    return {
+        'poids_total': float(poids),
+        'livreurs': livreurs,
+        'points_relais': [
+            {
+                'pk': point.pk,
+                'nom': point.nom,
+                'adresse': point.adresse,
+                'code_postal': point.code_postal,
+                'ville': point.ville,
+                'horaires_ouverture': point.horaires_ouverture,
+                'distance': distance,
+            }
+            for point, distance in proches
+        ],
+    }
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def devis_livraison_view(request):
+    """
+    GET /api/livraison/devis/?poids=&code_postal=&latitude=&longitude=&rayon_km=&nb_points_relais=
+
+    Prix, délai et type de service de chaque livreur éligible pour le poids
+    donné, avec les points relais de la destination
+    """
+    demande = DemandeDevisLivraisonSerializer(data=request.query_params)
+    if not demande.is_valid():
+        return Response(demande.errors, status=status.HTTP_400_BAD_REQUEST)
+    if 'poids' not in demande.validated_data:
+        return Response({'poids': ['Ce champ est obligatoire.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(_devis_livraison(demande.validated_data['poids'], demande.validated_data))
+
+
+@api_view(['GET'])
+@authentication_classes([ClientTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def panier_devis_livraison_view(request, pk_client):
+    """
+    GET /api/<pk-client>/livraison/devis/?code_postal=&ville=&latitude=&longitude=&rayon_km=
+
+    Devis de livraison du panier du client : le poids est celui enregistré
+    sur le panier, sans relire les lignes. Avec une adresse, les fournisseurs
+    du panier qui n'y livrent pas sont listés dans `fournisseurs_non_livrables`
+    (une requête, puis l'index des zones de livraison).
+    """
+    client = get_object_or_404(Client, pk=pk_client)
+
+    if client.username != request.user.username:
+        return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
+
+    demande = DemandeDevisLivraisonSerializer(data=request.query_params)
+    if not demande.is_valid():
+        return Response(demande.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    panier = Panier.objects.filter(client=client, commande__isnull=True).only('pk', 'poids_total', 'nb_articles').first()
+    if panier is None or not panier.nb_articles:
+        return Response({'error': 'Le panier est vide'}, status=status.HTTP_400_BAD_REQUEST)
+
+    devis = _devis_livraison(panier.poids_total, demande.validated_data)
+
+    adresse = {
+        champ: demande.validated_data[champ]
+        for champ in ('code_postal', 'ville', 'latitude', 'longitude')
+        if champ in demande.validated_data
+    }
+    if adresse:
+        fournisseurs = dict(
+            LignePanier.objects.filter(panier=panier, produit__fournisseur__isnull=False)
+            .values_list('produit__fournisseur_id', 'produit__fournisseur__nom')
+            .distinct()
+        )
+        devis['fournisseurs_non_livrables'] = [
+            {'pk': pk, 'nom': fournisseurs[pk]}
+            for pk in get_index_zones_livraison().non_livrables(fournisseurs, **adresse)
+        ]
+
+    return Response(devis)
+
+
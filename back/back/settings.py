@@ -312,6 +312,10 @@ MIDDLEWARE = [
 >>>>>>> e097b66e17a2ea974af903e357531f5ddcf8880b
 ]
 
+# Compression brotli/gzip des réponses JSON (les réponses du catalogue en
+# cache arrivent déjà compressées et sont laissées telles quelles)
+MIDDLEWARE.append('api.compression.CompressionMiddleware')
+
 
 
 
@@ -540,6 +544,16 @@ CACHES = {
     }
 }
 
+# Catalogue API : taille de page par défaut / maximale (pagination keyset)
+CATALOGUE_PAGE_SIZE = int(os.getenv('CATALOGUE_PAGE_SIZE', '50'))
+CATALOGUE_MAX_PAGE_SIZE = int(os.getenv('CATALOGUE_MAX_PAGE_SIZE', '200'))
+# Durée de vie des réponses catalogue en cache (invalidées par version du catalogue)
+CATALOGUE_CACHE_TIMEOUT = int(os.getenv('CATALOGUE_CACHE_TIMEOUT', '3600'))
+
+# Liste des commandes d'un client : taille de page par défaut / maximale (pagination keyset)
+COMMANDES_PAGE_SIZE = int(os.getenv('COMMANDES_PAGE_SIZE', '20'))
+COMMANDES_MAX_PAGE_SIZE = int(os.getenv('COMMANDES_MAX_PAGE_SIZE', '100'))
+
 # Optimisation des requêtes
 if DEBUG:
     # Activer le logging des requêtes SQL en développement
@@ -561,3 +575,15 @@ STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')
 if not STRIPE_SECRET_KEY and not DEBUG:
     raise ValueError("STRIPE_SECRET_KEY doit être défini en production")
 >>>>>>> e097b66e17a2ea974af903e357531f5ddcf8880b
+
+# Versions du catalogue et des index en mémoire (tarifs, zones de livraison),
+# lues par tous les workers : elles ne peuvent pas vivre dans un cache propre
+# à chaque processus. Table en base créée par la migration produits 0007.
+CACHES = {
+    **globals().get('CACHES', {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}),
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_versions',
+        'TIMEOUT': None,
+    },
+}
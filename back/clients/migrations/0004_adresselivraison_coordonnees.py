@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+from livraisons.geocodage import coordonnees_exactes
+
+
+def localiser_adresses(apps, schema_editor):
+    """Renseigne les coordonnées des adresses de livraison existantes"""
+    AdresseLivraison = apps.get_model('clients', 'AdresseLivraison')
+    adresses = []
+    for adresse in AdresseLivraison.objects.only('id', 'code_postal', 'ville'):
+        position = coordonnees_exactes(adresse.code_postal, adresse.ville)
+        if position is not None:
+            adresse.latitude, adresse.longitude = position
+            adresses.append(adresse)
+    AdresseLivraison.objects.bulk_update(adresses, ['latitude', 'longitude'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_alter_client_nom_clienttoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adresselivraison',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Latitude'),
+        ),
+        migrations.AddField(
+            model_name='adresselivraison',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Longitude'),
+        ),
+        migrations.RunPython(localiser_adresses, migrations.RunPython.noop),
+    ]
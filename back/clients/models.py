@@ -771,6 +771,21 @@ class AdresseLivraison(models.Model):
         verbose_name='Instructions de livraison',
         help_text='Digicode, étage, sonnette, etc.'
     )
+
+    # Position approximative (centroïde de la commune), renseignée à l'enregistrement
+    latitude = models.FloatField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Latitude'
+    )
+
+    longitude = models.FloatField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Longitude'
+    )
     
     est_principale = models.BooleanField(
         default=False,
@@ -802,15 +817,44 @@ class AdresseLivraison(models.Model):
         destinataire = f" ({self.nom_destinataire})" if self.nom_destinataire else ""
         return f"{self.adresse}, {self.code_postal} {self.ville}{destinataire}{principale}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._localite_enregistree = (
+            instance.__dict__.get('code_postal'), instance.__dict__.get('ville')
+        )
+        return instance
+
+    def localiser(self) -> None:
+        """
+        Renseigne les coordonnées de la commune à partir du code postal (table
+        locale, sans appel réseau) ; inconnues si la commune n'est pas dans la table
+        """
+        from livraisons.geocodage import coordonnees_exactes
+
+        self.latitude, self.longitude = coordonnees_exactes(self.code_postal, self.ville) or (None, None)
+
     def save(self, *args: Any, **kwargs: Any) -> None:
-        """Si définie comme principale, retirer le flag des autres"""
+        """
+        Si définie comme principale, retirer le flag des autres.
+        Les coordonnées suivent le code postal et la ville.
+        """
         if self.est_principale:
             AdresseLivraison.objects.filter(
                 client=self.client,
                 est_principale=True
             ).exclude(pk=self.pk).update(est_principale=False)
-        
+
+        localite = (self.code_postal, self.ville)
+        update_fields = kwargs.get('update_fields')
+        ecrit_localite = update_fields is None or {'code_postal', 'ville'} & set(update_fields)
+        if ecrit_localite and (self.latitude is None or localite != getattr(self, '_localite_enregistree', None)):
+            self.localiser()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'latitude', 'longitude'}
+
         super().save(*args, **kwargs)
+        self._localite_enregistree = localite
 
     def to_dict(self) -> dict:
         """Convertit l'adresse en dictionnaire"""
@@ -824,6 +868,8 @@ class AdresseLivraison(models.Model):
             "pays": self.pays,
             "telephone": self.telephone,
             "instructions": self.instructions,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
             "est_principale": self.est_principale,
             "date_ajoutee": self.date_ajoutee.isoformat() if self.date_ajoutee else None,
         }
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:05
+
+from datetime import datetime
+from django.db import migrations, models
+
+
+def initialiser_compteurs(apps, schema_editor):
+    """Reprend le dernier numéro attribué chaque jour (CMD-YYYYMMDD-XXXX)"""
+    Commande = apps.get_model('commandes', 'Commande')
+    CompteurCommandes = apps.get_model('commandes', 'CompteurCommandes')
+    derniers = {}
+    for numero in Commande.objects.filter(numero_commande__startswith='CMD-').values_list('numero_commande', flat=True):
+        try:
+            _, date_str, numero_str = numero.split('-')
+            jour = datetime.strptime(date_str, '%Y%m%d').date()
+            valeur = int(numero_str)
+        except ValueError:
+            continue
+        derniers[jour] = max(derniers.get(jour, 0), valeur)
+    CompteurCommandes.objects.bulk_create(
+        [CompteurCommandes(jour=jour, dernier_numero=valeur) for jour, valeur in derniers.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurCommandes',
+            fields=[
+                ('jour', models.DateField(primary_key=True, serialize=False, verbose_name='Jour')),
+                ('dernier_numero', models.PositiveIntegerField(default=0, verbose_name='Dernier numéro attribué')),
+            ],
+            options={
+                'verbose_name': 'Compteur de commandes',
+                'verbose_name_plural': 'Compteurs de commandes',
+            },
+        ),
+        migrations.RunPython(initialiser_compteurs, migrations.RunPython.noop),
+    ]
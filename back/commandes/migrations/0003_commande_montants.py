@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:20
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def reprendre_montants(apps, schema_editor):
+    """Recopie les totaux déjà stockés sur le panier de chaque commande"""
+    Commande = apps.get_model('commandes', 'Commande')
+    Panier = apps.get_model('paniers', 'Panier')
+    panier = Panier.objects.filter(pk=OuterRef('panier_id'))
+    Commande.objects.filter(panier__isnull=False).update(
+        total_ht=Subquery(panier.values('total_ht')[:1]),
+        total_tva=Subquery(panier.values('total_tva')[:1]),
+        nb_articles=Subquery(panier.values('nb_articles')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0002_compteurcommandes'),
+        ('paniers', '0005_lignepanier_prix_figes_requis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commande',
+            name='nb_articles',
+            field=models.PositiveIntegerField(default=0, verbose_name="Nombre d'articles"),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='total_ht',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, verbose_name='Montant HT'),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='total_tva',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, verbose_name='Montant TVA'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['client', '-date_commande', 'id'], name='commandes_c_client__ef0590_idx'),
+        ),
+        migrations.RunPython(reprendre_montants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:50
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+
+COMPTEURS_STATUT_LIGNE = {
+    'en_attente': 'lignes_en_attente',
+    'en_preparation': 'lignes_en_preparation',
+    'en_livraison': 'lignes_en_livraison',
+    'arrivee': 'lignes_arrivees',
+}
+
+
+def compter_lignes(apps, schema_editor):
+    """Compte les lignes du panier de chaque commande existante, par statut"""
+    Commande = apps.get_model('commandes', 'Commande')
+    LignePanier = apps.get_model('paniers', 'LignePanier')
+
+    commandes = {c.panier_id: c for c in Commande.objects.filter(panier__isnull=False).only('id', 'panier_id')}
+    statuts = defaultdict(dict)
+    lignes = (
+        LignePanier.objects.filter(panier_id__in=commandes)
+        .order_by()
+        .values_list('panier_id', 'statut')
+        .annotate(nombre=Count('id'))
+    )
+    for panier_id, statut, nombre in lignes:
+        statuts[panier_id][statut] = nombre
+
+    for panier_id, commande in commandes.items():
+        commande.nb_lignes = sum(statuts[panier_id].values())
+        for statut, champ in COMPTEURS_STATUT_LIGNE.items():
+            setattr(commande, champ, statuts[panier_id].get(statut, 0))
+    Commande.objects.bulk_update(
+        commandes.values(), ['nb_lignes', *COMPTEURS_STATUT_LIGNE.values()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0003_commande_montants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commande',
+            name='lignes_arrivees',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Lignes arrivées'),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='lignes_en_attente',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Lignes en attente'),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='lignes_en_livraison',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Lignes en livraison'),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='lignes_en_preparation',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Lignes en préparation'),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='nb_lignes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de lignes'),
+        ),
+        migrations.RunPython(compter_lignes, migrations.RunPython.noop),
+    ]
@@ -10,17 +10,20 @@ from django.utils import timezone
 =======
 # commandes/models.py
 
-from django.db import models
+from django.db import models, transaction
+from django.dispatch import receiver
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.db.models import Sum, Count, Q
+from django.db.models import F, Sum, Count, Q
+from collections import Counter
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
 from clients.models import Client
 from livraisons.models import Livreur, PointRelais
-from paniers.models import Panier, LignePanier
+from paniers.models import Panier, LignePanier, changer_statut_lignes, statuts_lignes_modifies
 from produits.models import Produit, StatutProduit
+from produits.stock import reserver_stock
 
 
 # ===================================
@@ -50,6 +53,27 @@ class Commande(models.Model):
     point_relais = models.ForeignKey(PointRelais, on_delete=models.SET_NULL, null=True, blank=True)
     avancement = models.FloatField(default=0.0)  # Champ pour enregistrer le pourcentage d'avancement
 =======
+# ===================================
+# AVANCEMENT DES LIGNES
+# ===================================
+# Compteur de la commande tenu à jour pour chaque statut de ligne suivi, et
+# poids de ce statut dans l'avancement (%). Les autres statuts ne comptent
+# que dans nb_lignes.
+COMPTEURS_STATUT_LIGNE = {
+    StatutProduit.EN_ATTENTE: 'lignes_en_attente',
+    StatutProduit.EN_PREPARATION: 'lignes_en_preparation',
+    StatutProduit.EN_LIVRAISON: 'lignes_en_livraison',
+    StatutProduit.ARRIVEE: 'lignes_arrivees',
+}
+POIDS_STATUT_LIGNE = {
+    StatutProduit.EN_ATTENTE: 0,
+    StatutProduit.EN_PREPARATION: 33,
+    StatutProduit.EN_LIVRAISON: 66,
+    StatutProduit.ARRIVEE: 100,
+}
+CHAMPS_COMPTEURS_LIGNES = ('nb_lignes', *COMPTEURS_STATUT_LIGNE.values())
+
+
 # ===================================
 # HISTORIQUE LIGNE PANIER (DÉCLARÉ EN PREMIER)
 # ===================================
@@ -248,6 +272,46 @@ class HistoriqueCommande(models.Model):
         return sum(ligne.poids_total for ligne in self.lignes.all())
 
 
+# ===================================
+# COMPTEUR DES NUMÉROS DE COMMANDE
+# ===================================
+class CompteurCommandes(models.Model):
+    """
+    Dernier numéro de commande attribué pour chaque jour
+
+    La ligne du jour est incrémentée par un UPDATE ... SET n = n + 1, qui la
+    verrouille jusqu'à la fin de la transaction, puis relue : deux commandes
+    simultanées ne peuvent pas obtenir le même numéro, sur toutes les bases,
+    et aucune lecture de la table des commandes n'est nécessaire.
+    """
+    jour = models.DateField(primary_key=True, verbose_name='Jour')
+    dernier_numero = models.PositiveIntegerField(default=0, verbose_name='Dernier numéro attribué')
+
+    class Meta:
+        verbose_name = 'Compteur de commandes'
+        verbose_name_plural = 'Compteurs de commandes'
+
+    def __str__(self):
+        return f"{self.jour:%Y-%m-%d} : {self.dernier_numero}"
+
+    @classmethod
+    def prochain_numero(cls, jour) -> int:
+        """
+        Incrémente le compteur de `jour` (créé à 1 s'il n'existe pas) et retourne sa valeur
+
+        À appeler hors de toute transaction longue : le verrou de la ligne du
+        jour est tenu jusqu'à la validation de la transaction englobante.
+        """
+        compteur = cls.objects.filter(jour=jour)
+        with transaction.atomic():
+            # L'UPDATE d'abord : la ligne est verrouillée avant d'être lue
+            if not compteur.update(dernier_numero=F('dernier_numero') + 1):
+                # Première commande du jour (get_or_create départage deux créations simultanées)
+                cls.objects.get_or_create(jour=jour)
+                compteur.update(dernier_numero=F('dernier_numero') + 1)
+            return compteur.values_list('dernier_numero', flat=True).get()
+
+
 # ===================================
 # MODÈLE COMMANDE
 # ===================================
@@ -345,6 +409,36 @@ class Commande(models.Model):
         default=Decimal('0.00'),
         verbose_name='Total HT'
     )
+
+    # Montants et nombre d'articles figés à la création : les listes de
+    # commandes les lisent sans charger les lignes du panier
+    total_ht = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Montant HT'
+    )
+
+    total_tva = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Montant TVA'
+    )
+
+    nb_articles = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Nombre d'articles"
+    )
+
+    # Nombre de lignes par statut, ajusté dans la transaction qui change le
+    # statut d'une ligne (voir ajuster_compteurs_commandes) : l'avancement et
+    # le statut de la commande s'en déduisent sans relire les lignes
+    nb_lignes = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de lignes')
+    lignes_en_attente = models.PositiveIntegerField(default=0, editable=False, verbose_name='Lignes en attente')
+    lignes_en_preparation = models.PositiveIntegerField(default=0, editable=False, verbose_name='Lignes en préparation')
+    lignes_en_livraison = models.PositiveIntegerField(default=0, editable=False, verbose_name='Lignes en livraison')
+    lignes_arrivees = models.PositiveIntegerField(default=0, editable=False, verbose_name='Lignes arrivées')
     
     # Type hints pour Pylance
     if TYPE_CHECKING:
@@ -358,6 +452,8 @@ class Commande(models.Model):
             models.Index(fields=['numero_commande']),
             models.Index(fields=['statut']),
             models.Index(fields=['-date_commande']),
+            # Liste paginée des commandes d'un client (curseur date_commande, pk)
+            models.Index(fields=['client', '-date_commande', 'id']),
         ]
 
     def __str__(self):
@@ -367,25 +463,12 @@ class Commande(models.Model):
     # ===================================
     # GÉNÉRATION DU NUMÉRO
     # ===================================
-    def generer_numero_commande(self):
+    @classmethod
+    def generer_numero_commande(cls):
         """Génère un numéro de commande unique au format CMD-YYYYMMDD-XXXX"""
-        date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'CMD-{date_str}'
-
-        derniere_commande = Commande.objects.filter(
-            numero_commande__startswith=prefix
-        ).order_by('-numero_commande').first()
-
-        if derniere_commande:
-            try:
-                dernier_numero = int(derniere_commande.numero_commande.split('-')[-1])
-                nouveau_numero = dernier_numero + 1
-            except (ValueError, IndexError):
-                nouveau_numero = 1
-        else:
-            nouveau_numero = 1
-
-        return f'{prefix}-{nouveau_numero:04d}'
+        jour = timezone.now().date()
+        nouveau_numero = CompteurCommandes.prochain_numero(jour)
+        return f'CMD-{jour:%Y%m%d}-{nouveau_numero:04d}'
 
     # ===================================
     # CRÉATION DE COMMANDE
@@ -396,9 +479,24 @@ class Commande(models.Model):
         Crée une commande à partir du panier actif du client
         et génère un nouveau panier vide
 
+        Le stock des produits est réservé dans la même transaction (voir
+        produits.stock.reserver_stock) : StockInsuffisant est levée avec
+        toutes les lignes en défaut et rien n'est enregistré.
+
+        Le numéro est attribué avant, dans sa propre transaction : le compteur
+        du jour n'est pas verrouillé pendant toute la création, au prix d'un
+        numéro perdu si la commande échoue.
+
         Returns:
             tuple: (commande, nouveau_panier)
         """
+        numero_commande = cls.generer_numero_commande()
+        return cls._creer_depuis_panier(numero_commande, client, livreur, point_relais)
+
+    @classmethod
+    @transaction.atomic
+    def _creer_depuis_panier(cls, numero_commande, client, livreur, point_relais):
+        """Création de la commande de creer_depuis_panier, en une transaction"""
         # Récupérer le panier actif
         panier_actuel = Panier.objects.filter(
             client=client, 
@@ -409,15 +507,27 @@ class Commande(models.Model):
             raise ValidationError("Aucun panier actif trouvé pour ce client.")
 
         # Vérifier que le panier contient des produits
-        lignes = LignePanier.objects.filter(panier=panier_actuel).select_related('produit')
+        lignes = LignePanier.objects.filter(panier=panier_actuel)
         if not lignes.exists():
             raise ValidationError("Le panier est vide. Ajoutez des produits avant de créer une commande.")
 
-        # Calculer le total avec Decimal
-        total = sum(
-            Decimal(str(ligne.quantite)) * ligne.produit.prix_ttc
-            for ligne in lignes
-        )
+        # Prix des lignes mis à jour une dernière fois, puis figés dans la commande
+        panier_actuel.revalider_prix()
+        lignes = list(lignes)
+
+        # Réserver le stock de toutes les lignes, tout ou rien
+        reserver_stock({ligne.produit_id: ligne.quantite for ligne in lignes})
+
+        statuts = Counter(ligne.statut for ligne in lignes)
+        compteurs = {champ: statuts[statut] for statut, champ in COMPTEURS_STATUT_LIGNE.items()}
+
+        # Totaux du panier, recalculés par revalider_prix si un prix a changé
+        montants = {
+            'total': panier_actuel.total_ttc,
+            'total_ht': panier_actuel.total_ht,
+            'total_tva': panier_actuel.total_tva,
+            'nb_articles': panier_actuel.nb_articles,
+        }
 
         # Marquer le panier comme terminé
         panier_actuel.statut = 'termine'
@@ -607,8 +717,11 @@ class HistoriqueLignePanier(models.Model):
         return f"{self.produit.nom} - Quantité : {self.quantite}"
 =======
             point_relais=point_relais,
-            total=total,
-            statut=StatutCommande.EN_ATTENTE
+            numero_commande=numero_commande,
+            statut=StatutCommande.EN_ATTENTE,
+            nb_lignes=len(lignes),
+            **compteurs,
+            **montants
         )
 
         # Créer un nouveau panier vide pour le client
@@ -622,58 +735,62 @@ class HistoriqueLignePanier(models.Model):
     # ===================================
     # MISE À JOUR DU STATUT
     # ===================================
-    from django.db.models import Count, Q
-
-    def mettre_a_jour_statut(self):
+    def deriver_statut(self):
         """
-        Met à jour le statut de la commande en fonction des lignes du panier
-        """
-        if not self.panier:
-            return
+        Calcule l'avancement et le statut à partir des compteurs de lignes
 
-        # Récupérer toutes les lignes
-        lignes = LignePanier.objects.filter(panier=self.panier)
-        total_lignes = lignes.count()
+        Aucune requête : les compteurs sont tenus à jour à chaque changement
+        de statut d'une ligne. Une commande annulée garde son statut.
 
-        if not lignes.exists():
+        Returns:
+            bool: True si l'avancement ou le statut a changé
+        """
+        avant = (self.avancement, self.statut)
+
+        if not self.nb_lignes:
             self.avancement = 0
-            return
-
-        # ✅ Poids par statut
-        poids_statuts = {
-            'en_attente': 0,
-            'en_preparation': 33,
-            'en_livraison': 66,
-            'termine': 100,
-        }
+            return avant != (self.avancement, self.statut)
 
-        # ✅ Calcul de l'avancement
         total_avancement = sum(
-            poids_statuts.get(ligne.statut, 0)
-            for ligne in lignes
+            poids * getattr(self, COMPTEURS_STATUT_LIGNE[statut])
+            for statut, poids in POIDS_STATUT_LIGNE.items()
         )
+        self.avancement = round(total_avancement / self.nb_lignes, 2)
+
+        if self.statut != StatutCommande.ANNULEE:
+            if self.lignes_arrivees == self.nb_lignes:
+                self.statut = StatutCommande.TERMINEE
+            elif self.lignes_en_livraison > 0:
+                self.statut = StatutCommande.EN_LIVRAISON
+            elif self.lignes_en_preparation > 0:
+                self.statut = StatutCommande.EN_COURS
+            else:
+                self.statut = StatutCommande.EN_ATTENTE
 
-        self.avancement = round((total_avancement / total_lignes), 2) if total_lignes > 0 else 0
+        return avant != (self.avancement, self.statut)
 
-        # ✅ Compter les statuts EN UNE SEULE REQUÊTE
-        statuts_count = lignes.aggregate(
-            en_attente=Count('id', filter=Q(statut='en_attente')),
-            en_preparation=Count('id', filter=Q(statut='en_preparation')),
-            en_livraison=Count('id', filter=Q(statut='en_livraison')),
-            termine=Count('id', filter=Q(statut='termine')),
-        )
+    def mettre_a_jour_statut(self):
+        """
+        Met à jour l'avancement et le statut de la commande (enregistrés
+        seulement s'ils changent)
+        """
+        if self.deriver_statut():
+            self.save(update_fields=['avancement', 'statut', 'date_modification'])
 
-        # ✅ Déterminer le statut global
-        if statuts_count['termine'] == total_lignes:
-            self.statut = StatutCommande.TERMINEE
-        elif statuts_count['en_livraison'] > 0:
-            self.statut = StatutCommande.EN_LIVRAISON
-        elif statuts_count['en_preparation'] > 0:
-            self.statut = StatutCommande.EN_COURS
-        else:
-            self.statut = StatutCommande.EN_ATTENTE
+    def recompter_lignes(self):
+        """Recalcule les compteurs de lignes depuis le panier (réparation, reprise de données)"""
+        statuts = dict(
+            LignePanier.objects.filter(panier_id=self.panier_id)
+            .order_by()
+            .values_list('statut')
+            .annotate(nombre=Count('id'))
+        ) if self.panier_id else {}
 
-        self.save()
+        self.nb_lignes = sum(statuts.values())
+        for statut, champ in COMPTEURS_STATUT_LIGNE.items():
+            setattr(self, champ, statuts.get(statut, 0))
+        self.deriver_statut()
+        self.save(update_fields=[*CHAMPS_COMPTEURS_LIGNES, 'avancement', 'statut', 'date_modification'])
 
 
     # ===================================
@@ -682,9 +799,9 @@ class HistoriqueLignePanier(models.Model):
     def calculer_total(self):
         """Recalculer le total à partir des lignes du panier"""
         if self.panier:
-            lignes = LignePanier.objects.filter(panier=self.panier).select_related('produit')
+            lignes = LignePanier.objects.filter(panier=self.panier)
             self.total = sum(
-                Decimal(str(ligne.quantite)) * ligne.produit.prix 
+                Decimal(str(ligne.quantite)) * ligne.prix_unitaire_ttc
                 for ligne in lignes
             )
             self.save()
@@ -734,8 +851,8 @@ class HistoriqueLignePanier(models.Model):
                 nom_produit=ligne.produit.nom,
                 reference_produit=getattr(ligne.produit, 'reference', ''),
                 quantite=ligne.quantite,
-                prix_unitaire=ligne.produit.prix,
-                poids=ligne.produit.poids if ligne.produit.poids else Decimal('0.000'),
+                prix_unitaire=ligne.prix_unitaire_ht,
+                poids=ligne.poids_unitaire,
                 statut=ligne.statut
             )
             for ligne in lignes
@@ -754,15 +871,11 @@ class HistoriqueLignePanier(models.Model):
         if not self.panier:
             raise ValidationError("Aucun panier associé à cette commande")
 
-        lignes = LignePanier.objects.filter(panier=self.panier)
-        total_lignes = lignes.count()
-        lignes_terminees = lignes.filter(statut=StatutProduit.ARRIVEE).count()
-
         # Vérifier que toutes les lignes sont terminées
-        if lignes_terminees != total_lignes:
+        if self.lignes_arrivees != self.nb_lignes:
             raise ValidationError(
                 f"Toutes les lignes doivent être terminées. "
-                f"({lignes_terminees}/{total_lignes} terminées)"
+                f"({self.lignes_arrivees}/{self.nb_lignes} terminées)"
             )
 
         self.statut = StatutCommande.TERMINEE
@@ -799,11 +912,13 @@ class HistoriqueLignePanier(models.Model):
         self.avancement = 0
         self.save()
 
-        # Remettre toutes les lignes en attente
+        # Remettre toutes les lignes en attente (compteurs ajustés en base)
         if self.panier:
-            LignePanier.objects.filter(panier=self.panier).update(
-                statut=StatutProduit.EN_ATTENTE
+            changer_statut_lignes(
+                LignePanier.objects.filter(panier=self.panier),
+                StatutProduit.EN_ATTENTE
             )
+            self.refresh_from_db(fields=[*CHAMPS_COMPTEURS_LIGNES, 'avancement', 'statut'])
 
         # Enregistrer dans l'historique
         HistoriqueCommande.objects.create(
@@ -828,12 +943,7 @@ class HistoriqueLignePanier(models.Model):
     @property
     def nombre_produits(self):
         """Retourne le nombre total de produits dans la commande"""
-        if self.panier:
-            result = LignePanier.objects.filter(panier=self.panier).aggregate(
-                total=Sum('quantite')
-            )
-            return result['total'] or 0
-        return 0
+        return self.nb_articles
 
     @property
     def peut_etre_modifiee(self):
@@ -849,4 +959,35 @@ class HistoriqueLignePanier(models.Model):
             self.numero_commande = self.generer_numero_commande()
 
         super().save(*args, **kwargs)
+
+
+@receiver(statuts_lignes_modifies)
+def ajuster_compteurs_commandes(sender, variations, **kwargs):
+    """
+    Reporte les changements de statut de lignes sur les commandes des paniers
+
+    Appelé dans la transaction qui modifie les lignes : les commandes sont
+    verrouillées et lues en une requête, puis compteurs, avancement et statut
+    enregistrés en une seconde, quel que soit le nombre de lignes modifiées.
+    """
+    commandes = list(
+        Commande.objects.select_for_update()
+        .filter(panier_id__in=variations)
+        .only('panier_id', 'avancement', 'statut', 'date_modification', *CHAMPS_COMPTEURS_LIGNES)
+    )
+    maintenant = timezone.now()
+    for commande in commandes:
+        for statut, delta in variations[commande.panier_id].items():
+            champ = COMPTEURS_STATUT_LIGNE.get(statut)
+            if champ:
+                # Borné à 0 si une ligne a été ajoutée après la commande sans être comptée
+                setattr(commande, champ, max(getattr(commande, champ) + delta, 0))
+        commande.deriver_statut()
+        # bulk_update ne renseigne pas les champs auto_now
+        commande.date_modification = maintenant
+
+    if commandes:
+        Commande.objects.bulk_update(
+            commandes, [*COMPTEURS_STATUT_LIGNE.values(), 'avancement', 'statut', 'date_modification']
+        )
 >>>>>>> e097b66e17a2ea974af903e357531f5ddcf8880b
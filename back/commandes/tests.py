@@ -1,3 +1,232 @@
-from django.test import TestCase
+import threading
+import uuid
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from clients.models import Client
+from paniers.models import LignePanier, Panier, changer_statut_lignes
+from produits.models import Produit, StatutProduit
+from produits.stock import StockInsuffisant, reserver_stock
+from produits.utils import get_version_catalogue
+
+from .models import Commande, CompteurCommandes, StatutCommande
+
+
+def creer_client(username='martin'):
+    return Client.objects.create(
+        username=username, email=f'{username}@example.fr', password=make_password('motdepasse'),
+        session_token=uuid.uuid4().hex, token_expiration=timezone.now() + timedelta(days=1)
+    )
+
+
+def creer_produit(nom, stock):
+    return Produit.objects.create(nom=nom, prix_ht=Decimal('2.00'), tva=Decimal('5.50'), stock_actuel=stock)
+
+
+class ReservationStockTests(TestCase):
+    def setUp(self):
+        self.client_commande = creer_client()
+        self.panier = Panier.objects.create(client=self.client_commande)
+        self.pommes = creer_produit('Pommes', 5)
+        self.poires = creer_produit('Poires', 1)
+        self.prunes = creer_produit('Prunes', 0)
+
+    def stocks(self):
+        return dict(Produit.objects.values_list('nom', 'stock_actuel'))
+
+    def test_reservation_decremente_tous_les_stocks(self):
+        self.panier.ajouter_produit(self.pommes, 2)
+        self.panier.ajouter_produit(self.poires, 1)
+
+        Commande.creer_depuis_panier(self.client_commande)
+
+        self.assertEqual(self.stocks(), {'Pommes': 3, 'Poires': 0, 'Prunes': 0})
+        self.assertEqual(Produit.objects.get(pk=self.poires.pk).statut, StatutProduit.RUPTURE)
+
+    def test_toutes_les_lignes_en_defaut_sont_signalees(self):
+        self.panier.ajouter_produit(self.pommes, 2)
+        self.panier.ajouter_produit(self.poires, 3)
+        self.panier.ajouter_produit(self.prunes, 1)
+
+        with self.assertRaises(StockInsuffisant) as contexte:
+            Commande.creer_depuis_panier(self.client_commande)
+
+        manques = {manque['produit']: manque['stock_disponible'] for manque in contexte.exception.manques}
+        self.assertEqual(manques, {'Poires': 1, 'Prunes': 0})
+        # Rien n'est décrémenté ni créé
+        self.assertEqual(self.stocks(), {'Pommes': 5, 'Poires': 1, 'Prunes': 0})
+        self.assertFalse(Commande.objects.exists())
+        self.assertEqual(Panier.objects.get(pk=self.panier.pk).statut, 'actif')
+
+    def test_catalogue_invalide_seulement_en_cas_de_rupture(self):
+        version = get_version_catalogue()
+        with self.captureOnCommitCallbacks(execute=True):
+            reserver_stock({self.pommes.pk: 2})
+        self.assertEqual(get_version_catalogue(), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserver_stock({self.pommes.pk: 1, self.poires.pk: 1})
+        self.assertGreater(get_version_catalogue(), version)
+
+
+class MontantsCommandeTests(TestCase):
+    def setUp(self):
+        self.client_commande = creer_client()
+        self.panier = Panier.objects.create(client=self.client_commande)
+        self.panier.ajouter_produit(creer_produit('Pommes', 10), 3)
+
+    def test_montants_figes_a_la_creation(self):
+        commande, _ = Commande.creer_depuis_panier(self.client_commande)
+
+        commande = Commande.objects.get(pk=commande.pk)
+        self.assertEqual(commande.total_ht, Decimal('6.00'))
+        self.assertEqual(commande.total_tva, Decimal('0.33'))
+        self.assertEqual(commande.total, Decimal('6.33'))
+        self.assertEqual(commande.nb_articles, 3)
+
+    def test_liste_paginee_sans_les_lignes(self):
+        for _ in range(3):
+            Commande.objects.create(client=self.client_commande, statut='en_attente', total_ht=Decimal('1.00'))
+        Commande.objects.create(client=self.client_commande, statut='terminee')
+        url = f'/api/{self.client_commande.pk}/commandes/'
+        entetes = {'HTTP_AUTHORIZATION': f'Token {self.client_commande.session_token}'}
+
+        # Authentification, client, puis une seule requête pour la page
+        with self.assertNumQueries(3):
+            page = self.client.get(url, {'groupe': 'en_cours', 'page_size': 2}, **entetes).json()
+        self.assertEqual(len(page['results']), 2)
+        self.assertNotIn('lignes', page['results'][0])
+        self.assertEqual(page['results'][0]['montant_total_ht'], '1.00')
+
+        suite = self.client.get(page['next'], **entetes).json()
+        self.assertEqual(len(suite['results']), 1)
+        self.assertIsNone(suite['next'])
+        ids = [commande['id'] for commande in page['results'] + suite['results']]
+        self.assertEqual(len(set(ids)), 3)
+
+        reponse = self.client.get(url, {'groupe': 'inconnu'}, **entetes)
+        self.assertEqual(reponse.status_code, 400)
+
+
+class AvancementCommandeTests(TestCase):
+    def setUp(self):
+        client_commande = creer_client()
+        panier = Panier.objects.create(client=client_commande)
+        for nom in ('Pommes', 'Poires', 'Prunes'):
+            panier.ajouter_produit(creer_produit(nom, 10), 1)
+        self.commande, _ = Commande.creer_depuis_panier(client_commande)
+        self.lignes = LignePanier.objects.filter(panier=self.commande.panier).order_by('pk')
+
+    def recharger(self):
+        return Commande.objects.get(pk=self.commande.pk)
+
+    def test_changement_d_une_ligne(self):
+        self.assertEqual((self.commande.nb_lignes, self.commande.lignes_en_attente), (3, 3))
+
+        ligne = self.lignes[0]
+        ligne.statut = StatutProduit.EN_LIVRAISON
+        ligne.save()
+
+        commande = self.recharger()
+        self.assertEqual((commande.lignes_en_attente, commande.lignes_en_livraison), (2, 1))
+        self.assertEqual(commande.statut, StatutCommande.EN_LIVRAISON)
+        self.assertEqual(commande.avancement, 22.0)
+
+        # Rien ne change si la ligne est réenregistrée avec le même statut
+        ligne.save()
+        self.assertEqual(self.recharger().lignes_en_livraison, 1)
+
+    def test_changement_en_masse_ecrit_la_commande_une_fois(self):
+        with CaptureQueriesContext(connection) as requetes:
+            self.assertEqual(changer_statut_lignes(self.lignes, StatutProduit.ARRIVEE), 3)
+
+        ecritures = [
+            requete['sql'] for requete in requetes.captured_queries
+            if requete['sql'].startswith('UPDATE "commandes_commande"')
+        ]
+        self.assertEqual(len(ecritures), 1)
+        commande = self.recharger()
+        self.assertEqual((commande.lignes_arrivees, commande.lignes_en_attente), (3, 0))
+        self.assertEqual((commande.statut, commande.avancement), (StatutCommande.TERMINEE, 100))
+
+        commande.panier.reinitialiser_statuts_lignes()
+        commande = self.recharger()
+        self.assertEqual((commande.lignes_en_attente, commande.statut), (3, StatutCommande.EN_ATTENTE))
+
+    def test_instance_perimee_comparee_au_statut_en_base(self):
+        # Chargée avant un changement en masse, puis réenregistrée avec son ancien statut
+        perimee = LignePanier.objects.get(pk=self.lignes[0].pk)
+        avant = self.recharger().date_modification
+        changer_statut_lignes(self.lignes, StatutProduit.ARRIVEE)
+        self.assertGreater(self.recharger().date_modification, avant)
+
+        perimee.save()
+        commande = self.recharger()
+        self.assertEqual((commande.lignes_en_attente, commande.lignes_arrivees), (1, 2))
+        self.assertEqual(commande.statut, StatutCommande.EN_ATTENTE)
+
+
+class NumeroCommandeTests(TestCase):
+    def test_numeros_consecutifs_du_jour(self):
+        jour = timezone.now().date()
+        CompteurCommandes.objects.create(jour=jour, dernier_numero=41)
+
+        commande = Commande.objects.create()
+
+        self.assertEqual(commande.numero_commande, f"CMD-{jour:%Y%m%d}-0042")
+        self.assertEqual(CompteurCommandes.objects.get(jour=jour).dernier_numero, 42)
+
+    def test_numero_perdu_si_la_commande_echoue(self):
+        # Attribué dans sa propre transaction, le numéro n'est pas rendu par l'annulation de la commande
+        client_commande = creer_client()
+        Panier.objects.create(client=client_commande).ajouter_produit(creer_produit('Prunes', 1), 2)
+        with self.assertRaises(StockInsuffisant):
+            Commande.creer_depuis_panier(client_commande)
+
+        self.assertEqual(Commande.objects.create().numero_commande, f"CMD-{timezone.now():%Y%m%d}-0002")
+
+
+class NumeroCommandeChargeTests(TransactionTestCase):
+    """Commandes créées en parallèle : chaque numéro est attribué une seule fois, sans trou"""
+
+    NB_THREADS = 8
+    COMMANDES_PAR_THREAD = 25
+
+    def setUp(self):
+        # Vérifié ici : la base de test n'existe pas encore à l'import du module
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("SQLite en mémoire partagée ne gère pas les écritures concurrentes")
+
+    def test_creations_concurrentes(self):
+        depart = threading.Barrier(self.NB_THREADS)
+        numeros, erreurs = [], []
+
+        def creer_commandes():
+            try:
+                depart.wait()
+                for _ in range(self.COMMANDES_PAR_THREAD):
+                    numeros.append(Commande.objects.create().numero_commande)
+            except Exception as e:
+                erreurs.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=creer_commandes) for _ in range(self.NB_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erreurs, [])
+        total = self.NB_THREADS * self.COMMANDES_PAR_THREAD
+        self.assertEqual(len(set(numeros)), total)
+        self.assertEqual(
+            sorted(int(numero.rsplit('-', 1)[1]) for numero in numeros),
+            list(range(1, total + 1))
+        )
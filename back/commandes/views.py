@@ -5,6 +5,7 @@ from django.shortcuts import get_object_or_404,redirect
 from paniers.models import Panier,LignePanier
 from commandes.models import Commande,HistoriqueCommande,StatutCommande
 from produits.models import Produit,Fournisseur,StatutProduit
+from produits.stock import StockInsuffisant
 from livraisons.models import Livreur
 import json
 from django.http import JsonResponse
@@ -19,7 +20,9 @@ from django.contrib import messages
 from django.contrib.auth.models import Group
 from django.db import transaction
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+
+logger = logging.getLogger(__name__)
 
 # Create your views here.
 
@@ -79,8 +82,8 @@ def commande_view(request):
             produits_commande.append({
                 'produit': ligne.produit.nom,
                 'quantite': ligne.quantite,
-                'prix': ligne.produit.prix,
-                'total': ligne.produit.prix * ligne.quantite,
+                'prix': ligne.prix_unitaire_ht,
+                'total': ligne.sous_total,
                 'statut': ligne.statut,
                 'ligne_panier_id': ligne.id,
                 'image': ligne.produit.image.url if ligne.produit.image else None,
@@ -112,61 +115,32 @@ def commande_view(request):
 @csrf_exempt
 @client_login_required
 def creation_commande(request):
+    """
+    Crée la commande du panier actif du client
+
+    Le total et les lignes sont ceux du panier enregistré. Le stock de toutes
+    les lignes est réservé dans la même transaction que la commande : si un
+    produit manque, toutes les lignes en défaut sont renvoyées et aucun stock
+    n'est décrémenté.
+    """
     try:
         data = json.loads(request.body)
         
         client_id = data.get('client_id')
         livreur_id = data.get('livreur_id')
-        total_commande = data.get('total')
-        panier_data = data.get('panier_id')  # Récupérer l'objet panier complet
         
-        if not client_id or not livreur_id or not total_commande or not panier_data:
-            return JsonResponse({'error': 'Les champs client_id, livreur_id, total et panier sont requis.'}, status=400)
-
-        # Récupérer l'ID du panier et ses lignes
-        panier_id = panier_data.get('pk')
-        lignes_panier = panier_data.get('lignes', [])
+        if not client_id or not livreur_id:
+            return JsonResponse({'error': 'Les champs client_id et livreur_id sont requis.'}, status=400)
 
         # Récupérer les objets nécessaires
         client = Client.objects.get(pk=client_id)
         livreur = Livreur.objects.get(pk=livreur_id)
-        panier = Panier.objects.get(pk=panier_id)
-
-        # Vérification du stock pour chaque ligne de panier
-        message_stock = []
-        for ligne in lignes_panier:
-            produit_unique = ligne.get('numero_unique')
-            quantite_commandee = ligne.get('quantite')
-            
-            produit = Produit.objects.get(numero_unique=produit_unique)
-            
-            if produit.stock < quantite_commandee:
-                message_stock.append({
-                    'produit': produit.nom,
-                    'quantite_commandee': quantite_commandee,
-                    'stock_disponible': produit.stock
-                })
-                continue
 
-            # Réduction du stock
-            produit.stock -= quantite_commandee
-            produit.save()
-
-        if message_stock:
-            print(message_stock)
-
-            return JsonResponse({
-                'error': 'Certains produits ont un stock insuffisant',
-                'details': message_stock,
-            }, status=400)
-        # Utilisation d'une transaction pour garantir la cohérence des données
-        with transaction.atomic():
-            # Création de la commande et d'un nouveau panier
-            commande, nouveau_panier = Commande.creer_commande_et_nouveau_panier(
-                client=client,
-                livreur=livreur,
-                total=float(total_commande),
-            )
+        # Création de la commande, réservation du stock et nouveau panier en une transaction
+        commande, nouveau_panier = Commande.creer_depuis_panier(
+            client=client,
+            livreur=livreur,
+        )
 
         return JsonResponse({
             'message': 'Commande créée avec succès.',
@@ -176,12 +150,17 @@ def creation_commande(request):
             'statut': commande.statut,
         }, status=201)
 
+    except StockInsuffisant as e:
+        return JsonResponse({
+            'error': 'Certains produits ont un stock insuffisant',
+            'details': e.manques,
+        }, status=400)
+    except ValidationError as e:
+        return JsonResponse({'error': ' '.join(e.messages)}, status=400)
     except Client.DoesNotExist:
         return JsonResponse({'error': 'Client non trouvé.'}, status=404)
     except Livreur.DoesNotExist:
         return JsonResponse({'error': 'Livreur non trouvé.'}, status=404)
-    except Produit.DoesNotExist:
-        return JsonResponse({'error': 'Un produit de la commande n\'existe pas.'}, status=404)
     except Exception as e:
         logger.error(f"Erreur lors de la création de la commande : {str(e)}", exc_info=True)
         return JsonResponse({'error': f'Erreur: {str(e)}'}, status=500)
@@ -215,8 +194,8 @@ def commandes_par_client(request, client_id):
                 produits.append({
                     'produit': ligne.produit.nom,
                     'quantite': ligne.quantite,
-                    'prix': ligne.produit.prix,
-                    'total': ligne.produit.prix * ligne.quantite,
+                    'prix': ligne.prix_unitaire_ht,
+                    'total': ligne.sous_total,
                     'image': ligne.produit.image.url if ligne.produit.image else None,
                     'statut': ligne.statut,
                 })
@@ -0,0 +1,188 @@
+"""
+Index en mémoire des zones de livraison des fournisseurs
+
+Les zones (département, ville, rayon, national) de tous les fournisseurs et
+de leurs ZoneLivraison actives sont lues en deux requêtes et précompilées :
+département -> fournisseurs, ville normalisée -> fournisseurs et grille de
+cellules pour les fournisseurs à rayon. « Quels fournisseurs livrent cette
+adresse » devient une poignée de recherches dans des dictionnaires, quel que
+soit le nombre de fournisseurs.
+
+L'index est reconstruit par tous les workers après toute modification
+validée d'un fournisseur ou d'une zone (voir utils.index_versionne).
+"""
+import re
+from collections import defaultdict
+from math import floor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from livraisons.geo import boite_englobante, distances_haversine
+from produits.utils.recherche import replier_accents
+from utils.index_versionne import IndexVersionne
+
+CLE_VERSION_ZONES = 'fournisseur:zones_livraison:version'
+
+# Côté des cellules de la grille des fournisseurs à rayon (1° ≈ 111 km en latitude)
+PAS_GRILLE_RAYON = 1.0
+
+# Champs du fournisseur qui définissent sa zone de livraison
+CHAMPS_ZONE_FOURNISSEUR = (
+    'zone_livraison_type', 'departements_livraison', 'villes_livraison',
+    'rayon_livraison_km', 'latitude', 'longitude',
+)
+
+_SEPARATEURS_VILLE = re.compile(r"[^0-9a-z]+")
+
+
+def decouper_liste(texte: Optional[str]) -> List[str]:
+    """Éléments d'une liste saisie séparée par des virgules ('75, 92' -> ['75', '92'])"""
+    if not texte:
+        return []
+    return [element.strip() for element in texte.split(',') if element.strip()]
+
+
+def normaliser_ville(ville: str) -> str:
+    """Nom de ville comparable : minuscules, sans accents ni tirets ('Saint-Étienne' -> 'saint etienne')"""
+    return ' '.join(mot for mot in _SEPARATEURS_VILLE.split(replier_accents(ville)) if mot)
+
+
+def departements_du_code_postal(code_postal: str) -> Tuple[str, ...]:
+    """Départements possibles d'un code postal (deux chiffres, trois en outre-mer)"""
+    code_postal = code_postal.strip()
+    if len(code_postal) < 2:
+        return ()
+    if code_postal.startswith('97'):
+        return code_postal[:2], code_postal[:3]
+    return (code_postal[:2],)
+
+
+def _cellule(latitude: float, longitude: float) -> Tuple[int, int]:
+    return floor(latitude / PAS_GRILLE_RAYON), floor(longitude / PAS_GRILLE_RAYON)
+
+
+class IndexZonesLivraison:
+    """Zones de livraison précompilées, figées à la construction"""
+
+    def __init__(self):
+        self.nationaux: Set[int] = set()
+        self.par_departement: Dict[str, Set[int]] = defaultdict(set)
+        self.par_ville: Dict[str, Set[int]] = defaultdict(set)
+        # Cellule -> [(fournisseur_id, latitude, longitude, rayon_km)] des
+        # fournisseurs dont le cercle de livraison touche la cellule
+        self.grille_rayon: Dict[Tuple[int, int], List[Tuple[int, float, float, float]]] = defaultdict(list)
+
+    @classmethod
+    def charger(cls) -> 'IndexZonesLivraison':
+        from .models import Fournisseur, ZoneLivraison
+
+        index = cls()
+        for pk, *zone in Fournisseur.objects.order_by().values_list('pk', *CHAMPS_ZONE_FOURNISSEUR):
+            index._ajouter_fournisseur(pk, *zone)
+
+        for fournisseur_id, departements, villes in (
+            ZoneLivraison.objects.filter(actif=True).order_by().values_list('fournisseur_id', 'departements', 'villes')
+        ):
+            index._ajouter_departements(fournisseur_id, departements)
+            index._ajouter_villes(fournisseur_id, villes)
+        return index
+
+    @classmethod
+    def depuis_fournisseur(cls, fournisseur) -> 'IndexZonesLivraison':
+        """
+        Index du seul `fournisseur`, d'après les valeurs de l'instance
+
+        Pour un fournisseur pas encore enregistré ou dont la zone a été
+        modifiée sans être enregistrée : l'index partagé ne reflète que la base.
+        """
+        from .models import ZoneLivraison
+
+        index = cls()
+        index._ajouter_fournisseur(
+            fournisseur.pk, *(getattr(fournisseur, champ) for champ in CHAMPS_ZONE_FOURNISSEUR)
+        )
+        if fournisseur.pk is not None:
+            for departements, villes in (
+                ZoneLivraison.objects.filter(fournisseur=fournisseur, actif=True).values_list('departements', 'villes')
+            ):
+                index._ajouter_departements(fournisseur.pk, departements)
+                index._ajouter_villes(fournisseur.pk, villes)
+        return index
+
+    def _ajouter_fournisseur(self, fournisseur_id, type_zone, departements, villes, rayon, latitude, longitude):
+        if type_zone == 'national':
+            self.nationaux.add(fournisseur_id)
+        elif type_zone == 'departements':
+            self._ajouter_departements(fournisseur_id, departements)
+        elif type_zone == 'villes':
+            self._ajouter_villes(fournisseur_id, villes)
+        elif type_zone == 'rayon' and rayon and latitude is not None and longitude is not None:
+            self._ajouter_rayon(fournisseur_id, float(latitude), float(longitude), float(rayon))
+
+    def _ajouter_departements(self, fournisseur_id: int, departements: str):
+        for departement in decouper_liste(departements):
+            self.par_departement[departement].add(fournisseur_id)
+
+    def _ajouter_villes(self, fournisseur_id: int, villes: str):
+        for ville in decouper_liste(villes):
+            self.par_ville[normaliser_ville(ville)].add(fournisseur_id)
+
+    def _ajouter_rayon(self, fournisseur_id: int, latitude: float, longitude: float, rayon_km: float):
+        lat_min, lat_max, lon_min, lon_max = boite_englobante(latitude, longitude, rayon_km)
+        (ligne_min, colonne_min), (ligne_max, colonne_max) = _cellule(lat_min, lon_min), _cellule(lat_max, lon_max)
+        zone = (fournisseur_id, latitude, longitude, rayon_km)
+        for ligne in range(ligne_min, ligne_max + 1):
+            for colonne in range(colonne_min, colonne_max + 1):
+                self.grille_rayon[(ligne, colonne)].append(zone)
+
+    def fournisseurs_livrant(
+        self,
+        code_postal: Optional[str] = None,
+        ville: Optional[str] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None
+    ) -> Set[int]:
+        """Identifiants des fournisseurs qui livrent l'adresse"""
+        eligibles = set(self.nationaux)
+        if code_postal:
+            for departement in departements_du_code_postal(code_postal):
+                eligibles |= self.par_departement.get(departement, set())
+        if ville:
+            eligibles |= self.par_ville.get(normaliser_ville(ville), set())
+        if latitude is not None and longitude is not None:
+            latitude, longitude = float(latitude), float(longitude)
+            zones = self.grille_rayon.get(_cellule(latitude, longitude), [])
+            distances = distances_haversine(latitude, longitude, ((lat, lon) for _, lat, lon, _ in zones))
+            eligibles.update(
+                fournisseur_id
+                for (fournisseur_id, _, _, rayon_km), distance in zip(zones, distances)
+                if distance <= rayon_km
+            )
+        return eligibles
+
+    def non_livrables(self, fournisseurs_ids: Iterable[int], **adresse) -> List[int]:
+        """Parmi `fournisseurs_ids` (ceux d'un panier), ceux qui ne livrent pas l'adresse"""
+        return sorted(set(fournisseurs_ids) - self.fournisseurs_livrant(**adresse))
+
+
+# ===================================
+# INDEX PARTAGÉ PAR LE PROCESSUS
+# ===================================
+index_zones_livraison = IndexVersionne(CLE_VERSION_ZONES, IndexZonesLivraison.charger)
+
+
+def get_version_zones() -> int:
+    """Version courante des zones de livraison"""
+    return index_zones_livraison.version()
+
+
+def get_index_zones_livraison() -> IndexZonesLivraison:
+    """Index des zones de livraison du processus, reconstruit si la version a changé"""
+    return index_zones_livraison.get()
+
+
+def invalider_index_zones_livraison():
+    """
+    À appeler après une écriture sur les fournisseurs ou leurs zones qui
+    n'envoie pas de signal (bulk_create, update)
+    """
+    index_zones_livraison.invalider()
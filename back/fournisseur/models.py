@@ -10,6 +10,13 @@ from typing import Optional
 from decimal import Decimal
 from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .livraison import (
+    CHAMPS_ZONE_FOURNISSEUR, IndexZonesLivraison, decouper_liste, get_index_zones_livraison,
+    invalider_index_zones_livraison
+)
 
 
 class Logo(models.Model):
@@ -260,6 +267,45 @@ class Fournisseur(models.Model):
         """
         return check_password(raw_password, self.password)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._localisation_enregistree = tuple(
+            instance.__dict__.get(champ) for champ in ('code_postal', 'ville', 'latitude', 'longitude')
+        )
+        instance._zone_enregistree = instance._valeurs_zone()
+        return instance
+
+    def _valeurs_zone(self):
+        return tuple(self.__dict__.get(champ) for champ in CHAMPS_ZONE_FOURNISSEUR)
+
+    def save(self, *args, **kwargs):
+        """
+        Localise le fournisseur par la commune de son code postal quand ses
+        coordonnées manquent, ou quand le code postal ou la ville change sans
+        nouvelles coordonnées. Un code postal absent de la table laisse les
+        coordonnées inconnues plutôt qu'au centre du département.
+        """
+        localite = (self.code_postal, self.ville)
+        coordonnees = (self.latitude, self.longitude)
+        enregistree = getattr(self, '_localisation_enregistree', None)
+        a_localiser = None in coordonnees or (
+            enregistree is not None and localite != enregistree[:2] and coordonnees == enregistree[2:]
+        )
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'code_postal', 'ville'} & set(update_fields):
+            a_localiser = False
+
+        if a_localiser:
+            from livraisons.geocodage import coordonnees_exactes
+
+            self.latitude, self.longitude = coordonnees_exactes(self.code_postal, self.ville) or (None, None)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'latitude', 'longitude'}
+        super().save(*args, **kwargs)
+        self._localisation_enregistree = (*localite, self.latitude, self.longitude)
+        self._zone_enregistree = self._valeurs_zone()
+
     def enregistrer_connexion(self):
         """
         Met à jour la date de dernière connexion
@@ -292,15 +338,11 @@ class Fournisseur(models.Model):
     # ===================================
     def get_departements_list(self):
         """Retourne la liste des départements desservis"""
-        if not self.departements_livraison:
-            return []
-        return [dept.strip() for dept in self.departements_livraison.split(',')]
+        return decouper_liste(self.departements_livraison)
     
     def get_villes_list(self):
         """Retourne la liste des villes desservies"""
-        if not self.villes_livraison:
-            return []
-        return [ville.strip() for ville in self.villes_livraison.split(',')]
+        return decouper_liste(self.villes_livraison)
     
 
 
@@ -311,33 +353,21 @@ class Fournisseur(models.Model):
         latitude: Optional[float] = None,
         longitude: Optional[float] = None
     ) -> bool:
-        """Vérifie si le fournisseur peut livrer à une adresse donnée"""
-        
-        # Livraison nationale
-        if self.zone_livraison_type == 'national':
-            return True
-
-        # Vérification par département
-        if self.zone_livraison_type == 'departements' and code_postal:
-            dept = code_postal[:2]
-            return dept in self.get_departements_list()
-
-        # Vérification par ville
-        if self.zone_livraison_type == 'villes' and ville:
-            villes_desservies = [v.lower() for v in self.get_villes_list()]
-            return ville.lower() in villes_desservies
-
-        # Vérification par rayon kilométrique
-        if self.zone_livraison_type == 'rayon':
-            distance = self.calculer_distance_vers(latitude, longitude)
-            
-            # ✅ Si distance est None, on ne peut pas livrer
-            if distance is None or self.rayon_livraison_km is None:
-                return False
-            
-            return distance <= float(self.rayon_livraison_km)
+        """
+        Vérifie si le fournisseur peut livrer à une adresse donnée
 
-        return False
+        Consulte l'index des zones de livraison (zone du fournisseur et
+        ZoneLivraison actives) : villes comparées sans casse ni accents. Un
+        fournisseur non enregistré, ou dont la zone a été modifiée depuis son
+        chargement, est évalué sur les valeurs de l'instance.
+        """
+        if self.pk is None or self._valeurs_zone() != getattr(self, '_zone_enregistree', None):
+            index = IndexZonesLivraison.depuis_fournisseur(self)
+        else:
+            index = get_index_zones_livraison()
+        return self.pk in index.fournisseurs_livrant(
+            code_postal=code_postal, ville=ville, latitude=latitude, longitude=longitude
+        )
 
 
     def calculer_distance_vers(
@@ -549,12 +579,26 @@ class ZoneLivraison(models.Model):
     
     def get_departements_list(self):
         """Retourne la liste des départements"""
-        if not self.departements:
-            return []
-        return [dept.strip() for dept in self.departements.split(',')]
+        return decouper_liste(self.departements)
     
     def get_villes_list(self):
         """Retourne la liste des villes"""
-        if not self.villes:
-            return []
-        return [ville.strip() for ville in self.villes.split(',')]
+        return decouper_liste(self.villes)
+
+
+# ===================================
+# INDEX DES ZONES DE LIVRAISON
+# ===================================
+@receiver(post_save, sender=Fournisseur)
+def zone_fournisseur_modifiee(sender, instance, update_fields=None, **kwargs):
+    """Reconstruit l'index sauf si l'enregistrement ne touche pas la zone"""
+    if update_fields is not None and not set(update_fields) & set(CHAMPS_ZONE_FOURNISSEUR):
+        return
+    invalider_index_zones_livraison()
+
+
+@receiver(post_delete, sender=Fournisseur)
+@receiver(post_save, sender=ZoneLivraison)
+@receiver(post_delete, sender=ZoneLivraison)
+def zone_livraison_modifiee(sender, **kwargs):
+    invalider_index_zones_livraison()
@@ -1,3 +1,134 @@
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from utils.index_versionne import IndexVersionne
+
+from .livraison import (
+    CLE_VERSION_ZONES,
+    IndexZonesLivraison,
+    get_index_zones_livraison,
+    index_zones_livraison,
+    normaliser_ville,
+)
+from .models import Fournisseur, ZoneLivraison
+
+
+def creer_fournisseur(nom, **champs):
+    fournisseur = Fournisseur(
+        nom=nom, prenom='Marie', email=f'{nom.lower()}@example.fr', metier='Maraîchère',
+        contact='Marie', tel='0600000000', adresse='1 chemin des Vignes',
+        code_postal='34000', ville='Montpellier', **champs
+    )
+    fournisseur.set_password('motdepasse')
+    fournisseur.save()
+    return fournisseur
+
+
+class IndexZonesLivraisonTests(TestCase):
+    def setUp(self):
+        # Données validées pour l'index ; il est oublié à la fin du test, annulé
+        self.addCleanup(index_zones_livraison.vider)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.national = creer_fournisseur('National', zone_livraison_type='national')
+            self.herault = creer_fournisseur(
+                'Herault', zone_livraison_type='departements', departements_livraison='34, 30,972'
+            )
+            self.villes = creer_fournisseur(
+                'Villes', zone_livraison_type='villes', villes_livraison='Saint-Étienne, Montpellier'
+            )
+            self.rayon = creer_fournisseur(
+                'Rayon', zone_livraison_type='rayon', rayon_livraison_km=20, latitude=43.6108, longitude=3.8767
+            )
+
+    def test_une_adresse_sans_requete(self):
+        get_index_zones_livraison()
+
+        with self.assertNumQueries(0):
+            montpellier = get_index_zones_livraison().fournisseurs_livrant(
+                code_postal='34000', ville='MONTPELLIER', latitude=43.6, longitude=3.9
+            )
+            nimes = get_index_zones_livraison().fournisseurs_livrant(
+                code_postal='30000', latitude=43.8367, longitude=4.3601
+            )
+
+        self.assertEqual(montpellier, {self.national.pk, self.herault.pk, self.villes.pk, self.rayon.pk})
+        self.assertEqual(nimes, {self.national.pk, self.herault.pk})
+
+    def test_meme_reponse_que_peut_livrer_a(self):
+        self.assertTrue(self.herault.peut_livrer_a(code_postal='97200'))
+        self.assertFalse(self.herault.peut_livrer_a(code_postal='13001'))
+        self.assertTrue(self.villes.peut_livrer_a(ville='saint etienne'))
+        self.assertFalse(self.rayon.peut_livrer_a(latitude=43.2965, longitude=5.3698))
+        self.assertFalse(self.rayon.peut_livrer_a(code_postal='34000'))
+        self.assertEqual(normaliser_ville(' Saint-Étienne '), 'saint etienne')
+
+    def test_index_reconstruit_apres_modification(self):
+        index = get_index_zones_livraison()
+        self.assertEqual(index.non_livrables([self.herault.pk, self.villes.pk], code_postal='13001'),
+                         sorted([self.herault.pk, self.villes.pk]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ZoneLivraison.objects.create(
+                fournisseur=self.herault, nom='Bouches-du-Rhône', departements='13',
+                frais_livraison=Decimal('4.00'), delai_livraison_jours=2
+            )
+        self.assertEqual(get_index_zones_livraison().non_livrables(
+            [self.herault.pk, self.villes.pk], code_postal='13001'
+        ), [self.villes.pk])
+
+        # Un enregistrement qui ne touche pas la zone n'invalide pas l'index
+        index = get_index_zones_livraison()
+        self.villes.description = 'Légumes de saison'
+        self.villes.save(update_fields=['description'])
+        self.assertIs(get_index_zones_livraison(), index)
+
+    def test_zones_modifiees_vues_par_les_autres_workers(self):
+        # Index d'un autre worker : même version partagée, index en mémoire distinct
+        autre_worker = IndexVersionne(CLE_VERSION_ZONES, IndexZonesLivraison.charger)
+        self.assertNotIn(self.villes.pk, autre_worker.get().fournisseurs_livrant(code_postal='13001'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.villes.zone_livraison_type = 'departements'
+            self.villes.departements_livraison = '13'
+            self.villes.save()
+
+        with mock.patch('utils.version_partagee.DUREE_VERSION_LOCALE', 0):
+            self.assertIn(self.villes.pk, autre_worker.get().fournisseurs_livrant(code_postal='13001'))
+
+    def test_instance_non_enregistree_ou_modifiee(self):
+        nouveau = Fournisseur(nom='Nouveau', zone_livraison_type='departements', departements_livraison='13')
+        self.assertTrue(nouveau.peut_livrer_a(code_postal='13001'))
+        self.assertFalse(nouveau.peut_livrer_a(code_postal='34000'))
+
+        herault = Fournisseur.objects.get(pk=self.herault.pk)
+        herault.departements_livraison = '13'
+        self.assertTrue(herault.peut_livrer_a(code_postal='13001'))
+        self.assertFalse(herault.peut_livrer_a(code_postal='34000'))
+
+
+class LocalisationFournisseurTests(TestCase):
+    def test_coordonnees_suivent_le_code_postal(self):
+        fournisseur = creer_fournisseur('Local')
+        self.assertEqual((fournisseur.latitude, fournisseur.longitude), (43.6108, 3.8767))
+
+        fournisseur = Fournisseur.objects.get(pk=fournisseur.pk)
+        fournisseur.code_postal, fournisseur.ville = '30000', 'Nîmes'
+        fournisseur.save()
+        self.assertEqual((fournisseur.latitude, fournisseur.longitude), (43.8367, 4.3601))
+
+        # Code postal absent de la table : pas de centroïde de département enregistré
+        fournisseur.code_postal, fournisseur.ville = '34300', 'Agde'
+        fournisseur.save()
+        fournisseur.refresh_from_db()
+        self.assertIsNone(fournisseur.latitude)
+
+    def test_coordonnees_saisies_conservees(self):
+        fournisseur = creer_fournisseur('Saisie', latitude=43.3, longitude=3.47)
+        fournisseur = Fournisseur.objects.get(pk=fournisseur.pk)
+        fournisseur.code_postal, fournisseur.ville = '34300', 'Agde'
+        fournisseur.latitude, fournisseur.longitude = 43.3108, 3.4758
+        fournisseur.save()
+        fournisseur.refresh_from_db()
+        self.assertEqual((fournisseur.latitude, fournisseur.longitude), (43.3108, 3.4758))
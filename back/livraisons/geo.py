@@ -0,0 +1,68 @@
+"""
+Index spatial des points relais
+
+La surface est découpée en cellules de PAS_CELLULE degrés : chaque point
+relais enregistre le numéro de sa cellule (colonne indexée). Une recherche
+dans un rayon lit les cellules qui couvrent le carré englobant le cercle,
+restreintes à ce carré, puis calcule la distance exacte (Haversine) des seuls
+candidats, en un passage sur le lot.
+"""
+from math import asin, ceil, cos, floor, radians, sin, sqrt
+from typing import Iterable, List, Optional, Tuple
+
+RAYON_TERRE_KM = 6371
+KM_PAR_DEGRE = 111.32
+
+# Côté d'une cellule (0,1° ≈ 11 km en latitude)
+PAS_CELLULE = 0.1
+NB_COLONNES = ceil(360 / PAS_CELLULE)
+
+# Au-delà, le filtre par cellules est abandonné au profit du seul carré englobant
+MAX_CELLULES_REQUETE = 400
+
+
+def cellule_geo(latitude: float, longitude: float) -> int:
+    """Numéro de la cellule qui contient le point"""
+    ligne = floor((float(latitude) + 90) / PAS_CELLULE)
+    colonne = floor((float(longitude) + 180) / PAS_CELLULE) % NB_COLONNES
+    return ligne * NB_COLONNES + colonne
+
+
+def boite_englobante(latitude: float, longitude: float, rayon_km: float) -> Tuple[float, float, float, float]:
+    """Carré (lat_min, lat_max, lon_min, lon_max) qui contient le cercle de rayon `rayon_km`"""
+    delta_lat = rayon_km / KM_PAR_DEGRE
+    delta_lon = rayon_km / (KM_PAR_DEGRE * max(cos(radians(latitude)), 0.01))
+    return latitude - delta_lat, latitude + delta_lat, longitude - delta_lon, longitude + delta_lon
+
+
+def cellules_couvrant(boite: Tuple[float, float, float, float]) -> Optional[List[int]]:
+    """
+    Cellules qui recouvrent la boîte englobante
+
+    Returns:
+        Liste des numéros de cellule, ou None si elle dépasse MAX_CELLULES_REQUETE
+    """
+    lat_min, lat_max, lon_min, lon_max = boite
+    premiere, derniere = cellule_geo(lat_min, lon_min), cellule_geo(lat_max, lon_max)
+    lignes = range(premiere // NB_COLONNES, derniere // NB_COLONNES + 1)
+    colonnes = range(premiere % NB_COLONNES, derniere % NB_COLONNES + 1)
+    if not colonnes or len(lignes) * len(colonnes) > MAX_CELLULES_REQUETE:
+        return None
+    return [ligne * NB_COLONNES + colonne for ligne in lignes for colonne in colonnes]
+
+
+def distances_haversine(latitude: float, longitude: float, points: Iterable[Tuple[float, float]]) -> List[float]:
+    """
+    Distances en km du point d'origine à chaque (latitude, longitude) du lot
+
+    Les termes propres à l'origine sont calculés une seule fois pour le lot.
+    """
+    lat0 = radians(latitude)
+    lon0 = radians(longitude)
+    cos_lat0 = cos(lat0)
+    distances = []
+    for lat, lon in points:
+        lat1 = radians(lat)
+        a = sin((lat1 - lat0) / 2) ** 2 + cos_lat0 * cos(lat1) * sin((radians(lon) - lon0) / 2) ** 2
+        distances.append(2 * RAYON_TERRE_KM * asin(min(1.0, sqrt(a))))
+    return distances
@@ -0,0 +1,178 @@
+"""
+Géocodage hors ligne des adresses françaises par code postal
+
+Une table locale (code postal, commune, centroïde) est chargée une fois par
+processus dans des tableaux compacts triés par code postal : une adresse se
+localise par recherche dichotomique, sans appel réseau. À défaut de code
+postal connu, le centroïde des communes du département est renvoyé, marqué
+comme approché : il ne doit servir ni aux recherches par rayon ni à
+renseigner des coordonnées (voir coordonnees_exactes).
+
+Le fichier fourni couvre les préfectures et les principales communes. La base
+complète se branche par le réglage GEOCODAGE_CODES_POSTAUX : la base officielle
+des codes postaux de La Poste (colonne coordonnees_gps) ou l'export
+communes-departement-region (colonnes latitude et longitude) se lisent tels
+quels, séparateur « ; » ou « , ».
+"""
+import csv
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+from fournisseur.livraison import normaliser_ville
+
+FICHIER_CODES_POSTAUX = Path(__file__).resolve().parent / 'donnees' / 'codes_postaux.csv'
+
+# Adresses (code postal, ville) dont la position reste en mémoire
+TAILLE_CACHE_GEOCODAGE = 4096
+
+# Noms de colonnes acceptés : fichier fourni, base La Poste, export communes-departement-region
+COLONNES_CODE_POSTAL = ('code_postal',)
+COLONNES_COMMUNE = ('commune', 'nom_de_la_commune', 'nom_commune_postal', 'nom_commune')
+COLONNES_GPS = ('coordonnees_gps', 'coordonnees_geographiques')
+
+Coordonnees = Tuple[float, float]
+
+
+class Position(NamedTuple):
+    latitude: float
+    longitude: float
+    # False : centroïde du département, le code postal est absent de la table
+    exacte: bool
+
+
+def _code_numerique(code_postal: Optional[str]) -> Optional[int]:
+    code_postal = (code_postal or '').strip().replace(' ', '')
+    if len(code_postal) != 5 or not code_postal.isdigit():
+        return None
+    return int(code_postal)
+
+
+def _plage_departement(code: int) -> Tuple[int, int]:
+    """Codes postaux du département de `code` (trois chiffres en outre-mer)"""
+    if 97000 <= code < 99000:
+        debut = code - code % 100
+        return debut, debut + 99
+    debut = code - code % 1000
+    return debut, debut + 999
+
+
+def _premiere_colonne(ligne: dict, colonnes: Tuple[str, ...]) -> str:
+    for colonne in colonnes:
+        valeur = ligne.get(colonne)
+        if valeur:
+            return valeur.strip()
+    return ''
+
+
+def _lire_coordonnees(ligne: dict) -> Optional[Coordonnees]:
+    latitude, longitude = ligne.get('latitude'), ligne.get('longitude')
+    if not (latitude and longitude):
+        gps = _premiere_colonne(ligne, COLONNES_GPS)
+        if ',' not in gps:
+            return None
+        latitude, longitude = gps.split(',', 1)
+    try:
+        return float(latitude), float(longitude)
+    except ValueError:
+        return None
+
+
+class TableCodesPostaux:
+    """Communes triées par code postal : codes, latitudes et longitudes en tableaux parallèles"""
+
+    def __init__(self, lignes):
+        lignes = sorted(lignes)
+        self.codes = array('l', (code for code, _, _, _ in lignes))
+        self.communes = tuple(commune for _, commune, _, _ in lignes)
+        self.latitudes = array('f', (latitude for _, _, latitude, _ in lignes))
+        self.longitudes = array('f', (longitude for _, _, _, longitude in lignes))
+
+    @classmethod
+    def charger(cls, chemin=None) -> 'TableCodesPostaux':
+        chemin = chemin or getattr(settings, 'GEOCODAGE_CODES_POSTAUX', FICHIER_CODES_POSTAUX)
+        lignes = {}
+        with open(chemin, encoding='utf-8-sig', newline='') as fichier:
+            entete = fichier.readline()
+            colonnes = [
+                colonne.strip().lstrip('#').lower()
+                for colonne in next(csv.reader([entete], delimiter=';' if ';' in entete else ','))
+            ]
+            lecteur = csv.DictReader(fichier, fieldnames=colonnes, delimiter=';' if ';' in entete else ',')
+            for ligne in lecteur:
+                code = _code_numerique(_premiere_colonne(ligne, COLONNES_CODE_POSTAL))
+                coordonnees = _lire_coordonnees(ligne)
+                if code is None or coordonnees is None:
+                    continue
+                commune = normaliser_ville(_premiere_colonne(ligne, COLONNES_COMMUNE))
+                # La base La Poste répète la commune pour chaque lieu-dit (ligne 5)
+                lignes.setdefault((code, commune), coordonnees)
+        return cls([(code, commune, latitude, longitude) for (code, commune), (latitude, longitude) in lignes.items()])
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _position(self, i: int) -> Position:
+        return Position(round(self.latitudes[i], 5), round(self.longitudes[i], 5), True)
+
+    def localiser(self, code_postal: str, ville: Optional[str] = None) -> Optional[Position]:
+        """
+        Position de l'adresse
+
+        La commune départage les communes qui partagent un code postal ; un
+        code postal absent de la table donne le centroïde de son département,
+        avec exacte=False.
+        """
+        code = _code_numerique(code_postal)
+        if code is None:
+            return None
+
+        debut, fin = bisect_left(self.codes, code), bisect_right(self.codes, code)
+        if debut < fin:
+            if ville and fin - debut > 1:
+                commune = normaliser_ville(ville)
+                for i in range(debut, fin):
+                    if self.communes[i] == commune:
+                        return self._position(i)
+            return self._position(debut)
+
+        premier, dernier = _plage_departement(code)
+        debut, fin = bisect_left(self.codes, premier), bisect_right(self.codes, dernier)
+        if debut == fin:
+            return None
+        nombre = fin - debut
+        return Position(
+            round(sum(self.latitudes[debut:fin]) / nombre, 5),
+            round(sum(self.longitudes[debut:fin]) / nombre, 5),
+            False,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_table_codes_postaux() -> TableCodesPostaux:
+    """Table des codes postaux du processus, chargée au premier appel"""
+    return TableCodesPostaux.charger()
+
+
+@lru_cache(maxsize=TAILLE_CACHE_GEOCODAGE)
+def geocoder(code_postal: Optional[str], ville: Optional[str] = None) -> Optional[Position]:
+    """Position d'une adresse (éventuellement approchée), ou None si le département est inconnu"""
+    return get_table_codes_postaux().localiser(code_postal, ville)
+
+
+def coordonnees_exactes(code_postal: Optional[str], ville: Optional[str] = None) -> Optional[Coordonnees]:
+    """
+    (latitude, longitude) de la commune de l'adresse, ou None
+
+    Seules ces coordonnées peuvent être enregistrées ou servir à une recherche
+    par rayon : un centroïde de département peut se trouver à des dizaines de
+    kilomètres de l'adresse.
+    """
+    position = geocoder(code_postal, ville)
+    if position is None or not position.exacte:
+        return None
+    return position.latitude, position.longitude
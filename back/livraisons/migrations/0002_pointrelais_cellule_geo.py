@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+from livraisons.geo import cellule_geo
+
+
+def calculer_cellules(apps, schema_editor):
+    """Place les points relais existants dans la grille spatiale"""
+    PointRelais = apps.get_model('livraisons', 'PointRelais')
+    points = list(PointRelais.objects.only('id', 'latitude', 'longitude'))
+    for point in points:
+        point.cellule_geo = cellule_geo(point.latitude, point.longitude)
+    PointRelais.objects.bulk_update(points, ['cellule_geo'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livraisons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pointrelais',
+            name='cellule_geo',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Cellule géographique'),
+        ),
+        migrations.AddIndex(
+            model_name='pointrelais',
+            index=models.Index(fields=['cellule_geo', 'est_actif'], name='livraisons__cellule_506df2_idx'),
+        ),
+        migrations.RunPython(calculer_cellules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:05
+
+from django.db import migrations
+
+import livraisons.models
+
+
+def retirer_cellules_par_defaut(apps, schema_editor):
+    """Les points écrits sans save() ont gardé la cellule 0 : ils ne sont pas indexés"""
+    PointRelais = apps.get_model('livraisons', 'PointRelais')
+    PointRelais.objects.filter(cellule_geo=0).update(cellule_geo=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livraisons', '0002_pointrelais_cellule_geo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pointrelais',
+            name='cellule_geo',
+            field=livraisons.models.CelluleGeoField(editable=False, null=True, verbose_name='Cellule géographique'),
+        ),
+        migrations.RunPython(retirer_cellules_par_defaut, migrations.RunPython.noop),
+    ]
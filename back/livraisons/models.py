@@ -10,8 +10,20 @@ class Livreur(models.Model):
     cle_api = models.CharField(max_length=100, unique=True, blank=True, null=True)
 =======
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from decimal import Decimal
-from typing import Optional, TYPE_CHECKING
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+from .geo import boite_englobante, cellule_geo, cellules_couvrant, distances_haversine
+
+# Statuts des commandes dont le colis occupe une place au point relais
+STATUTS_COMMANDE_EN_POINT_RELAIS = ('en_attente', 'en_cours', 'en_livraison')
+
+# Rayon de la première recherche des k points relais les plus proches (doublé
+# jusqu'à en trouver assez)
+RAYON_INITIAL_RECHERCHE_KM = 5
 
 if TYPE_CHECKING:
     from django.db.models import QuerySet
@@ -59,6 +71,39 @@ class Livreur(models.Model):
         # Récupérer le tarif correspondant au poids
         tarif = Tarif.objects.filter(
             livreur=self,
+            poids_min__lte=poids_total,
+            poids_max__gte=poids_total
+        ).first()
+
+        if tarif:
+            prix = tarif.prix_ttc 
+            # Ajouter des frais supplémentaires si nécessaire
+            return prix
+        else:
+            # Gérer le cas où aucun tarif ne correspond
+            return None
+
+class Tarif(models.Model):
+    livreur = models.ForeignKey(Livreur, on_delete=models.CASCADE, related_name='tarifs')
+    poids_min = models.FloatField()  # Poids minimum pour ce tarif
+    poids_max = models.FloatField()  # Poids maximum pour ce tarif
+    prix_ht = models.DecimalField(max_digits=10, decimal_places=2)  # Prix standard
+    prix_ttc = models.DecimalField(max_digits=10, decimal_places=2)  # Prix express
+
+    def __str__(self):
+        return f"Tarif pour {self.livreur.nom}: {self.poids_min}kg - {self.poids_max}kg, Prix HT: {self.prix_ht}€, Prix TTC: {self.prix_ttc}€"
+
+class PointRelais(models.Model):
+    nom = models.CharField(max_length=255)
+    adresse = models.CharField(max_length=255)
+    code_postal = models.CharField(max_length=10)
+    ville = models.CharField(max_length=100)
+    pays = models.CharField(max_length=100)  # Assurez-vous que ce champ existe
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    def __str__(self):
+        return self.nom
 =======
     
     type_service = models.CharField(
@@ -92,51 +137,14 @@ class Livreur(models.Model):
         Returns:
             Prix TTC en Decimal, ou None si aucun tarif trouvé
         """
-        if poids_total <= 0 or not self.est_actif:
-            return None
-        
-        tarif = self.tarifs.filter(
->>>>>>> e097b66e17a2ea974af903e357531f5ddcf8880b
-            poids_min__lte=poids_total,
-            poids_max__gte=poids_total
-        ).first()
+        from .tarifs import appliquer_service, get_index_tarifs
 
-        if tarif:
-<<<<<<< HEAD
-            prix = tarif.prix_ttc 
-            # Ajouter des frais supplémentaires si nécessaire
-            return prix
-        else:
-            # Gérer le cas où aucun tarif ne correspond
+        if poids_total <= 0 or not self.est_actif:
             return None
-
-class Tarif(models.Model):
-    livreur = models.ForeignKey(Livreur, on_delete=models.CASCADE, related_name='tarifs')
-    poids_min = models.FloatField()  # Poids minimum pour ce tarif
-    poids_max = models.FloatField()  # Poids maximum pour ce tarif
-    prix_ht = models.DecimalField(max_digits=10, decimal_places=2)  # Prix standard
-    prix_ttc = models.DecimalField(max_digits=10, decimal_places=2)  # Prix express
-
-    def __str__(self):
-        return f"Tarif pour {self.livreur.nom}: {self.poids_min}kg - {self.poids_max}kg, Prix HT: {self.prix_ht}€, Prix TTC: {self.prix_ttc}€"
-
-class PointRelais(models.Model):
-    nom = models.CharField(max_length=255)
-    adresse = models.CharField(max_length=255)
-    code_postal = models.CharField(max_length=10)
-    ville = models.CharField(max_length=100)
-    pays = models.CharField(max_length=100)  # Assurez-vous que ce champ existe
-    latitude = models.FloatField()
-    longitude = models.FloatField()
-
-    def __str__(self):
-        return self.nom
-=======
-            if self.type_service == 'express':
-                return tarif.prix_ttc * Decimal('1.30')
-            return tarif.prix_ttc
         
-        return None
+        # Grille lue dans l'index en mémoire (voir livraisons.tarifs), sans requête
+        prix = get_index_tarifs().prix_ttc(self.pk, poids_total)
+        return appliquer_service(prix, self.type_service)
 
     def peut_livrer(
         self,
@@ -242,6 +250,25 @@ class Tarif(models.Model):
         super().save(*args, **kwargs)
 
 
+class CelluleGeoField(models.IntegerField):
+    """
+    Cellule de la grille spatiale (voir livraisons.geo) du point latitude/longitude
+
+    Recalculée à chaque écriture qui passe par pre_save : save() et
+    bulk_create(). bulk_update() et update() ne l'appellent pas : un
+    changement de coordonnées par ces chemins doit remettre la cellule à None
+    (point non indexé, toujours trouvé par le seul carré englobant).
+    """
+
+    def pre_save(self, model_instance, add):
+        if model_instance.latitude is None or model_instance.longitude is None:
+            valeur = None
+        else:
+            valeur = cellule_geo(model_instance.latitude, model_instance.longitude)
+        setattr(model_instance, self.attname, valeur)
+        return valeur
+
+
 class PointRelais(models.Model):
     """Point de retrait pour les colis"""
     
@@ -293,6 +320,13 @@ class PointRelais(models.Model):
         default=True,
         verbose_name="Actif"
     )
+    
+    # Cellule de la grille spatiale, None tant que le point n'est pas indexé
+    cellule_geo = CelluleGeoField(
+        null=True,
+        editable=False,
+        verbose_name="Cellule géographique"
+    )
 
     class Meta:
         verbose_name = "Point relais"
@@ -300,6 +334,7 @@ class PointRelais(models.Model):
         ordering = ['ville', 'nom']
         indexes = [
             models.Index(fields=['code_postal', 'ville', 'est_actif']),
+            models.Index(fields=['cellule_geo', 'est_actif']),
         ]
 
     def __str__(self) -> str:
@@ -309,6 +344,77 @@ class PointRelais(models.Model):
         """Retourne l'adresse complète formatée"""
         return f"{self.adresse}, {self.code_postal} {self.ville}, {self.pays}"
 
+    @classmethod
+    def proches(
+        cls,
+        latitude: float,
+        longitude: float,
+        rayon_km: float = 10,
+        respecter_capacite: bool = True
+    ) -> List[Tuple['PointRelais', float]]:
+        """
+        Points relais actifs à moins de `rayon_km` d'un point
+        
+        Une seule requête lit les points des cellules de la grille qui couvrent
+        le carré englobant le cercle, et ceux pas encore indexés, restreints à
+        ce carré ; la distance exacte n'est calculée que pour ces candidats.
+        Avec `respecter_capacite`, les points qui ont déjà `capacite_max` colis
+        en cours sont écartés.
+        
+        Returns:
+            Liste de (point relais, distance en km), du plus proche au plus éloigné
+        """
+        boite = boite_englobante(latitude, longitude, rayon_km)
+        lat_min, lat_max, lon_min, lon_max = boite
+        candidats = cls.objects.filter(
+            est_actif=True,
+            latitude__range=(Decimal(f'{lat_min:.6f}'), Decimal(f'{lat_max:.6f}')),
+            longitude__range=(Decimal(f'{lon_min:.6f}'), Decimal(f'{lon_max:.6f}')),
+        )
+        cellules = cellules_couvrant(boite)
+        if cellules is not None:
+            candidats = candidats.filter(Q(cellule_geo__in=cellules) | Q(cellule_geo__isnull=True))
+        if respecter_capacite:
+            candidats = candidats.annotate(
+                colis_en_cours=Count(
+                    'commandes', filter=Q(commandes__statut__in=STATUTS_COMMANDE_EN_POINT_RELAIS)
+                )
+            ).filter(colis_en_cours__lt=F('capacite_max'))
+
+        candidats = list(candidats)
+        distances = distances_haversine(
+            latitude, longitude, ((float(point.latitude), float(point.longitude)) for point in candidats)
+        )
+        resultats = [
+            (point, round(distance, 2))
+            for point, distance in zip(candidats, distances)
+            if distance <= rayon_km
+        ]
+        resultats.sort(key=lambda resultat: resultat[1])
+        return resultats
+
+    @classmethod
+    def plus_proches(
+        cls,
+        latitude: float,
+        longitude: float,
+        nombre: int = 5,
+        rayon_max_km: float = 50,
+        respecter_capacite: bool = True
+    ) -> List[Tuple['PointRelais', float]]:
+        """
+        Les `nombre` points relais les plus proches, à moins de `rayon_max_km`
+        
+        La recherche commence dans un petit rayon, doublé tant qu'il ne
+        contient pas assez de points : une requête par rayon essayé.
+        """
+        rayon = min(RAYON_INITIAL_RECHERCHE_KM, rayon_max_km)
+        while True:
+            resultats = cls.proches(latitude, longitude, rayon, respecter_capacite)
+            if len(resultats) >= nombre or rayon >= rayon_max_km:
+                return resultats[:nombre]
+            rayon = min(rayon * 2, rayon_max_km)
+
     def calculer_distance_vers(
         self,
         latitude: Optional[float],
@@ -347,4 +453,13 @@ class PointRelais(models.Model):
             
         except (ValueError, TypeError):
             return None
+
+
+@receiver([post_save, post_delete], sender=Livreur)
+@receiver([post_save, post_delete], sender=Tarif)
+def livreur_ou_tarif_modifie(sender, **kwargs):
+    """Signal après modification d'un livreur ou d'un tarif : l'index des tarifs est reconstruit"""
+    from .tarifs import invalider_index_tarifs
+
+    invalider_index_tarifs()
 >>>>>>> e097b66e17a2ea974af903e357531f5ddcf8880b
@@ -0,0 +1,151 @@
+"""
+Index en mémoire des grilles tarifaires des livreurs
+
+Tous les livreurs et leurs tarifs sont chargés en deux requêtes, puis chaque
+prix de livraison se lit par recherche dichotomique dans la grille du
+livreur, sans requête. L'index est reconstruit après toute modification d'un
+livreur ou d'un tarif, validée (voir utils.index_versionne).
+"""
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional
+
+from utils.index_versionne import IndexVersionne
+
+CLE_VERSION_TARIFS = 'livraisons:tarifs:version'
+
+# Majoration appliquée au tarif des livreurs en service express
+MAJORATION_EXPRESS = Decimal('1.30')
+
+# Délai annoncé pour chaque type de service
+DELAIS_LIVRAISON = {
+    'express': '24h',
+    'standard': '3-5 jours',
+}
+
+# Champs des livreurs conservés dans l'index (réponse de la page livraison)
+CHAMPS_LIVREUR = ('id', 'nom', 'telephone', 'email', 'adresse', 'type_service', 'est_actif')
+
+
+class LivreurIndexe(NamedTuple):
+    id: int
+    nom: str
+    telephone: str
+    email: str
+    adresse: Optional[str]
+    type_service: str
+    est_actif: bool
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+
+class GrilleTarifaire:
+    """
+    Tranches de poids d'un livreur, triées par poids minimum
+
+    Renvoie le même tarif que tarifs.filter(poids_min__lte=p, poids_max__gte=p)
+    .first() : la tranche de plus petit poids minimum qui contient le poids,
+    y compris quand des tranches se chevauchent.
+    """
+    __slots__ = ('poids_min', 'max_cumules', 'prix')
+
+    def __init__(self, tranches):
+        tranches = sorted(tranches)
+        self.poids_min = [poids_min for poids_min, _, _, _ in tranches]
+        self.prix = [prix for _, _, _, prix in tranches]
+        # Plus grand poids maximum des tranches 0..i : croissant, donc la
+        # première tranche qui couvre un poids se trouve par dichotomie
+        self.max_cumules = []
+        maximum = None
+        for _, _, poids_max, _ in tranches:
+            maximum = poids_max if maximum is None else max(maximum, poids_max)
+            self.max_cumules.append(maximum)
+
+    def prix_ttc(self, poids: Decimal) -> Optional[Decimal]:
+        candidates = bisect_right(self.poids_min, poids)
+        premiere = bisect_left(self.max_cumules, poids)
+        if premiere < candidates:
+            return self.prix[premiere]
+        return None
+
+
+def appliquer_service(prix: Optional[Decimal], type_service: str) -> Optional[Decimal]:
+    """Prix du tarif ajusté au type de service du livreur"""
+    if prix is not None and type_service == 'express':
+        return prix * MAJORATION_EXPRESS
+    return prix
+
+
+class IndexTarifs:
+    """Livreurs et grilles tarifaires, figés à la construction"""
+
+    def __init__(self, livreurs: List[LivreurIndexe], grilles: Dict[int, GrilleTarifaire]):
+        self.livreurs = livreurs
+        self.grilles = grilles
+
+    @classmethod
+    def charger(cls) -> 'IndexTarifs':
+        from .models import Livreur, Tarif
+
+        livreurs = [LivreurIndexe(*ligne) for ligne in Livreur.objects.values_list(*CHAMPS_LIVREUR)]
+        tranches = {}
+        for livreur_id, pk, poids_min, poids_max, prix_ttc in Tarif.objects.order_by().values_list(
+            'livreur_id', 'pk', 'poids_min', 'poids_max', 'prix_ttc'
+        ):
+            # (poids_min, pk) : à poids minimum égal, la tranche la plus ancienne
+            tranches.setdefault(livreur_id, []).append((poids_min, pk, poids_max, prix_ttc))
+        return cls(livreurs, {livreur_id: GrilleTarifaire(t) for livreur_id, t in tranches.items()})
+
+    def prix_ttc(self, livreur_id: int, poids) -> Optional[Decimal]:
+        """Prix TTC du tarif de `livreur_id` pour `poids` kg (sans majoration de service)"""
+        grille = self.grilles.get(livreur_id)
+        if grille is None:
+            return None
+        return grille.prix_ttc(_en_decimal(poids))
+
+    def coter(self, poids) -> List[dict]:
+        """
+        Prix de livraison de chaque livreur pour `poids` kg
+
+        Returns:
+            [{'livreur': LivreurIndexe, 'prix_livraison': Decimal ou None}, ...]
+            dans l'ordre des livreurs (nom)
+        """
+        poids = _en_decimal(poids)
+        cotations = []
+        for livreur in self.livreurs:
+            prix = None
+            if poids > 0 and livreur.est_actif:
+                prix = appliquer_service(self.prix_ttc(livreur.id, poids), livreur.type_service)
+            cotations.append({'livreur': livreur, 'prix_livraison': prix})
+        return cotations
+
+
+def _en_decimal(poids) -> Decimal:
+    return poids if isinstance(poids, Decimal) else Decimal(str(poids))
+
+
+# ===================================
+# INDEX PARTAGÉ PAR LE PROCESSUS
+# ===================================
+index_tarifs = IndexVersionne(CLE_VERSION_TARIFS, IndexTarifs.charger)
+
+
+def get_version_tarifs() -> int:
+    """Version courante des tarifs"""
+    return index_tarifs.version()
+
+
+def get_index_tarifs() -> IndexTarifs:
+    """Index des tarifs du processus, reconstruit si la version a changé"""
+    return index_tarifs.get()
+
+
+def invalider_index_tarifs():
+    """
+    À appeler après une écriture sur les livreurs ou les tarifs qui
+    n'envoie pas de signal (bulk_create, update)
+    """
+    index_tarifs.invalider()
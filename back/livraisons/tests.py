@@ -1,3 +1,220 @@
+import tempfile
+from decimal import Decimal
+
+from django.db import transaction
 from django.test import TestCase
 
-# Create your tests here.
+from commandes.models import Commande
+
+from .geo import cellule_geo
+from .geocodage import Position, TableCodesPostaux, coordonnees_exactes, geocoder, get_table_codes_postaux
+from .models import Livreur, PointRelais, Tarif
+from .tarifs import get_index_tarifs, index_tarifs
+
+
+class IndexTarifsTests(TestCase):
+    def setUp(self):
+        # Données validées pour l'index ; il est oublié à la fin du test, annulé
+        self.addCleanup(index_tarifs.vider)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.standard = Livreur.objects.create(nom='Colis Rapide', telephone='0400000000', email='colis@example.fr')
+            self.express = Livreur.objects.create(
+                nom='Express Sud', telephone='0400000001', email='express@example.fr', type_service='express'
+            )
+            for livreur in (self.standard, self.express):
+                for poids_min, poids_max, prix in (('0.01', '5', '5.00'), ('5.01', '10', '8.00'), ('3', '20', '12.00')):
+                    Tarif.objects.create(
+                        livreur=livreur, poids_min=Decimal(poids_min), poids_max=Decimal(poids_max),
+                        prix_ht=Decimal(prix), prix_ttc=Decimal(prix)
+                    )
+
+    def test_meme_tarif_que_la_requete(self):
+        for poids in ('0.5', '4', '5', '5.005', '7', '15', '20', '25'):
+            poids = Decimal(poids)
+            attendu = self.standard.tarifs.filter(poids_min__lte=poids, poids_max__gte=poids).first()
+            self.assertEqual(
+                self.standard.calculer_prix_livraison(poids),
+                attendu.prix_ttc if attendu else None,
+                poids
+            )
+
+    def test_cotation_de_tous_les_livreurs_sans_requete(self):
+        get_index_tarifs()
+
+        with self.assertNumQueries(0):
+            cotations = get_index_tarifs().coter(Decimal('7'))
+
+        prix = {cotation['livreur'].pk: cotation['prix_livraison'] for cotation in cotations}
+        # Tranches 5.01-10 et 3-20 : la plus petite borne minimale l'emporte, comme avec .first()
+        self.assertEqual(prix, {self.standard.pk: Decimal('12.00'), self.express.pk: Decimal('15.6000')})
+
+    def test_index_reconstruit_apres_modification(self):
+        self.assertEqual(self.standard.calculer_prix_livraison(Decimal('7')), Decimal('12.00'))
+
+        Tarif.objects.filter(livreur=self.standard, poids_min=Decimal('3')).get().delete()
+        self.assertEqual(self.standard.calculer_prix_livraison(Decimal('7')), Decimal('8.00'))
+
+        self.express.est_actif = False
+        self.express.save()
+        cotations = {cotation['livreur'].pk: cotation['prix_livraison'] for cotation in get_index_tarifs().coter(7)}
+        self.assertIsNone(cotations[self.express.pk])
+
+    def test_ecriture_annulee_sans_trace(self):
+        index = get_index_tarifs()
+
+        with self.assertRaises(ZeroDivisionError), transaction.atomic():
+            Tarif.objects.filter(livreur=self.standard, poids_min=Decimal('3')).get().delete()
+            # La transaction voit sa propre écriture, sans la publier
+            self.assertEqual(self.standard.calculer_prix_livraison(Decimal('7')), Decimal('8.00'))
+            self.assertIs(index_tarifs._index, index)
+            1 / 0
+
+        self.assertIs(get_index_tarifs(), index)
+        self.assertEqual(self.standard.calculer_prix_livraison(Decimal('7')), Decimal('12.00'))
+
+
+class DevisLivraisonTests(TestCase):
+    def setUp(self):
+        self.addCleanup(index_tarifs.vider)
+        with self.captureOnCommitCallbacks(execute=True):
+            livreur = Livreur.objects.create(nom='Colis Rapide', telephone='0400000000', email='colis@example.fr')
+            Tarif.objects.create(
+                livreur=livreur, poids_min=Decimal('0.01'), poids_max=Decimal('10'),
+                prix_ht=Decimal('5.00'), prix_ttc=Decimal('6.00')
+            )
+            Livreur.objects.create(nom='Sans tarif', telephone='0400000001', email='vide@example.fr')
+        for nom, latitude, longitude in (('Centre', '43.6108', '3.8767'), ('Lattes', '43.5670', '3.9000'),
+                                         ('Nîmes', '43.8367', '4.3601')):
+            PointRelais.objects.create(
+                nom=nom, adresse='1 rue de la Gare', code_postal='34000', ville='Montpellier',
+                latitude=Decimal(latitude), longitude=Decimal(longitude)
+            )
+
+    def test_devis_avec_points_relais_proches(self):
+        get_index_tarifs()
+
+        with self.assertNumQueries(1):
+            reponse = self.client.get(
+                '/api/livraison/devis/', {'poids': '2.5', 'latitude': 43.6108, 'longitude': 3.8767}
+            )
+
+        devis = reponse.json()
+        self.assertEqual([livreur['nom_entreprise'] for livreur in devis['livreurs']], ['Colis Rapide'])
+        self.assertEqual(devis['livreurs'][0]['prix_livraison'], 6.0)
+        self.assertEqual([point['nom'] for point in devis['points_relais']], ['Centre', 'Lattes'])
+
+    def test_poids_obligatoire(self):
+        reponse = self.client.get('/api/livraison/devis/', {'code_postal': '34000'})
+        self.assertEqual(reponse.status_code, 400)
+
+
+class RechercheSpatialeTests(TestCase):
+    CENTRE = (43.6108, 3.8767)
+
+    def creer_point(self, nom, latitude, longitude, **champs):
+        return PointRelais.objects.create(
+            nom=nom, adresse='1 place de la Comédie', code_postal='34000', ville='Montpellier',
+            latitude=Decimal(latitude), longitude=Decimal(longitude), **champs
+        )
+
+    def test_rayon_trie_et_filtre(self):
+        self.creer_point('Centre', '43.610800', '3.876700')
+        # De l'autre côté d'une limite de cellule (3,9°), à ~2 km
+        self.creer_point('Est', '43.610800', '3.901000')
+        self.creer_point('Inactif', '43.611000', '3.877000', est_actif=False)
+        complet = self.creer_point('Complet', '43.612000', '3.878000', capacite_max=1)
+        self.creer_point('Loin', '43.836700', '4.360100')
+        Commande.objects.create(point_relais=complet, statut='en_livraison')
+
+        with self.assertNumQueries(1):
+            resultats = PointRelais.proches(*self.CENTRE, rayon_km=10)
+
+        self.assertEqual([point.nom for point, _ in resultats], ['Centre', 'Est'])
+        self.assertAlmostEqual(resultats[1][1], 1.96, places=1)
+
+    def test_plus_proches(self):
+        for i in range(6):
+            self.creer_point(f'Relais {i}', f'{43.6108 + 0.05 * i:.6f}', '3.876700')
+
+        resultats = PointRelais.plus_proches(*self.CENTRE, nombre=3)
+
+        self.assertEqual([point.nom for point, _ in resultats], ['Relais 0', 'Relais 1', 'Relais 2'])
+
+    def test_ecritures_en_masse(self):
+        point, = PointRelais.objects.bulk_create([PointRelais(
+            nom='En masse', adresse='1 place de la Comédie', code_postal='34000', ville='Montpellier',
+            latitude=Decimal('43.610800'), longitude=Decimal('3.876700'),
+        )])
+        self.assertEqual(point.cellule_geo, cellule_geo(*self.CENTRE))
+
+        # Déplacé par update() : la cellule remise à None, le point reste trouvé
+        PointRelais.objects.filter(pk=point.pk).update(longitude=Decimal('3.901000'), cellule_geo=None)
+        self.assertEqual([point.nom for point, _ in PointRelais.proches(*self.CENTRE, rayon_km=10)], ['En masse'])
+
+
+class GeocodageTests(TestCase):
+    def test_table_fournie(self):
+        self.assertGreaterEqual(len(get_table_codes_postaux()), 101)
+        self.assertEqual(geocoder('34000'), Position(43.6108, 3.8767, True))
+
+    def test_commune_departage_un_code_partage(self):
+        table = TableCodesPostaux([
+            (34160, 'castries', 43.6794, 3.9856),
+            (34160, 'sussargues', 43.7122, 4.0039),
+            (34000, 'montpellier', 43.6108, 3.8767),
+        ])
+        self.assertEqual(table.localiser('34160', 'SUSSARGUES'), Position(43.7122, 4.0039, True))
+        self.assertEqual(table.localiser('34160', 'Commune inconnue'), Position(43.6794, 3.9856, True))
+        # Code absent de la table : centroïde des communes du département, signalé comme approché
+        latitude, longitude, exacte = table.localiser('34980')
+        self.assertFalse(exacte)
+        self.assertAlmostEqual(latitude, 43.6675, places=3)
+        self.assertAlmostEqual(longitude, 3.9554, places=3)
+        self.assertIsNone(table.localiser('13001'))
+        self.assertIsNone(table.localiser('3400'))
+
+    def test_devis_localise_le_code_postal(self):
+        PointRelais.objects.create(
+            nom='Centre', adresse='1 place de la Comédie', code_postal='34000', ville='Montpellier',
+            latitude=Decimal('43.6108'), longitude=Decimal('3.8767')
+        )
+        PointRelais.objects.create(
+            nom='Lattes', adresse='1 rue de la Gare', code_postal='34970', ville='Lattes',
+            latitude=Decimal('43.5670'), longitude=Decimal('3.9000')
+        )
+
+        devis = self.client.get('/api/livraison/devis/', {'poids': '1', 'code_postal': '34000'}).json()
+
+        self.assertEqual([point['nom'] for point in devis['points_relais']], ['Centre', 'Lattes'])
+        self.assertEqual(devis['points_relais'][0]['distance'], 0.0)
+
+    def test_code_postal_absent_garde_le_filtre_par_code(self):
+        self.assertIsNone(coordonnees_exactes('34300', 'Agde'))
+        PointRelais.objects.create(
+            nom='Montpellier', adresse='1 place de la Comédie', code_postal='34000', ville='Montpellier',
+            latitude=Decimal('43.6108'), longitude=Decimal('3.8767')
+        )
+        PointRelais.objects.create(
+            nom='Agde', adresse='1 quai du Commandant Réveille', code_postal='34300', ville='Agde',
+            latitude=Decimal('43.3108'), longitude=Decimal('3.4758')
+        )
+
+        devis = self.client.get('/api/livraison/devis/', {'poids': '1', 'code_postal': '34300'}).json()
+
+        self.assertEqual([point['nom'] for point in devis['points_relais']], ['Agde'])
+        self.assertIsNone(devis['points_relais'][0]['distance'])
+
+    def test_lecture_de_la_base_la_poste(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', delete=False) as fichier:
+            fichier.write(
+                '#Code_commune_INSEE;Nom_de_la_commune;Code_postal;Ligne_5;Libellé_d_acheminement;coordonnees_gps\n'
+                '34003;AGDE;34300;;AGDE;43.3108, 3.4758\n'
+                '34003;AGDE;34300;LE CAP D AGDE;AGDE;43.2800, 3.5100\n'
+                '34172;MONTPELLIER;34000;;MONTPELLIER;43.6108, 3.8767\n'
+                '99999;SANS POSITION;34999;;SANS POSITION;\n'
+            )
+
+        table = TableCodesPostaux.charger(fichier.name)
+
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.localiser('34300', 'Agde'), Position(43.3108, 3.4758, True))
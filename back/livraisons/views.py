@@ -4,7 +4,7 @@ from django.views.decorators.csrf import csrf_exempt
 from paniers.models import  Panier
 from clients.models import Client
 from .models import Livreur, PointRelais
-from geopy.distance import geodesic
+from .tarifs import get_index_tarifs
 from django.http import JsonResponse
 import json
 from django.shortcuts import get_object_or_404
@@ -22,8 +22,8 @@ def calculer_poids_total(panier):
     Calculer le poids total des produits dans le panier.
     panier : un objet Panier qui a des lignes avec des produits et des quantités.
     """
-    poids_total = sum(ligne.produit.poids * ligne.quantite for ligne in panier.lignes.all())
-    return poids_total
+    # Poids tenu à jour sur le panier à chaque modification d'une ligne
+    return panier.calculer_poids_total()
 @csrf_exempt  # Vous pouvez vouloir gérer la sécurité CSRF d'une autre manière
 @client_login_required
 def view_livreurs(request):
@@ -39,15 +39,13 @@ def view_livreurs(request):
     if request.method == 'GET':
         # Calculer le poids total du panier
         poids_total = panier.calculer_poids_total()        
-        print(poids_total)
 
-        livreurs = Livreur.objects.all()
+        # Tous les livreurs cotés en un appel depuis l'index des tarifs en mémoire
         response_data = []
 
-        for livreur in livreurs:
-            # Calculer le prix de livraison en utilisant le poids total
-            prix_livraison = livreur.calculer_prix_livraison(poids_total)  # Utiliser le poids total
-            print(prix_livraison)
+        for cotation in get_index_tarifs().coter(poids_total):
+            livreur = cotation['livreur']
+            prix_livraison = cotation['prix_livraison']
             response_data.append({
 <<<<<<< HEAD
                 'id': livreur.id,
@@ -86,14 +84,16 @@ def points_relais_proches(request, client_id):
         # Récupérer le client
         client = get_object_or_404(Client, id=client_id)
 
-        # Récupérer tous les points relais
-        point_relais = PointRelais.objects.all()
-        points_proches = []
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            return JsonResponse({"error": "Coordonnées invalides."}, status=400)
 
-        for point in point_relais:
-            point_coords = (point.latitude, point.longitude)
-            distance = geodesic((latitude, longitude), point_coords).km  # Calcule la distance en km
+        # Points relais actifs et non complets à moins de 10 km, du plus proche
+        # au plus éloigné, lus par l'index spatial (voir livraisons.geo)
+        points_proches = []
 
+        for point, distance in PointRelais.proches(latitude, longitude, rayon_km=10):
             if distance <= 10:  # Vérifier si la distance est inférieure ou égale à 10 km
                 points_proches.append({
 <<<<<<< HEAD
@@ -0,0 +1,48 @@
+"""
+Command Django pour recalculer les totaux enregistrés sur les paniers
+
+Les totaux (HT, TVA, TTC, poids, nombre d'articles) sont maintenus au fil de
+l'eau à chaque modification d'une ligne ou du prix d'un produit. Cette
+commande les reconstruit après un import en masse (bulk_create), un update()
+direct en base ou une restauration de sauvegarde.
+
+Usage:
+  python manage.py recalculer_totaux_paniers
+  python manage.py recalculer_totaux_paniers --actifs
+"""
+
+from django.core.management.base import BaseCommand
+
+from paniers.models import Panier, recalculer_totaux_paniers
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les totaux HT/TVA/TTC, poids et nombre d\'articles des paniers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--actifs',
+            action='store_true',
+            help='Limiter aux paniers actifs'
+        )
+        parser.add_argument(
+            '--lot',
+            type=int,
+            default=1000,
+            help='Nombre de paniers recalculés par lot (défaut: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.HTTP_INFO('🧮 Recalcul des totaux des paniers...'))
+
+        paniers = Panier.objects.order_by('pk')
+        if options['actifs']:
+            paniers = paniers.filter(statut='actif')
+        paniers_ids = list(paniers.values_list('pk', flat=True))
+
+        lot = options['lot']
+        for debut in range(0, len(paniers_ids), lot):
+            recalculer_totaux_paniers(paniers_ids[debut:debut + lot])
+            self.stdout.write(f'  • {min(debut + lot, len(paniers_ids))}/{len(paniers_ids)} panier(s)')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Totaux à jour pour {len(paniers_ids)} panier(s)'))
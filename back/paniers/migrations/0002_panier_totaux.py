@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:43
+
+from decimal import ROUND_HALF_UP, Decimal
+from django.db import migrations, models
+
+
+def calculer_totaux(apps, schema_editor):
+    Panier = apps.get_model('paniers', 'Panier')
+    LignePanier = apps.get_model('paniers', 'LignePanier')
+    totaux = {}
+    for ligne in LignePanier.objects.select_related('produit').iterator(chunk_size=2000):
+        ht, tva, poids, articles = totaux.get(ligne.panier_id, (Decimal('0'), Decimal('0'), Decimal('0'), 0))
+        montant_ht = ligne.quantite * ligne.produit.prix_ht
+        totaux[ligne.panier_id] = (
+            ht + montant_ht,
+            tva + montant_ht * ligne.produit.tva / 100,
+            poids + ligne.quantite * (ligne.produit.poids or Decimal('0')),
+            articles + ligne.quantite,
+        )
+
+    paniers = []
+    for panier_id, (ht, tva, poids, articles) in totaux.items():
+        total_ht = ht.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        total_tva = tva.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        paniers.append(Panier(
+            pk=panier_id,
+            total_ht=total_ht,
+            total_tva=total_tva,
+            total_ttc=total_ht + total_tva,
+            poids_total=poids.quantize(Decimal('0.001'), rounding=ROUND_HALF_UP),
+            nb_articles=articles,
+        ))
+    Panier.objects.bulk_update(
+        paniers, ['total_ht', 'total_tva', 'total_ttc', 'poids_total', 'nb_articles'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paniers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='panier',
+            name='nb_articles',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre d'articles"),
+        ),
+        migrations.AddField(
+            model_name='panier',
+            name='poids_total',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.000'), editable=False, max_digits=12, verbose_name='Poids total (kg)'),
+        ),
+        migrations.AddField(
+            model_name='panier',
+            name='total_ht',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Total HT'),
+        ),
+        migrations.AddField(
+            model_name='panier',
+            name='total_ttc',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Total TTC'),
+        ),
+        migrations.AddField(
+            model_name='panier',
+            name='total_tva',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Total TVA'),
+        ),
+        migrations.RunPython(calculer_totaux, migrations.RunPython.noop),
+    ]
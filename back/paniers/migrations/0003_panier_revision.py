@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paniers', '0002_panier_totaux'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='panier',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Révision'),
+        ),
+    ]
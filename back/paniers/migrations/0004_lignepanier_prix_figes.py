@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:40
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def figer_prix_lignes(apps, schema_editor):
+    LignePanier = apps.get_model('paniers', 'LignePanier')
+    lignes = []
+    for ligne in LignePanier.objects.select_related('produit').iterator(chunk_size=2000):
+        produit = ligne.produit
+        ligne.prix_unitaire_ht = produit.prix_ht
+        ligne.taux_tva = produit.tva
+        ligne.pourcentage_promotion = produit.pourcentage_promotion if produit.en_promotion else Decimal('0.00')
+        ligne.poids_unitaire = produit.poids or Decimal('0.000')
+        lignes.append(ligne)
+        if len(lignes) >= 2000:
+            LignePanier.objects.bulk_update(
+                lignes, ['prix_unitaire_ht', 'taux_tva', 'pourcentage_promotion', 'poids_unitaire']
+            )
+            lignes = []
+    LignePanier.objects.bulk_update(
+        lignes, ['prix_unitaire_ht', 'taux_tva', 'pourcentage_promotion', 'poids_unitaire']
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paniers', '0003_panier_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lignepanier',
+            name='poids_unitaire',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.000'), editable=False, max_digits=10, verbose_name='Poids unitaire (kg)'),
+        ),
+        migrations.AddField(
+            model_name='lignepanier',
+            name='pourcentage_promotion',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=5, verbose_name='Promotion (%)'),
+        ),
+        migrations.AddField(
+            model_name='lignepanier',
+            name='prix_unitaire_ht',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True, verbose_name='Prix unitaire HT'),
+        ),
+        migrations.AddField(
+            model_name='lignepanier',
+            name='taux_tva',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=5, null=True, verbose_name='Taux de TVA (%)'),
+        ),
+        migrations.RunPython(figer_prix_lignes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paniers', '0004_lignepanier_prix_figes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lignepanier',
+            name='prix_unitaire_ht',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, verbose_name='Prix unitaire HT'),
+        ),
+        migrations.AlterField(
+            model_name='lignepanier',
+            name='taux_tva',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=5, verbose_name='Taux de TVA (%)'),
+        ),
+    ]
@@ -77,9 +77,48 @@ class LignePanier(models.Model):
     def __str__(self):
         return f"Panier# {self.pk} {self.produit.nom}-x {self.produit.fournisseur})"
 =======
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
 from produits.models import Produit, StatutProduit
 
 
+# Opérations acceptées par Panier.appliquer_operations
+OPERATIONS_PANIER = ('ajouter', 'retirer', 'definir')
+
+# Prix copiés du produit dans la ligne à l'ajout au panier
+CHAMPS_PRIX_LIGNE = ('prix_unitaire_ht', 'taux_tva', 'pourcentage_promotion', 'poids_unitaire')
+
+# Colonnes du produit à lire pour figer les prix d'une ligne
+COLONNES_PRIX_PRODUIT = ('id', 'prix_ht', 'tva', 'en_promotion', 'pourcentage_promotion', 'poids')
+
+
+def prix_figes(produit: Produit) -> dict:
+    """Valeurs de CHAMPS_PRIX_LIGNE pour `produit` (lu avec COLONNES_PRIX_PRODUIT)"""
+    return {
+        'prix_unitaire_ht': produit.prix_ht,
+        'taux_tva': produit.tva,
+        'pourcentage_promotion': produit.pourcentage_promotion if produit.en_promotion else Decimal('0.00'),
+        'poids_unitaire': produit.poids or Decimal('0.000'),
+    }
+
+
+def _quantite_valide(quantite) -> int:
+    """Quantité d'un ajout ou d'un retrait, entière et au moins 1"""
+    quantite = int(quantite)
+    if quantite < 1:
+        raise ValidationError(f"Quantité invalide : {quantite} (au moins 1)")
+    return quantite
+
+
 # ===================================
 # 1️⃣ LIGNE PANIER (EN PREMIER)
 # ===================================
@@ -107,6 +146,26 @@ class LignePanier(models.Model):
         verbose_name='Statut de préparation'
     )
     
+    # ===================================
+    # PRIX FIGÉS
+    # ===================================
+    # Copiés du produit à la création de la ligne et rafraîchis seulement par
+    # Panier.revalider_prix() : les totaux se calculent depuis les lignes, sans
+    # lire le produit, et ne changent plus si le fournisseur modifie son prix
+    
+    prix_unitaire_ht = models.DecimalField(
+        max_digits=10, decimal_places=2, editable=False, verbose_name='Prix unitaire HT'
+    )
+    taux_tva = models.DecimalField(
+        max_digits=5, decimal_places=2, editable=False, verbose_name='Taux de TVA (%)'
+    )
+    pourcentage_promotion = models.DecimalField(
+        max_digits=5, decimal_places=2, default=Decimal('0.00'), editable=False, verbose_name='Promotion (%)'
+    )
+    poids_unitaire = models.DecimalField(
+        max_digits=10, decimal_places=3, default=Decimal('0.000'), editable=False, verbose_name='Poids unitaire (kg)'
+    )
+    
     class Meta:
         verbose_name = 'Ligne de panier'
         verbose_name_plural = 'Lignes de panier'
@@ -116,19 +175,62 @@ class LignePanier(models.Model):
     def __str__(self):
         return f"{self.produit.nom} x{self.quantite}"
     
+    def save(self, *args, **kwargs):
+        # Nouvelle ligne créée sans prix : prix actuels du produit
+        if self.prix_unitaire_ht is None:
+            self.figer_prix()
+
+        update_fields = kwargs.get('update_fields')
+        ecrit_statut = self.pk is not None and (update_fields is None or 'statut' in update_fields)
+        if not ecrit_statut:
+            super().save(*args, **kwargs)
+        else:
+            # Comparé au statut en base, pas à celui du chargement : une
+            # instance chargée avant qu'un autre processus change le statut
+            # réécrit l'ancien, et ce changement doit aussi être compté
+            with transaction.atomic():
+                # Statut réellement en base, verrouillé jusqu'à la fin de la transaction
+                ancien = (
+                    LignePanier.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list('statut', flat=True)
+                    .first()
+                )
+                super().save(*args, **kwargs)
+                if ancien is not None and ancien != self.statut:
+                    statuts_lignes_modifies.send(
+                        sender=LignePanier,
+                        variations={self.panier_id: {ancien: -1, self.statut: 1}}
+                    )
+    
+    def figer_prix(self, produit=None):
+        """Copie dans la ligne le prix, la TVA, la promotion et le poids actuels du produit"""
+        for champ, valeur in prix_figes(produit or self.produit).items():
+            setattr(self, champ, valeur)
+    
+    def prix_a_jour(self, produit=None) -> bool:
+        """Vrai si les prix figés sont ceux actuels du produit"""
+        prix = prix_figes(produit or self.produit)
+        return all(getattr(self, champ) == valeur for champ, valeur in prix.items())
+    
+    @property
+    def prix_unitaire_ttc(self):
+        """Prix unitaire TTC figé"""
+        return self.prix_unitaire_ht * (1 + self.taux_tva / 100)
+    
     @property
     def sous_total(self):
         """Calcul du sous-total HT"""
-        return self.quantite * self.produit.prix_ht
+        return self.quantite * self.prix_unitaire_ht
 
     def sous_total_ttc(self):
         """Calcul du sous-total TTC"""
-        return self.quantite * self.produit.prix_ttc
+        return self.quantite * self.prix_unitaire_ttc
     
     @property
     def poids_total(self):
         """Calcul du poids total de cette ligne"""
-        return self.quantite * (self.produit.poids or 0)
+        return self.quantite * self.poids_unitaire
     
     def fournisseur(self):
         """Retourne le fournisseur du produit"""
@@ -162,6 +264,30 @@ class Panier(models.Model):
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
     
+    # ===================================
+    # TOTAUX (dénormalisés)
+    # ===================================
+    # Recalculés en une agrégation des prix figés des lignes à chaque
+    # modification d'une ligne (voir recalculer_totaux_paniers)
+    
+    total_ht = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal('0.00'), editable=False, verbose_name='Total HT'
+    )
+    total_tva = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal('0.00'), editable=False, verbose_name='Total TVA'
+    )
+    total_ttc = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal('0.00'), editable=False, verbose_name='Total TTC'
+    )
+    poids_total = models.DecimalField(
+        max_digits=12, decimal_places=3, default=Decimal('0.000'), editable=False, verbose_name='Poids total (kg)'
+    )
+    nb_articles = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre d\'articles')
+
+    # Incrémentée à chaque recalcul des totaux (ligne ou prix modifié) : le
+    # client compare cette valeur pour savoir si son panier local est à jour
+    revision = models.PositiveIntegerField(default=0, editable=False, verbose_name='Révision')
+    
     class Meta:
         verbose_name = 'Panier'
         verbose_name_plural = 'Paniers'
@@ -175,74 +301,214 @@ class Panier(models.Model):
     # ===================================
     
     def ajouter_produit(self, produit, quantite=1):
-        """Ajoute ou met à jour un produit dans le panier"""
-        ligne, created = LignePanier.objects.get_or_create(
-            panier=self,
-            produit=produit,
-            defaults={'quantite': quantite}
-        )
-        
-        if not created:
-            ligne.quantite += quantite
-            ligne.save()
-        
-        return ligne
+        """
+        Ajoute `quantite` unités d'un produit au panier
+
+        Une nouvelle ligne fige les prix actuels du produit (à lire avec
+        COLONNES_PRIX_PRODUIT) ; une ligne existante garde les siens.
+
+        L'incrément est fait en base (quantite = quantite + n) : des ajouts
+        simultanés sur la même ligne sont tous comptés. Si le produit est déjà
+        dans le panier, une seule requête UPDATE suffit ; sinon la ligne est
+        créée, et si un ajout concurrent l'a créée entre-temps (contrainte
+        unique panier/produit), elle est incrémentée.
+
+        Returns:
+            La ligne du panier, avec sa quantité en base
+
+        Raises:
+            ValidationError: quantité inférieure à 1
+        """
+        quantite = _quantite_valide(quantite)
+        lignes = LignePanier.objects.filter(panier=self, produit=produit)
+        with transaction.atomic():
+            if not lignes.update(quantite=F('quantite') + quantite):
+                try:
+                    with transaction.atomic():
+                        # post_save recalcule les totaux du panier
+                        return LignePanier.objects.create(panier=self, produit=produit, quantite=quantite)
+                except IntegrityError:
+                    lignes.update(quantite=F('quantite') + quantite)
+            self.recalculer_totaux()
+            return lignes.get()
     
     def enlever_produit(self, produit, quantite=1):
-        """Enlève une quantité d'un produit"""
-        try:
-            ligne = LignePanier.objects.get(panier=self, produit=produit)
-            
-            if ligne.quantite <= quantite:
-                ligne.delete()
+        """
+        Enlève `quantite` unités d'un produit, et la ligne si elle tombe à zéro
+
+        Le décrément est conditionnel (quantite > n) et fait en base ; sinon la
+        ligne est verrouillée avant d'être supprimée, pour ne pas effacer un
+        ajout concurrent arrivé entre les deux requêtes.
+
+        Raises:
+            ValidationError: quantité inférieure à 1
+        """
+        quantite = _quantite_valide(quantite)
+        lignes = LignePanier.objects.filter(panier=self, produit=produit)
+        with transaction.atomic():
+            if lignes.filter(quantite__gt=quantite).update(quantite=F('quantite') - quantite):
+                self.recalculer_totaux()
+                return
+            ligne = lignes.select_for_update().first()
+            if ligne is None:
+                return
+            if ligne.quantite > quantite:
+                lignes.update(quantite=F('quantite') - quantite)
+                self.recalculer_totaux()
             else:
-                ligne.quantite -= quantite
-                ligne.save()
-        
-        except LignePanier.DoesNotExist:
-            pass
+                # Les totaux recalculés à la suppression sont reportés sur ce panier
+                ligne.panier = self
+                ligne.delete()
     
     def supprimer_produit(self, produit):
         """Supprime complètement un produit du panier"""
         LignePanier.objects.filter(panier=self, produit=produit).delete()
-    
+
+    def appliquer_operations(self, operations):
+        """
+        Applique une liste d'opérations au panier dans une seule transaction
+
+        Args:
+            operations: liste de (operation, produit_id, quantite), operation
+                parmi OPERATIONS_PANIER ('ajouter', 'retirer', 'definir').
+                Une quantité finale nulle ou négative supprime la ligne.
+
+        Les produits sont lus en une requête (in_bulk) et les lignes existantes
+        verrouillées en une autre ; les écritures sont groupées (bulk_create,
+        bulk_update, un DELETE) et les totaux recalculés une seule fois.
+
+        Returns:
+            Liste des identifiants des lignes supprimées
+
+        Raises:
+            ValidationError: opération inconnue ou produit inexistant
+        """
+        operations = list(operations)
+        inconnues = sorted({op for op, _, _ in operations if op not in OPERATIONS_PANIER})
+        if inconnues:
+            raise ValidationError(f"Opération(s) inconnue(s) : {', '.join(inconnues)}")
+
+        produits_ids = {produit_id for _, produit_id, _ in operations}
+        produits = Produit.objects.only(*COLONNES_PRIX_PRODUIT).in_bulk(produits_ids)
+        manquants = sorted(produits_ids - set(produits))
+        if manquants:
+            raise ValidationError(
+                f"Produit(s) introuvable(s) : {', '.join(str(pk) for pk in manquants)}"
+            )
+
+        # Une ligne créée par une requête concurrente entre la lecture et le
+        # bulk_create viole la contrainte unique : on recommence avec elle
+        for tentative in range(2):
+            try:
+                with transaction.atomic(), totaux_differes(self):
+                    return self._appliquer_operations(operations, produits)
+            except IntegrityError:
+                if tentative:
+                    raise
+
+    def _appliquer_operations(self, operations, produits):
+        lignes = {
+            ligne.produit_id: ligne
+            for ligne in LignePanier.objects.select_for_update().filter(
+                panier=self, produit_id__in={produit_id for _, produit_id, _ in operations}
+            )
+        }
+        quantites = {produit_id: ligne.quantite for produit_id, ligne in lignes.items()}
+
+        for operation, produit_id, quantite in operations:
+            actuelle = quantites.get(produit_id, 0)
+            if operation == 'ajouter':
+                quantites[produit_id] = actuelle + quantite
+            elif operation == 'retirer':
+                quantites[produit_id] = actuelle - quantite
+            else:
+                quantites[produit_id] = quantite
+
+        a_creer, a_modifier, a_supprimer = [], [], []
+        for produit_id, quantite in quantites.items():
+            ligne = lignes.get(produit_id)
+            if quantite <= 0:
+                if ligne is not None:
+                    a_supprimer.append(ligne.pk)
+            elif ligne is None:
+                produit = produits[produit_id]
+                a_creer.append(LignePanier(panier=self, produit=produit, quantite=quantite, **prix_figes(produit)))
+            elif ligne.quantite != quantite:
+                ligne.quantite = quantite
+                a_modifier.append(ligne)
+
+        if a_supprimer:
+            LignePanier.objects.filter(pk__in=a_supprimer).delete()
+        if a_modifier:
+            LignePanier.objects.bulk_update(a_modifier, ['quantite'])
+        if a_creer:
+            LignePanier.objects.bulk_create(a_creer)
+        return a_supprimer
+
+    def revalider_prix(self):
+        """
+        Rafraîchit les prix figés des lignes avec les prix actuels des produits
+
+        Les lignes sont lues et verrouillées en une requête, celles dont un
+        prix a changé sont mises à jour en une seule requête et les totaux du
+        panier recalculés une fois (rien n'est écrit si tout est à jour).
+
+        Returns:
+            Liste des lignes dont le prix, la TVA, la promotion ou le poids a changé
+        """
+        with transaction.atomic():
+            lignes = (
+                LignePanier.objects.select_for_update(of=('self',))
+                .filter(panier=self)
+                .select_related('produit')
+                .only(*CHAMPS_PRIX_LIGNE, 'panier_id', 'produit_id', *(f'produit__{c}' for c in COLONNES_PRIX_PRODUIT))
+            )
+            modifiees = []
+            for ligne in lignes:
+                if not ligne.prix_a_jour():
+                    ligne.figer_prix()
+                    modifiees.append(ligne)
+            if modifiees:
+                LignePanier.objects.bulk_update(modifiees, CHAMPS_PRIX_LIGNE)
+                self.recalculer_totaux()
+        return modifiees
+
     def vider_panier(self):
         """Vide complètement le panier"""
         # ✅ Utilisation de LignePanier.objects au lieu de self.lignes
-        LignePanier.objects.filter(panier=self).delete()
+        with totaux_differes(self):
+            LignePanier.objects.filter(panier=self).delete()
     
     # ===================================
     # CALCULS
     # ===================================
+    # Les totaux sont tenus à jour en base (voir recalculer_totaux_paniers) :
+    # ces méthodes ne font aucune requête.
     
     def calculer_total(self):
-        """Calcule le total HT du panier"""
-        # ✅ Utilisation de LignePanier.objects
-        total = 0
-        for ligne in LignePanier.objects.filter(panier=self):
-            total += ligne.sous_total
-        return total
+        """Retourne le total HT du panier"""
+        return self.total_ht
     
     def calculer_total_ttc(self):
-        """Calcule le total TTC du panier"""
-        total = 0
-        for ligne in LignePanier.objects.filter(panier=self):
-            total += ligne.sous_total_ttc()
-        return total
+        """Retourne le total TTC du panier"""
+        return self.total_ttc
     
     def calculer_poids_total(self):
-        """Calcule le poids total du panier"""
-        poids = 0
-        for ligne in LignePanier.objects.filter(panier=self):
-            poids += ligne.poids_total
-        return poids
+        """Retourne le poids total du panier"""
+        return self.poids_total
     
     def nombre_articles(self):
         """Retourne le nombre total d'articles"""
-        total = 0
-        for ligne in LignePanier.objects.filter(panier=self):
-            total += ligne.quantite
-        return total
+        return self.nb_articles
+    
+    def recalculer_totaux(self):
+        """Recalcule les totaux depuis les lignes (une agrégation + une mise à jour)"""
+        totaux = recalculer_totaux_paniers([self.pk])
+        self._appliquer_totaux(totaux.get(self.pk, _totaux_vides()))
+    
+    def _appliquer_totaux(self, totaux: dict):
+        for champ, valeur in totaux.items():
+            setattr(self, champ, valeur)
     
     # ===================================
     # INFORMATIONS
@@ -299,5 +565,197 @@ class Panier(models.Model):
     
     def reinitialiser_statuts_lignes(self):
         """Remet tous les statuts des lignes à EN_ATTENTE"""
-        LignePanier.objects.filter(panier=self).update(statut=StatutProduit.EN_ATTENTE)
+        changer_statut_lignes(LignePanier.objects.filter(panier=self), StatutProduit.EN_ATTENTE)
+
+
+# ===================================
+# 3️⃣ TOTAUX DES PANIERS
+# ===================================
+CHAMPS_TOTAUX_PANIER = ('total_ht', 'total_tva', 'total_ttc', 'poids_total', 'nb_articles')
+
+_CENTIME = Decimal('0.01')
+_GRAMME = Decimal('0.001')
+
+# Paniers dont le recalcul est reporté à la sortie du bloc totaux_differes() :
+# {panier_id: [instances chargées à mettre à jour]}
+_paniers_differes: ContextVar = ContextVar('paniers_differes', default=None)
+
+
+def _totaux_vides() -> dict:
+    return {
+        'total_ht': Decimal('0.00'),
+        'total_tva': Decimal('0.00'),
+        'total_ttc': Decimal('0.00'),
+        'poids_total': Decimal('0.000'),
+        'nb_articles': 0,
+    }
+
+
+def _montant(expression):
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=20, decimal_places=6))
+
+
+def recalculer_totaux_paniers(paniers_ids) -> dict:
+    """
+    Recalcule et enregistre les totaux des paniers `paniers_ids`
+
+    Une seule requête agrège les lignes de tous les paniers (GROUP BY panier),
+    une seconde enregistre les totaux et incrémente la révision des paniers.
+    Le total TTC est la somme HT + TVA arrondies au centime, comme sur une
+    facture.
+
+    Returns:
+        {panier_id: {champ: valeur}} pour chaque panier recalculé
+    """
+    paniers_ids = set(paniers_ids)
+    if not paniers_ids:
+        return {}
+
+    # Calculés depuis les prix figés des lignes : pas de jointure sur le produit
+    montant_ht = F('quantite') * F('prix_unitaire_ht')
+    agregats = (
+        LignePanier.objects.filter(panier_id__in=paniers_ids)
+        .order_by()
+        .values('panier_id')
+        .annotate(
+            ht=Sum(_montant(montant_ht)),
+            tva=Sum(_montant(montant_ht * F('taux_tva') / Value(100))),
+            poids=Sum(_montant(F('quantite') * F('poids_unitaire'))),
+            articles=Sum('quantite'),
+        )
+    )
+
+    resultats = {panier_id: _totaux_vides() for panier_id in paniers_ids}
+    for ligne in agregats:
+        total_ht = Decimal(ligne['ht'] or 0).quantize(_CENTIME, rounding=ROUND_HALF_UP)
+        total_tva = Decimal(ligne['tva'] or 0).quantize(_CENTIME, rounding=ROUND_HALF_UP)
+        resultats[ligne['panier_id']] = {
+            'total_ht': total_ht,
+            'total_tva': total_tva,
+            'total_ttc': total_ht + total_tva,
+            'poids_total': Decimal(ligne['poids'] or 0).quantize(_GRAMME, rounding=ROUND_HALF_UP),
+            'nb_articles': ligne['articles'] or 0,
+        }
+
+    Panier.objects.bulk_update(
+        [
+            Panier(pk=panier_id, revision=F('revision') + 1, **totaux)
+            for panier_id, totaux in resultats.items()
+        ],
+        CHAMPS_TOTAUX_PANIER + ('revision',),
+        batch_size=500
+    )
+    return resultats
+
+
+@contextmanager
+def totaux_differes(*paniers: 'Panier'):
+    """
+    Regroupe les recalculs de totaux déclenchés dans le bloc
+
+    Chaque panier touché par une ligne créée, modifiée ou supprimée dans le
+    bloc, ainsi que chaque panier passé en argument, est recalculé une seule
+    fois à la sortie (pas de recalcul si le bloc lève une exception) ; les
+    instances passées en argument reçoivent les nouveaux totaux. Les écritures
+    en masse (bulk_create, update) ne déclenchent pas de signal : passer le
+    panier en argument pour qu'il soit recalculé.
+    """
+    differes = _paniers_differes.get()
+    if differes is not None:
+        for panier in paniers:
+            differes.setdefault(panier.pk, []).append(panier)
+        yield
+        return
+
+    differes = {}
+    for panier in paniers:
+        differes.setdefault(panier.pk, []).append(panier)
+    jeton = _paniers_differes.set(differes)
+    try:
+        yield
+    finally:
+        _paniers_differes.reset(jeton)
+
+    totaux = recalculer_totaux_paniers(differes)
+    for panier_id, instances in differes.items():
+        for panier in instances:
+            panier._appliquer_totaux(totaux[panier_id])
+
+
+def _ligne_modifiee(ligne: LignePanier):
+    # Le panier déjà chargé avec la ligne (panier.ajouter_produit...) reste à jour
+    panier = ligne._state.fields_cache.get('panier')
+
+    differes = _paniers_differes.get()
+    if differes is not None:
+        instances = differes.setdefault(ligne.panier_id, [])
+        if panier is not None:
+            instances.append(panier)
+        return
+
+    totaux = recalculer_totaux_paniers([ligne.panier_id])
+    if panier is not None and ligne.panier_id in totaux:
+        panier._appliquer_totaux(totaux[ligne.panier_id])
+
+
+@receiver(post_save, sender=LignePanier)
+def ligne_panier_enregistree(sender, instance: LignePanier, update_fields=None, **kwargs):
+    """Signal après sauvegarde d'une ligne : mise à jour des totaux du panier"""
+    if update_fields is not None and not {'quantite', 'produit', 'panier', *CHAMPS_PRIX_LIGNE} & set(update_fields):
+        return
+    _ligne_modifiee(instance)
+
+
+@receiver(post_delete, sender=LignePanier)
+def ligne_panier_supprimee(sender, instance: LignePanier, **kwargs):
+    """Signal après suppression d'une ligne : mise à jour des totaux du panier"""
+    # Ligne supprimée en cascade avec son panier ou son client : rien à recalculer
+    origine = kwargs.get('origin')
+    if origine is not None and getattr(origine, 'model', type(origine)) not in (LignePanier, Produit):
+        return
+    _ligne_modifiee(instance)
+
+
+# ===================================
+# 4️⃣ STATUTS DES LIGNES
+# ===================================
+# Envoyé dans la transaction qui change le statut de lignes (LignePanier.save
+# ou changer_statut_lignes), une fois par écriture :
+# variations = {panier_id: {statut: +/- nombre de lignes}}
+statuts_lignes_modifies = Signal()
+
+
+def changer_statut_lignes(lignes, statut) -> int:
+    """
+    Passe les lignes du queryset `lignes` au statut `statut`
+
+    Les lignes à modifier sont verrouillées et lues en une requête, mises à
+    jour en une seconde, puis un seul signal statuts_lignes_modifies décrit
+    les variations de tous les paniers touchés.
+
+    Returns:
+        Nombre de lignes dont le statut a changé
+    """
+    if statut not in StatutProduit.values:
+        raise ValidationError(f"Statut de ligne inconnu : {statut}")
+
+    with transaction.atomic():
+        anciens = list(
+            lignes.exclude(statut=statut)
+            .select_for_update()
+            .order_by('pk')
+            .values_list('pk', 'panier_id', 'statut')
+        )
+        if not anciens:
+            return 0
+
+        LignePanier.objects.filter(pk__in=[pk for pk, _, _ in anciens]).update(statut=statut)
+
+        variations = defaultdict(Counter)
+        for _, panier_id, ancien in anciens:
+            variations[panier_id][ancien] -= 1
+            variations[panier_id][statut] += 1
+        statuts_lignes_modifies.send(sender=LignePanier, variations=dict(variations))
+    return len(anciens)
+
 >>>>>>> e097b66e17a2ea974af903e357531f5ddcf8880b
@@ -1,3 +1,215 @@
-from django.test import TestCase
+import threading
+import uuid
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from clients.models import Client
+from produits.models import Produit
+
+from .models import LignePanier, Panier, totaux_differes
+
+
+def creer_panier():
+    client = Client.objects.create(
+        username='martin', email='martin@example.fr', password=make_password('motdepasse'),
+        session_token=uuid.uuid4().hex, token_expiration=timezone.now() + timedelta(days=1)
+    )
+    produit = Produit.objects.create(nom='Pommes golden', prix_ht=Decimal('2.50'), tva=Decimal('5.50'))
+    return Panier.objects.create(client=client), produit
+
+
+class QuantitePanierTests(TestCase):
+    def setUp(self):
+        self.panier, self.produit = creer_panier()
+
+    def test_ajout_sur_ligne_existante_incremente_en_base(self):
+        ligne = self.panier.ajouter_produit(self.produit, 2)
+        self.assertEqual((ligne.pk, ligne.quantite), (LignePanier.objects.get(panier=self.panier).pk, 2))
+        # Un autre processus a modifié la ligne : l'ajout ne doit pas l'écraser
+        LignePanier.objects.filter(panier=self.panier).update(quantite=5)
+
+        ligne = self.panier.ajouter_produit(self.produit, 3)
+
+        self.assertEqual(ligne.quantite, 8)
+        self.assertEqual(LignePanier.objects.get(panier=self.panier).quantite, 8)
+        self.assertEqual(self.panier.nb_articles, 8)
+
+    def test_quantite_inferieure_a_un_refusee(self):
+        for quantite in (0, -2):
+            with self.assertRaises(ValidationError):
+                self.panier.ajouter_produit(self.produit, quantite)
+        self.panier.ajouter_produit(self.produit, 2)
+        with self.assertRaises(ValidationError):
+            self.panier.enlever_produit(self.produit, -1)
+        self.assertEqual(LignePanier.objects.get(panier=self.panier).quantite, 2)
+
+    def test_retrait_decremente_puis_supprime(self):
+        self.panier.ajouter_produit(self.produit, 3)
+
+        self.panier.enlever_produit(self.produit, 2)
+        self.assertEqual(LignePanier.objects.get(panier=self.panier).quantite, 1)
+
+        self.panier.enlever_produit(self.produit, 2)
+        self.assertFalse(LignePanier.objects.filter(panier=self.panier).exists())
+        self.assertEqual(self.panier.nb_articles, 0)
+
+    def test_retrait_produit_absent(self):
+        self.panier.enlever_produit(self.produit)
+        self.assertEqual(Panier.objects.get(pk=self.panier.pk).nb_articles, 0)
+
+
+class OperationsPanierTests(TestCase):
+    def setUp(self):
+        self.panier, self.produit = creer_panier()
+        self.autre = Produit.objects.create(nom='Poires', prix_ht=Decimal('3.00'), tva=Decimal('5.50'))
+
+    def test_lot_applique_en_une_fois(self):
+        self.panier.ajouter_produit(self.produit, 4)
+
+        self.panier.appliquer_operations([
+            ('retirer', self.produit.pk, 1),
+            ('ajouter', self.autre.pk, 2),
+            ('ajouter', self.autre.pk, 1),
+        ])
+
+        quantites = dict(LignePanier.objects.filter(panier=self.panier).values_list('produit_id', 'quantite'))
+        self.assertEqual(quantites, {self.produit.pk: 3, self.autre.pk: 3})
+        self.assertEqual(self.panier.nb_articles, 6)
+        self.assertEqual(self.panier.total_ht, Decimal('16.50'))
+
+    def test_quantite_nulle_supprime_la_ligne(self):
+        self.panier.ajouter_produit(self.produit, 2)
+
+        self.panier.appliquer_operations([('definir', self.produit.pk, 0)])
+
+        self.assertFalse(LignePanier.objects.filter(panier=self.panier).exists())
+        self.assertEqual(Panier.objects.get(pk=self.panier.pk).nb_articles, 0)
+
+    def test_produit_inconnu_n_ecrit_rien(self):
+        with self.assertRaises(ValidationError):
+            self.panier.appliquer_operations([
+                ('ajouter', self.produit.pk, 1),
+                ('ajouter', self.autre.pk + 1000, 1),
+            ])
+        self.assertFalse(LignePanier.objects.filter(panier=self.panier).exists())
+
+
+class TotauxPanierTests(TestCase):
+    def setUp(self):
+        self.panier, self.pommes = creer_panier()
+        Produit.objects.filter(pk=self.pommes.pk).update(prix_ht=Decimal('2.35'), poids=Decimal('0.500'))
+        self.pommes.refresh_from_db()
+        self.vin = Produit.objects.create(nom='Vin rouge', prix_ht=Decimal('10.00'), tva=Decimal('20.00'))
+        self.panier.ajouter_produit(self.pommes, 3)
+        self.panier.ajouter_produit(self.vin, 1)
+
+    def totaux(self):
+        panier = Panier.objects.get(pk=self.panier.pk)
+        return panier.total_ht, panier.total_tva, panier.total_ttc, panier.nb_articles
+
+    def test_totaux_enregistres_lus_sans_requete(self):
+        # TVA : 3 x 2,35 x 5,5 % + 10 x 20 % = 2,38775
+        self.assertEqual(self.totaux(), (Decimal('17.05'), Decimal('2.39'), Decimal('19.44'), 4))
+        panier = Panier.objects.get(pk=self.panier.pk)
+        self.assertEqual(panier.poids_total, Decimal('1.500'))
+        with self.assertNumQueries(0):
+            self.assertEqual(panier.calculer_total(), Decimal('17.05'))
+            self.assertEqual(panier.nombre_articles(), 4)
+
+    def test_totaux_suivent_les_lignes(self):
+        self.panier.enlever_produit(self.vin, 1)
+        self.assertEqual(self.totaux()[0], Decimal('7.05'))
+
+        self.pommes.delete()
+        self.assertEqual(self.totaux()[3], 0)
+
+        self.panier.ajouter_produit(self.vin, 2)
+        with totaux_differes():
+            autre = Produit.objects.create(nom='Miel', prix_ht=Decimal('1.00'))
+            LignePanier.objects.create(panier=self.panier, produit=autre, quantite=1)
+            self.assertEqual(self.totaux()[3], 2)
+        self.assertEqual(self.totaux()[3], 3)
+
+        self.panier.vider_panier()
+        self.assertEqual(self.totaux(), (0, 0, 0, 0))
+
+
+class PrixFigesTests(TestCase):
+    def setUp(self):
+        self.panier, self.produit = creer_panier()
+        self.panier.ajouter_produit(self.produit, 3)
+
+    def test_prix_fige_a_l_ajout_puis_revalide(self):
+        self.produit.prix_ht = Decimal('3.00')
+        self.produit.save()
+        self.assertEqual(Panier.objects.get(pk=self.panier.pk).total_ht, Decimal('7.50'))
+
+        # La ligne garde le prix de son ajout jusqu'à la revalidation
+        ligne = self.panier.lignes.get()
+        self.assertEqual(ligne.prix_unitaire_ht, Decimal('2.50'))
+
+        self.assertEqual(len(self.panier.revalider_prix()), 1)
+        self.assertEqual(self.panier.revalider_prix(), [])
+        ligne.refresh_from_db()
+        self.assertEqual(ligne.prix_unitaire_ht, Decimal('3.00'))
+        self.assertEqual(Panier.objects.get(pk=self.panier.pk).total_ht, Decimal('9.00'))
+
+
+class QuantitePanierConcurrenceTests(TransactionTestCase):
+    """Plusieurs threads modifient la même ligne : aucune mise à jour ne doit être perdue"""
+
+    NB_THREADS = 8
+    OPERATIONS_PAR_THREAD = 25
+
+    def setUp(self):
+        # Vérifié ici : la base de test n'existe pas encore à l'import du module
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("SQLite en mémoire partagée ne gère pas les écritures concurrentes")
+        self.panier, self.produit = creer_panier()
+
+    def executer_en_parallele(self, operation):
+        depart = threading.Barrier(self.NB_THREADS)
+        erreurs = []
+
+        def travailler():
+            try:
+                panier = Panier.objects.get(pk=self.panier.pk)
+                depart.wait()
+                for _ in range(self.OPERATIONS_PAR_THREAD):
+                    operation(panier)
+            except Exception as e:
+                erreurs.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=travailler) for _ in range(self.NB_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(erreurs, [])
+
+    def test_ajouts_concurrents(self):
+        # La ligne n'existe pas encore : les threads se disputent aussi sa création
+        self.executer_en_parallele(lambda panier: panier.ajouter_produit(self.produit, 1))
+
+        total = self.NB_THREADS * self.OPERATIONS_PAR_THREAD
+        self.assertEqual(LignePanier.objects.get(panier=self.panier).quantite, total)
+        panier = Panier.objects.get(pk=self.panier.pk)
+        self.assertEqual(panier.nb_articles, total)
+        self.assertEqual(panier.total_ht, Decimal('2.50') * total)
+
+    def test_retraits_concurrents(self):
+        total = self.NB_THREADS * self.OPERATIONS_PAR_THREAD
+        self.panier.ajouter_produit(self.produit, total + 1)
+
+        self.executer_en_parallele(lambda panier: panier.enlever_produit(self.produit, 1))
+
+        self.assertEqual(LignePanier.objects.get(panier=self.panier).quantite, 1)
+        self.assertEqual(Panier.objects.get(pk=self.panier.pk).nb_articles, 1)
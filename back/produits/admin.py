@@ -73,6 +73,7 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from typing import Optional, List, Tuple, Any
 from decimal import Decimal
+from django.db import transaction
 from django.db.models import QuerySet
 
 from .models import (
@@ -83,8 +84,10 @@ from .models import (
     StatutProduit,
     Categorie,
     SousCategorie,
-    SousSousCategorie
+    SousSousCategorie,
+    recalculer_compteurs_produits
 )
+from .utils import incrementer_version_catalogue
 
 
 # ===================================
@@ -240,7 +243,7 @@ class CategorieAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimisation avec préchargement des relations"""
         qs = super().get_queryset(request)
-        return qs.prefetch_related('souscategories', 'produits')
+        return qs.prefetch_related('souscategories')
 
     list_display = (
         'icone_display',
@@ -703,7 +706,11 @@ class ProduitAdmin(admin.ModelAdmin):
     @admin.action(description='Activer les produits selectionnes')
     def activer_produits(self, request: HttpRequest, queryset: QuerySet) -> None:
         """Active les produits sélectionnés"""
-        updated = queryset.update(est_actif=True)
+        # update() contourne save() : compteurs et cache du catalogue sont remis à jour ici
+        with transaction.atomic():
+            updated = queryset.update(est_actif=True)
+            recalculer_compteurs_produits()
+            transaction.on_commit(incrementer_version_catalogue)
         self.message_user(
             request,
             f"{updated} produit(s) active(s) avec succes.",
@@ -713,7 +720,11 @@ class ProduitAdmin(admin.ModelAdmin):
     @admin.action(description='Desactiver les produits selectionnes')
     def desactiver_produits(self, request: HttpRequest, queryset: QuerySet) -> None:
         """Désactive les produits sélectionnés"""
-        updated = queryset.update(est_actif=False)
+        # update() contourne save() : compteurs et cache du catalogue sont remis à jour ici
+        with transaction.atomic():
+            updated = queryset.update(est_actif=False)
+            recalculer_compteurs_produits()
+            transaction.on_commit(incrementer_version_catalogue)
         self.message_user(
             request,
             f"{updated} produit(s) desactive(s) avec succes.",
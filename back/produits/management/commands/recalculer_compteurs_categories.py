@@ -0,0 +1,29 @@
+"""
+Command Django pour recalculer les compteurs de produits actifs des catégories
+
+Les compteurs `nb_produits_actifs` sont maintenus au fil de l'eau par
+Produit.save() et la suppression des produits. Cette commande les reconstruit
+entièrement (un seul GROUP BY) après un import en masse, un update() direct
+en base ou une restauration de sauvegarde.
+
+Usage:
+  python manage.py recalculer_compteurs_categories
+"""
+
+from django.core.management.base import BaseCommand
+
+from produits.models import recalculer_compteurs_produits
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs de produits actifs des catégories, sous-catégories et sous-sous-catégories'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.HTTP_INFO('🔢 Recalcul des compteurs de produits...'))
+
+        corriges = recalculer_compteurs_produits()
+
+        for niveau, nombre in corriges.items():
+            self.stdout.write(f'  • {niveau}: {nombre} compteur(s) corrigé(s)')
+
+        self.stdout.write(self.style.SUCCESS('✓ Compteurs à jour'))
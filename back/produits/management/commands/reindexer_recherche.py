@@ -0,0 +1,39 @@
+"""
+Command Django pour reconstruire l'index de recherche des produits
+
+L'index est tenu à jour à chaque sauvegarde de produit, de descripteur ou
+de changement de nom d'un fournisseur. Cette commande le remplit pour les
+produits existants ou le reconstruit après une modification du découpage
+(mots vides, poids des champs).
+
+Usage:
+  python manage.py reindexer_recherche
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from produits.models import Produit, TermeRecherche
+from produits.utils import incrementer_version_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit l\'index de recherche plein texte des produits'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.HTTP_INFO('🔎 Indexation des produits...'))
+
+        produits = Produit.objects.select_related('fournisseur').order_by('pk')
+
+        total = 0
+        for produit in produits.iterator(chunk_size=500):
+            TermeRecherche.indexer(produit)
+            total += 1
+            if total % 500 == 0:
+                self.stdout.write(f'  • {total} produit(s) indexé(s)')
+
+        transaction.on_commit(incrementer_version_catalogue)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {total} produit(s) indexé(s), {TermeRecherche.objects.count()} terme(s) dans l\'index'
+        ))
@@ -0,0 +1,63 @@
+"""
+Command Django pour remplir la colonne `icone_produit` des produits
+
+Produit.save() calcule l'icône à chaque sauvegarde. Cette commande remplit
+les produits existants et recalcule toutes les icônes après une modification
+de PRODUCT_ICONS : seules les lignes dont l'icône change sont écrites.
+
+Usage:
+  python manage.py remplir_icones_produits
+  python manage.py remplir_icones_produits --batch-size 2000
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from produits.models import Produit
+from produits.utils import get_smart_product_icon, incrementer_version_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Calcule et enregistre l\'icône de chaque produit'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Nombre de produits lus et écrits par lot (défaut: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write(self.style.HTTP_INFO('🔎 Calcul des icônes des produits...'))
+
+        produits = Produit.objects.only(
+            'pk', 'nom', 'description_courte', 'icone_produit'
+        ).order_by('pk')
+
+        total = 0
+        a_modifier = []
+        modifies = 0
+        for produit in produits.iterator(chunk_size=batch_size):
+            total += 1
+            icone = get_smart_product_icon(produit.nom, produit.description_courte or "")
+            if produit.icone_produit != icone:
+                produit.icone_produit = icone
+                a_modifier.append(produit)
+            if len(a_modifier) >= batch_size:
+                modifies += self._enregistrer(a_modifier)
+                a_modifier = []
+        modifies += self._enregistrer(a_modifier)
+
+        if modifies:
+            transaction.on_commit(incrementer_version_catalogue)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {modifies} icône(s) mise(s) à jour sur {total} produit(s)')
+        )
+
+    def _enregistrer(self, produits) -> int:
+        if produits:
+            Produit.objects.bulk_update(produits, ['icone_produit'])
+        return len(produits)
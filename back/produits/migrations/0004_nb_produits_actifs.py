@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:25
+
+from django.db import migrations, models
+
+
+def calculer_compteurs(apps, schema_editor):
+    Produit = apps.get_model('produits', 'Produit')
+    champs = {
+        'Categorie': 'categorie',
+        'SousCategorie': 'souscategorie',
+        'SousSousCategorie': 'soussouscategorie',
+    }
+    for modele, champ in champs.items():
+        Modele = apps.get_model('produits', modele)
+        comptes = (
+            Produit.objects.filter(est_actif=True, **{f'{champ}__isnull': False})
+            .order_by()
+            .values_list(f'{champ}_id')
+            .annotate(total=models.Count('pk'))
+        )
+        for pk, total in comptes:
+            Modele.objects.filter(pk=pk).update(nb_produits_actifs=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produits', '0003_rename_descripteurs_specifiques_souscategorie_descripteurs_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categorie',
+            name='nb_produits_actifs',
+            field=models.IntegerField(default=0, editable=False, help_text='Compteur dénormalisé, maintenu à la sauvegarde/suppression des produits', verbose_name='Produits actifs'),
+        ),
+        migrations.AddField(
+            model_name='souscategorie',
+            name='nb_produits_actifs',
+            field=models.IntegerField(default=0, editable=False, help_text='Compteur dénormalisé, maintenu à la sauvegarde/suppression des produits', verbose_name='Produits actifs'),
+        ),
+        migrations.AddField(
+            model_name='soussouscategorie',
+            name='nb_produits_actifs',
+            field=models.IntegerField(default=0, editable=False, help_text='Compteur dénormalisé, maintenu à la sauvegarde/suppression des produits', verbose_name='Produits actifs'),
+        ),
+        migrations.RunPython(calculer_compteurs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produits', '0004_nb_produits_actifs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produit',
+            name='icone_produit',
+            field=models.CharField(blank=True, editable=False, help_text='Emoji déduit du nom et de la description courte à la sauvegarde', max_length=16, verbose_name='Icône'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produits', '0005_produit_icone_produit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermeRecherche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('terme', models.CharField(db_index=True, max_length=64, verbose_name='Terme')),
+                ('poids', models.FloatField(default=0, verbose_name='Poids')),
+                ('produit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termes_recherche', to='produits.produit', verbose_name='Produit')),
+            ],
+            options={
+                'verbose_name': 'Terme de recherche',
+                'verbose_name_plural': 'Termes de recherche',
+                'unique_together': {('terme', 'produit')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:20
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def creer_table_cache_versions(apps, schema_editor):
+    """Table du cache partagé des versions (CACHES['versions']), ignorée si elle existe déjà"""
+    call_command('createcachetable', 'cache_versions', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produits', '0006_termerecherche'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_table_cache_versions, migrations.RunPython.noop),
+    ]
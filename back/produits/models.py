@@ -307,6 +307,7 @@ def generate_qr_code(sender, instance, created, **kwargs):
 =======
 # produits/models.py
 
+import math
 import os
 import uuid
 import qrcode
@@ -316,17 +317,20 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Dict, Any, List, Optional, TYPE_CHECKING
 
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.core.files import File
 from django.utils.text import slugify
 from django.utils.safestring import mark_safe
 from django.urls import reverse
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
 from fournisseur.models import Fournisseur
+from .utils.cache_catalogue import incrementer_version_catalogue
+from .utils.product_icons import get_smart_product_icon
+from .utils.recherche import LONGUEUR_MAX_TERME, extraire_termes, ponderer_termes
 
 logger = logging.getLogger(__name__)
 
@@ -413,6 +417,13 @@ class Categorie(models.Model):
         verbose_name="Descripteurs",
         help_text="Descripteurs communs à tous les produits de cette catégorie"
     )
+
+    nb_produits_actifs = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Produits actifs",
+        help_text="Compteur dénormalisé, maintenu à la sauvegarde/suppression des produits"
+    )
     
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
@@ -441,8 +452,8 @@ class Categorie(models.Model):
         return self.souscategories.filter(est_active=True).count()
 
     def get_nombre_produits(self) -> int:
-        """Retourne le nombre de produits dans cette catégorie"""
-        return self.produits.filter(est_actif=True).count()
+        """Retourne le nombre de produits actifs dans cette catégorie"""
+        return self.nb_produits_actifs
 
 
 
@@ -469,6 +480,13 @@ class SousCategorie(models.Model):
         blank=True,
         help_text="Descripteurs additionnels propres à cette sous-catégorie"
     )
+
+    nb_produits_actifs = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Produits actifs",
+        help_text="Compteur dénormalisé, maintenu à la sauvegarde/suppression des produits"
+    )
     
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
@@ -496,8 +514,8 @@ class SousCategorie(models.Model):
         return template
 
     def get_nombre_produits(self) -> int:
-        """Retourne le nombre de produits dans cette sous-catégorie"""
-        return self.produits.filter(est_actif=True).count()
+        """Retourne le nombre de produits actifs dans cette sous-catégorie"""
+        return self.nb_produits_actifs
 
     def get_nombre_sousssouscategories(self) -> int:
         """Retourne le nombre de sous-sous-catégories"""
@@ -537,6 +555,13 @@ class SousSousCategorie(models.Model):
         blank=True,
         help_text="Descripteurs additionnels propres à cette sous-sous-catégorie"
     )
+
+    nb_produits_actifs = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Produits actifs",
+        help_text="Compteur dénormalisé, maintenu à la sauvegarde/suppression des produits"
+    )
     
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
@@ -569,8 +594,8 @@ class SousSousCategorie(models.Model):
         return template
 
     def get_nombre_produits(self) -> int:
-        """Retourne le nombre de produits dans cette sous-sous-catégorie"""
-        return self.produits.filter(est_actif=True).count()
+        """Retourne le nombre de produits actifs dans cette sous-sous-catégorie"""
+        return self.nb_produits_actifs
 
     def get_arborescence(self) -> str:
         """Retourne l'arborescence complète"""
@@ -625,6 +650,13 @@ class Produit(models.Model):
         blank=True,
         verbose_name="Description détaillée"
     )
+    icone_produit = models.CharField(
+        max_length=16,
+        blank=True,
+        editable=False,
+        verbose_name="Icône",
+        help_text="Emoji déduit du nom et de la description courte à la sauvegarde"
+    )
     
     # Catégorisation (3 niveaux)
     categorie = models.ForeignKey(
@@ -808,6 +840,46 @@ class Produit(models.Model):
     def __str__(self):
         return f"{self.nom} ({self.numero_unique})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Mémoriser l'état lu en base pour calculer les deltas des compteurs
+        instance._etat_compteurs = instance._lire_etat_compteurs()
+        return instance
+
+    def _lire_etat_compteurs(self):
+        """(est_actif, categorie_id, souscategorie_id, soussouscategorie_id), ou None si un champ est différé"""
+        valeurs = self.__dict__
+        if not all(champ in valeurs for champ in CHAMPS_COMPTEURS_PRODUIT):
+            return None
+        return tuple(valeurs[champ] for champ in CHAMPS_COMPTEURS_PRODUIT)
+
+    def _etat_compteurs_ecrit(self, ancien_etat, update_fields):
+        """
+        État en base après un save() : seuls les champs réellement écrits
+        (update_fields, ou champs chargés d'une instance partiellement lue)
+        remplacent ceux de `ancien_etat`
+        """
+        if ancien_etat is None:
+            return self._lire_etat_compteurs()
+        if update_fields is None:
+            ecrits = set(self.__dict__)
+        else:
+            ecrits = {self._meta.get_field(nom).attname for nom in update_fields}
+        return tuple(
+            self.__dict__[champ] if champ in ecrits and champ in self.__dict__ else ancienne
+            for champ, ancienne in zip(CHAMPS_COMPTEURS_PRODUIT, ancien_etat)
+        )
+
+    def _etat_compteurs_en_base(self):
+        """État actuellement enregistré en base (None pour un produit non encore créé)"""
+        if self._state.adding or self.pk is None:
+            return None
+        etat = getattr(self, '_etat_compteurs', None)
+        if etat is None:
+            etat = Produit.objects.filter(pk=self.pk).values_list(*CHAMPS_COMPTEURS_PRODUIT).first()
+        return etat
+
     def save(self, *args, **kwargs):
         """Surcharge de save pour générer les champs automatiques"""
         # Génération du numéro unique
@@ -827,7 +899,18 @@ class Produit(models.Model):
         # Validation de la cohérence des catégories
         self._valider_categories()
         
-        super().save(*args, **kwargs)
+        # Icône calculée une fois ici plutôt qu'à chaque sérialisation
+        self.icone_produit = get_smart_product_icon(self.nom, self.description_courte or "")
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'nom', 'description_courte'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'icone_produit'}
+        
+        ancien_etat = self._etat_compteurs_en_base()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            nouvel_etat = self._etat_compteurs_ecrit(ancien_etat, kwargs.get('update_fields'))
+            appliquer_deltas_compteurs(ancien_etat, nouvel_etat)
+        self._etat_compteurs = nouvel_etat
         
         # Génération du QR code après sauvegarde
         if not self.qr_code:
@@ -1342,6 +1425,218 @@ class LogoLabel(models.Model):
         return f"{self.nom} - {self.produit.nom}"
 
 
+# ===================================
+# INDEX DE RECHERCHE
+# ===================================
+
+class TermeRecherche(models.Model):
+    """
+    Index inversé de la recherche produits : un terme normalisé par produit
+
+    Le poids cumule les poids des champs où le terme apparaît (voir
+    POIDS_CHAMPS). Une recherche ne lit que les lignes des termes demandés
+    via l'index (terme, produit) au lieu de parcourir tous les produits.
+    """
+    # db_index : sous PostgreSQL, ajoute l'index varchar_pattern_ops utilisé par la recherche par préfixe
+    terme = models.CharField(max_length=LONGUEUR_MAX_TERME, db_index=True, verbose_name="Terme")
+    produit = models.ForeignKey(
+        Produit,
+        on_delete=models.CASCADE,
+        related_name='termes_recherche',
+        verbose_name="Produit"
+    )
+    poids = models.FloatField(default=0, verbose_name="Poids")
+
+    class Meta:
+        verbose_name = 'Terme de recherche'
+        verbose_name_plural = 'Termes de recherche'
+        unique_together = ['terme', 'produit']
+
+    def __str__(self):
+        return f"{self.terme} → {self.produit_id} ({self.poids})"
+
+    # Nombre maximum de termes retenus pour le préfixe du dernier mot saisi
+    EXPANSION_PREFIXE_MAX = 50
+
+    @classmethod
+    def champs_indexes(cls, produit: 'Produit') -> List[tuple]:
+        """Couples (champ, texte) indexés pour un produit"""
+        champs = [
+            ('nom', produit.nom),
+            ('description_courte', produit.description_courte),
+            ('description_longue', produit.description_longue),
+            ('origine', produit.origine),
+        ]
+        if produit.fournisseur_id:
+            fournisseur = produit.fournisseur
+            champs.append(('fournisseur', f"{fournisseur.nom} {fournisseur.prenom}"))
+        champs.extend(
+            ('descripteurs', valeur)
+            for valeur in produit.descripteurs.values_list('valeur', flat=True)
+        )
+        return champs
+
+    @classmethod
+    def indexer(cls, produit: 'Produit') -> None:
+        """Met à jour les termes d'un produit en n'écrivant que les différences"""
+        nouveaux = ponderer_termes(cls.champs_indexes(produit))
+        existants = {
+            terme: (pk, poids)
+            for pk, terme, poids in cls.objects.filter(produit=produit).values_list('pk', 'terme', 'poids')
+        }
+
+        a_supprimer = [pk for terme, (pk, _) in existants.items() if terme not in nouveaux]
+        a_creer = [
+            cls(terme=terme, produit=produit, poids=poids)
+            for terme, poids in nouveaux.items() if terme not in existants
+        ]
+        a_modifier = [
+            cls(pk=existants[terme][0], poids=poids)
+            for terme, poids in nouveaux.items()
+            if terme in existants and existants[terme][1] != poids
+        ]
+
+        with transaction.atomic():
+            if a_supprimer:
+                cls.objects.filter(pk__in=a_supprimer).delete()
+            if a_creer:
+                cls.objects.bulk_create(a_creer)
+            if a_modifier:
+                cls.objects.bulk_update(a_modifier, ['poids'])
+
+    @classmethod
+    def rechercher(cls, requete: str, limite: int = 20) -> List[tuple]:
+        """
+        Retourne les couples (produit_id, score) des produits actifs les mieux classés
+
+        Le dernier mot de la requête est aussi cherché comme préfixe (saisie en
+        cours). Les produits couvrant le plus de mots de la requête passent en
+        premier, puis par score : somme des poids des termes trouvés, chaque
+        terme étant pondéré par sa rareté (IDF) dans le catalogue.
+        """
+        mots = list(dict.fromkeys(extraire_termes(requete)))
+        if not mots:
+            return []
+        dernier = mots[-1]
+
+        lignes = cls.objects.filter(produit__est_actif=True)
+        frequences = dict(
+            lignes.filter(models.Q(terme__in=mots) | models.Q(terme__startswith=dernier))
+            .order_by()
+            .values_list('terme')
+            .annotate(n=models.Count('produit_id'))
+        )
+        if not frequences:
+            return []
+
+        # Limiter l'expansion du préfixe aux termes les plus fréquents
+        prefixes = sorted(
+            (terme for terme in frequences if terme not in mots),
+            key=lambda terme: -frequences[terme]
+        )[:cls.EXPANSION_PREFIXE_MAX]
+        termes_par_mot = {mot: [mot] if mot in frequences else [] for mot in mots}
+        termes_par_mot[dernier] = termes_par_mot[dernier] + prefixes
+        retenus = {terme for termes in termes_par_mot.values() for terme in termes}
+
+        total = Produit.objects.filter(est_actif=True).count()
+        score = models.Sum(models.Case(
+            *[
+                models.When(terme=terme, then=models.F('poids') * models.Value(
+                    math.log(1 + total / frequences[terme])
+                ))
+                for terme in retenus
+            ],
+            default=models.Value(0.0),
+            output_field=models.FloatField()
+        ))
+        couvertures = [
+            models.Max(models.Case(
+                models.When(terme__in=termes, then=models.Value(1)),
+                default=models.Value(0),
+                output_field=models.IntegerField()
+            ))
+            for termes in termes_par_mot.values() if termes
+        ]
+        couverture = couvertures[0]
+        for autre in couvertures[1:]:
+            couverture = couverture + autre
+
+        resultats = (
+            lignes.filter(terme__in=retenus)
+            .order_by()
+            .values('produit_id')
+            .annotate(couverture=couverture, score=score)
+            .order_by('-couverture', '-score', 'produit_id')[:limite]
+        )
+        return [(ligne['produit_id'], ligne['score']) for ligne in resultats]
+
+
+# ===================================
+# COMPTEURS DE PRODUITS ACTIFS
+# ===================================
+
+# Champs du produit qui déterminent les compteurs, dans l'ordre des états
+CHAMPS_COMPTEURS_PRODUIT = ('est_actif', 'categorie_id', 'souscategorie_id', 'soussouscategorie_id')
+
+
+def appliquer_deltas_compteurs(ancien_etat, nouvel_etat):
+    """
+    Met à jour les compteurs `nb_produits_actifs` des catégories touchées
+
+    Les états sont des tuples (est_actif, categorie_id, souscategorie_id,
+    soussouscategorie_id), None pour un produit inexistant. Chaque nœud
+    modifié reçoit un UPDATE ... SET n = n ± 1 : pas de relecture, pas de
+    perte de mise à jour entre deux sauvegardes concurrentes.
+    """
+    modeles = (Categorie, SousCategorie, SousSousCategorie)
+    deltas = {}
+    for etat, signe in ((ancien_etat, -1), (nouvel_etat, 1)):
+        if not etat or not etat[0]:
+            continue
+        for modele, pk in zip(modeles, etat[1:]):
+            if pk is not None:
+                deltas[(modele, pk)] = deltas.get((modele, pk), 0) + signe
+
+    for (modele, pk), delta in deltas.items():
+        if delta:
+            modele.objects.filter(pk=pk).update(
+                nb_produits_actifs=models.F('nb_produits_actifs') + delta
+            )
+
+
+def recalculer_compteurs_produits() -> Dict[str, int]:
+    """
+    Recalcule tous les compteurs à partir d'un seul GROUP BY sur les produits actifs
+
+    Returns:
+        Nombre de nœuds corrigés par niveau de l'arborescence
+    """
+    comptes = {Categorie: {}, SousCategorie: {}, SousSousCategorie: {}}
+    groupes = (
+        Produit.objects.filter(est_actif=True)
+        .order_by()
+        .values_list('categorie_id', 'souscategorie_id', 'soussouscategorie_id')
+        .annotate(total=models.Count('pk'))
+    )
+    for categorie_id, souscategorie_id, soussouscategorie_id, total in groupes:
+        for modele, pk in zip(comptes, (categorie_id, souscategorie_id, soussouscategorie_id)):
+            if pk is not None:
+                comptes[modele][pk] = comptes[modele].get(pk, 0) + total
+
+    corriges = {}
+    with transaction.atomic():
+        for modele, compte in comptes.items():
+            a_corriger = []
+            for noeud in modele.objects.only('pk', 'nb_produits_actifs').select_for_update():
+                attendu = compte.get(noeud.pk, 0)
+                if noeud.nb_produits_actifs != attendu:
+                    noeud.nb_produits_actifs = attendu
+                    a_corriger.append(noeud)
+            modele.objects.bulk_update(a_corriger, ['nb_produits_actifs'], batch_size=500)
+            corriges[modele._meta.model_name] = len(a_corriger)
+    return corriges
+
+
 # ===================================
 # SIGNAUX
 # ===================================
@@ -1349,6 +1644,8 @@ class LogoLabel(models.Model):
 @receiver(post_save, sender=Produit)
 def produit_post_save(sender, instance: Produit, created: bool, **kwargs):
     """Signal après sauvegarde d'un produit"""
+    transaction.on_commit(incrementer_version_catalogue)
+
     if created:
         logger.info(f"Nouveau produit créé: {instance.nom} ({instance.numero_unique})")
 
@@ -1369,6 +1666,8 @@ def produit_post_save(sender, instance: Produit, created: bool, **kwargs):
 def produit_pre_delete(sender, instance: Produit, **kwargs):
     """Signal avant suppression d'un produit"""
     logger.info(f"Suppression du produit: {instance.nom} ({instance.numero_unique})")
+    appliquer_deltas_compteurs(instance._etat_compteurs_en_base(), None)
+    transaction.on_commit(incrementer_version_catalogue)
     
     # Supprimer les fichiers associés
     if instance.image_principale:
@@ -1380,6 +1679,63 @@ def produit_pre_delete(sender, instance: Produit, **kwargs):
             os.remove(instance.qr_code.path)
 
 
+@receiver(post_save, sender=Categorie)
+@receiver(post_save, sender=SousCategorie)
+@receiver(post_save, sender=SousSousCategorie)
+@receiver(post_save, sender=Fournisseur)
+@receiver(pre_delete, sender=Categorie)
+@receiver(pre_delete, sender=SousCategorie)
+@receiver(pre_delete, sender=SousSousCategorie)
+@receiver(pre_delete, sender=Fournisseur)
+def catalogue_modifie(sender, instance, **kwargs):
+    """Signal après modification d'un élément exposé dans le catalogue public"""
+    transaction.on_commit(incrementer_version_catalogue)
+
+
+# Champs dont la modification impose de réindexer le produit
+CHAMPS_INDEXES_PRODUIT = {'nom', 'description_courte', 'description_longue', 'origine', 'fournisseur'}
+
+
+@receiver(post_save, sender=Produit)
+def produit_indexer(sender, instance: Produit, update_fields=None, **kwargs):
+    """Signal après sauvegarde d'un produit : mise à jour de l'index de recherche"""
+    if update_fields is not None and not CHAMPS_INDEXES_PRODUIT & set(update_fields):
+        return
+    TermeRecherche.indexer(instance)
+
+
+@receiver(post_save, sender=DescripteurProduit)
+@receiver(post_delete, sender=DescripteurProduit)
+def descripteur_indexer(sender, instance: DescripteurProduit, **kwargs):
+    """Signal après modification d'un descripteur : réindexation de son produit"""
+    # Descripteur supprimé en cascade avec son produit : rien à réindexer
+    origine = kwargs.get('origin')
+    if origine is not None and getattr(origine, 'model', type(origine)) is not DescripteurProduit:
+        return
+    produit = Produit.objects.filter(pk=instance.produit_id).select_related('fournisseur').first()
+    if produit is not None:
+        TermeRecherche.indexer(produit)
+        transaction.on_commit(incrementer_version_catalogue)
+
+
+@receiver(pre_save, sender=Fournisseur)
+def fournisseur_nom_avant(sender, instance: Fournisseur, **kwargs):
+    """Signal avant sauvegarde d'un fournisseur : mémorise son ancien nom"""
+    instance._nom_indexe = None
+    if instance.pk:
+        instance._nom_indexe = Fournisseur.objects.filter(pk=instance.pk).values_list('nom', 'prenom').first()
+
+
+@receiver(post_save, sender=Fournisseur)
+def fournisseur_indexer(sender, instance: Fournisseur, created: bool, **kwargs):
+    """Signal après sauvegarde d'un fournisseur : réindexe ses produits si son nom a changé"""
+    ancien = getattr(instance, '_nom_indexe', None)
+    if created or ancien is None or ancien == (instance.nom, instance.prenom):
+        return
+    for produit in Produit.objects.filter(fournisseur=instance).select_related('fournisseur'):
+        TermeRecherche.indexer(produit)
+
+
 @receiver(pre_delete, sender=ImageProduit)
 def image_produit_pre_delete(sender, instance: ImageProduit, **kwargs):
     """Signal avant suppression d'une image"""
@@ -0,0 +1,103 @@
+"""
+Réservation du stock des produits à la création des commandes
+
+Le stock de toutes les lignes est vérifié et décrémenté en une fois, dans la
+transaction qui enregistre la commande : deux commandes simultanées ne
+peuvent pas vendre la même unité, et une commande refusée ne laisse aucun
+stock décrémenté.
+"""
+from typing import Dict, List, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from .models import Produit, StatutProduit
+from .utils.cache_catalogue import incrementer_version_catalogue
+
+
+class StockInsuffisant(ValidationError):
+    """
+    Levée quand au moins une ligne dépasse le stock disponible
+
+    `manques` décrit toutes les lignes concernées :
+    [{'produit_id', 'produit', 'quantite_commandee', 'stock_disponible'}, ...]
+    """
+
+    def __init__(self, manques: List[dict]):
+        self.manques = manques
+        super().__init__([
+            f"{manque['produit']} : {manque['quantite_commandee']} demandé(s), "
+            f"{manque['stock_disponible']} disponible(s)"
+            for manque in manques
+        ])
+
+
+def _lire_stocks(quantites: Dict[int, int], verrouiller: bool = False) -> Dict[int, Tuple[str, int]]:
+    produits = Produit.objects.filter(pk__in=quantites).order_by('pk')
+    if verrouiller:
+        # Verrous pris dans l'ordre des clés : pas d'interblocage entre deux
+        # commandes qui contiennent les mêmes produits
+        produits = produits.select_for_update()
+    return {pk: (nom, stock) for pk, nom, stock in produits.values_list('pk', 'nom', 'stock_actuel')}
+
+
+def _manques(quantites: Dict[int, int], stocks: Dict[int, Tuple[str, int]]) -> List[dict]:
+    manques = []
+    for produit_id, quantite in sorted(quantites.items()):
+        nom, stock = stocks.get(produit_id, (None, 0))
+        if stock < quantite:
+            manques.append({
+                'produit_id': produit_id,
+                'produit': nom,
+                'quantite_commandee': quantite,
+                'stock_disponible': max(stock, 0),
+            })
+    return manques
+
+
+@transaction.atomic
+def reserver_stock(quantites: Dict[int, int]) -> None:
+    """
+    Retire du stock les quantités {produit_id: quantite}, tout ou rien
+
+    Les produits sont verrouillés (SELECT ... FOR UPDATE) puis une seule
+    requête décrémente tous les stocks, conditionnée à stock_actuel >= quantité
+    pour chaque produit, et passe en rupture ceux qui tombent à zéro. À
+    appeler dans la transaction qui crée la commande.
+
+    Raises:
+        StockInsuffisant: au moins un produit n'a pas le stock demandé (toutes
+            les lignes en défaut sont signalées, aucun stock n'est modifié)
+    """
+    quantites = {produit_id: quantite for produit_id, quantite in quantites.items() if quantite > 0}
+    if not quantites:
+        return
+
+    stocks = _lire_stocks(quantites, verrouiller=True)
+    manques = _manques(quantites, stocks)
+    if manques:
+        raise StockInsuffisant(manques)
+
+    quantite = Case(
+        *[When(pk=produit_id, then=Value(q)) for produit_id, q in quantites.items()],
+        output_field=IntegerField()
+    )
+    condition = Q()
+    for produit_id, q in quantites.items():
+        condition |= Q(pk=produit_id, stock_actuel__gte=q)
+
+    modifies = Produit.objects.filter(condition).update(
+        stock_actuel=F('stock_actuel') - quantite,
+        statut=Case(When(stock_actuel=quantite, then=Value(StatutProduit.RUPTURE)), default=F('statut')),
+    )
+    if modifies != len(quantites):
+        # Base sans verrou de ligne (SQLite) : un stock a changé entre la
+        # vérification et la mise à jour, qui est annulée avec la transaction
+        raise StockInsuffisant(_manques(quantites, _lire_stocks(quantites)))
+
+    # Le catalogue en cache n'est invalidé que si un produit passe en rupture
+    # (update() n'envoie pas post_save) : une simple baisse de stock laisse
+    # les réponses en cache valables, la commande revérifiant le stock
+    if any(stocks[produit_id][1] == q for produit_id, q in quantites.items()):
+        transaction.on_commit(incrementer_version_catalogue)
@@ -1,3 +1,118 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from fournisseur.models import Fournisseur
+
+from .models import Categorie, DescripteurProduit, Produit, SousCategorie, SousSousCategorie, TermeRecherche
+
+
+def creer_produit(nom, **champs):
+    produit = Produit(nom=nom, prix_ht=Decimal('2.50'), tva=Decimal('5.50'), stock_actuel=10, **champs)
+    produit.save()
+    return produit
+
+
+class CompteursProduitsActifsTests(TestCase):
+    def setUp(self):
+        self.fruits = Categorie.objects.create(nom='Fruits')
+        self.legumes = Categorie.objects.create(nom='Légumes')
+        self.pommes = SousCategorie.objects.create(nom='Pommes', categorie=self.fruits)
+        self.golden = SousSousCategorie.objects.create(nom='Golden', souscategorie=self.pommes)
+
+    def compteurs(self, *noeuds):
+        for noeud in noeuds:
+            noeud.refresh_from_db()
+        return tuple(noeud.nb_produits_actifs for noeud in noeuds)
+
+    def test_deplacement_activation_suppression(self):
+        produit = creer_produit('Golden bio', soussouscategorie=self.golden)
+        creer_produit('Poire', categorie=self.fruits)
+        creer_produit('Poireau', categorie=self.legumes, est_actif=False)
+        self.assertEqual(self.compteurs(self.fruits, self.pommes, self.golden, self.legumes), (2, 1, 1, 0))
+
+        produit.est_actif = False
+        produit.save()
+        self.assertEqual(self.compteurs(self.fruits, self.pommes, self.golden), (1, 0, 0))
+        produit.est_actif = True
+        produit.save()
+
+        produit = Produit.objects.get(pk=produit.pk)
+        produit.categorie, produit.souscategorie, produit.soussouscategorie = self.legumes, None, None
+        produit.save()
+        self.assertEqual(self.compteurs(self.fruits, self.pommes, self.golden, self.legumes), (1, 0, 0, 1))
+
+        # Instance partiellement chargée : l'état en base est relu
+        Produit.objects.only('pk', 'nom').get(pk=produit.pk).delete()
+        self.assertEqual(self.compteurs(self.legumes), (0,))
+
+    def test_seuls_les_champs_ecrits_comptent(self):
+        produit = creer_produit('Golden bio', soussouscategorie=self.golden)
+
+        # Modifiés en mémoire mais pas écrits : la base, et donc les compteurs, ne changent pas
+        produit.est_actif = False
+        produit.categorie, produit.souscategorie, produit.soussouscategorie = self.legumes, None, None
+        produit.nom = 'Golden'
+        produit.save(update_fields=['nom'])
+        self.assertEqual(self.compteurs(self.fruits, self.golden, self.legumes), (1, 1, 0))
+
+        produit.save(update_fields=['est_actif'])
+        self.assertEqual(self.compteurs(self.fruits, self.golden, self.legumes), (0, 0, 0))
+
+        # Réactivé : la catégorie en base est toujours Golden
+        produit.est_actif = True
+        produit.save(update_fields=['est_actif'])
+        self.assertEqual(self.compteurs(self.fruits, self.golden, self.legumes), (1, 1, 0))
+
+        # Produit partiellement chargé : seuls les champs chargés sont écrits
+        partiel = Produit.objects.only('pk', 'nom', 'est_actif').get(pk=produit.pk)
+        partiel.est_actif = False
+        partiel.save()
+        self.assertEqual(self.compteurs(self.fruits, self.golden), (0, 0))
+
+
+class IndexRechercheTests(TestCase):
+    def setUp(self):
+        self.fournisseur = Fournisseur(
+            nom='Dupont', prenom='Marie', email='dupont@example.fr', metier='Maraîchère', contact='Marie',
+            tel='0600000000', adresse='1 chemin des Vignes', code_postal='34000', ville='Montpellier'
+        )
+        self.fournisseur.set_password('motdepasse')
+        self.fournisseur.save()
+        self.peches = creer_produit('Pêches de vigne', fournisseur=self.fournisseur, origine='Provence')
+        self.confiture = creer_produit('Confiture', description_courte='aux pêches blanches')
+        self.miel = creer_produit('Miel de lavande', origine='Drôme')
+        creer_produit('Pêche inactive', est_actif=False)
+
+    def resultats(self, requete):
+        return [produit_id for produit_id, _ in TermeRecherche.rechercher(requete)]
+
+    def test_classement(self):
+        # Le nom pèse plus que la description ; accents et pluriels ignorés, inactifs exclus
+        self.assertEqual(self.resultats('peche'), [self.peches.pk, self.confiture.pk])
+        self.assertEqual(self.resultats('dupont'), [self.peches.pk])
+        self.assertEqual(self.resultats('lav'), [self.miel.pk])
+        self.assertEqual(set(self.resultats('miel provence')), {self.peches.pk, self.miel.pk})
+
+    def test_reindexation_par_les_signaux(self):
+        DescripteurProduit.objects.create(produit=self.miel, cle='fleur', valeur='Acacia')
+        self.assertEqual(self.resultats('acacia'), [self.miel.pk])
+
+        self.fournisseur.nom = 'Martin'
+        self.fournisseur.save()
+        self.assertEqual(self.resultats('martin'), [self.peches.pk])
+        self.assertEqual(self.resultats('dupont'), [])
+
+        self.miel.nom = 'Nectar'
+        self.miel.save()
+        self.assertEqual(self.resultats('miel'), [])
+
+        Produit.objects.all().delete()
+        self.assertFalse(TermeRecherche.objects.exists())
+
+    def test_commande_reindexer(self):
+        TermeRecherche.objects.all().delete()
+        call_command('reindexer_recherche', stdout=StringIO())
+        self.assertEqual(self.resultats('confitures'), [self.confiture.pk])
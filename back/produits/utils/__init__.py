@@ -1,3 +1,9 @@
 from .product_icons import get_smart_product_icon, PRODUCT_ICONS
+from .cache_catalogue import get_version_catalogue, incrementer_version_catalogue
 
-__all__ = ['get_smart_product_icon', 'PRODUCT_ICONS']
+__all__ = [
+    'get_smart_product_icon',
+    'PRODUCT_ICONS',
+    'get_version_catalogue',
+    'incrementer_version_catalogue',
+]
@@ -0,0 +1,23 @@
+"""
+Compteur de version du catalogue (produits, catégories, fournisseurs)
+
+La version est partagée par tous les workers (voir utils.version_partagee) :
+une écriture validée dans un processus invalide les réponses en cache de
+tous les autres. Les réponses elles-mêmes peuvent rester dans le cache local
+de chaque processus, leurs clés contiennent la version.
+"""
+from utils.version_partagee import VersionPartagee
+
+CLE_VERSION_CATALOGUE = 'catalogue:version'
+
+version_catalogue = VersionPartagee(CLE_VERSION_CATALOGUE)
+
+
+def get_version_catalogue() -> int:
+    """Retourne la version courante du catalogue"""
+    return version_catalogue.get()
+
+
+def incrementer_version_catalogue() -> int:
+    """Invalide toutes les réponses du catalogue mises en cache"""
+    return version_catalogue.incrementer()
@@ -2,6 +2,8 @@
 Utilitaire pour obtenir l'icône intelligente d'un produit
 basé sur son nom et ses catégories
 """
+from collections import deque
+from typing import Optional
 
 # Mapping intelligent des mots-clés vers des emojis
 # Organisé par catégorie pour une meilleure reconnaissance
@@ -160,6 +162,80 @@ PRODUCT_ICONS = {
 }
 
 
+ICONE_PAR_DEFAUT = '📦'
+
+
+class _AutomateMotsCles:
+    """
+    Automate d'Aho-Corasick construit une fois pour toute la table PRODUCT_ICONS
+
+    Chaque état final porte le rang (ordre dans PRODUCT_ICONS) de l'emoji le
+    plus prioritaire reconnu à cette position, suffixes compris. Un seul
+    passage sur le texte suffit alors à retrouver l'emoji qu'aurait donné le
+    parcours séquentiel de la table, quel que soit le nombre de mots-clés.
+    """
+
+    def __init__(self, icons: dict):
+        self.emojis = list(icons)
+        self.transitions = [{}]
+        self.echecs = [0]
+        self.rangs = [None]
+
+        for rang, mots in enumerate(icons.values()):
+            for mot in mots:
+                self._ajouter(mot, rang)
+        self._calculer_echecs()
+
+    def _ajouter(self, mot: str, rang: int):
+        etat = 0
+        for caractere in mot:
+            suivant = self.transitions[etat].get(caractere)
+            if suivant is None:
+                suivant = len(self.transitions)
+                self.transitions.append({})
+                self.echecs.append(0)
+                self.rangs.append(None)
+                self.transitions[etat][caractere] = suivant
+            etat = suivant
+        if self.rangs[etat] is None or rang < self.rangs[etat]:
+            self.rangs[etat] = rang
+
+    def _calculer_echecs(self):
+        file = deque(self.transitions[0].values())
+        while file:
+            etat = file.popleft()
+            for caractere, suivant in self.transitions[etat].items():
+                file.append(suivant)
+                repli = self.echecs[etat]
+                while repli and caractere not in self.transitions[repli]:
+                    repli = self.echecs[repli]
+                cible = self.transitions[repli].get(caractere, 0)
+                self.echecs[suivant] = cible if cible != suivant else 0
+                # Hériter du mot-clé le plus prioritaire reconnu en suffixe
+                rang_repli = self.rangs[self.echecs[suivant]]
+                if rang_repli is not None and (self.rangs[suivant] is None or rang_repli < self.rangs[suivant]):
+                    self.rangs[suivant] = rang_repli
+
+    def rechercher(self, texte: str) -> Optional[str]:
+        """Retourne l'emoji le plus prioritaire dont un mot-clé apparaît dans le texte"""
+        transitions, echecs, rangs = self.transitions, self.echecs, self.rangs
+        etat = 0
+        meilleur = None
+        for caractere in texte:
+            while etat and caractere not in transitions[etat]:
+                etat = echecs[etat]
+            etat = transitions[etat].get(caractere, 0)
+            rang = rangs[etat]
+            if rang is not None and (meilleur is None or rang < meilleur):
+                meilleur = rang
+                if rang == 0:
+                    break
+        return self.emojis[meilleur] if meilleur is not None else None
+
+
+_AUTOMATE = _AutomateMotsCles(PRODUCT_ICONS)
+
+
 def get_smart_product_icon(nom: str, description: str = "") -> str:
     """
     Fonction principale pour obtenir l'icône intelligente d'un produit
@@ -177,10 +253,9 @@ def get_smart_product_icon(nom: str, description: str = "") -> str:
     search_text = f"{normalized_name} {normalized_desc}"
 
     # Chercher une correspondance dans le mapping
-    for emoji, keywords in PRODUCT_ICONS.items():
-        for keyword in keywords:
-            if keyword in search_text:
-                return emoji
+    emoji = _AUTOMATE.rechercher(search_text)
+    if emoji is not None:
+        return emoji
 
     # Icône par défaut si aucune correspondance
-    return '📦'
+    return ICONE_PAR_DEFAUT
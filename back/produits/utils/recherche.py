@@ -0,0 +1,70 @@
+"""
+Normalisation du texte pour l'index de recherche des produits
+
+Le même découpage est appliqué aux produits indexés et aux requêtes :
+minuscules, accents retirés, mots vides écartés et pluriels simples
+ramenés au singulier ("Pêches" et "peche" donnent le même terme).
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Tuple
+
+# Poids de chaque champ dans le score d'un terme
+POIDS_CHAMPS = {
+    'nom': 3.0,
+    'fournisseur': 2.0,
+    'origine': 1.5,
+    'description_courte': 1.5,
+    'descripteurs': 1.0,
+    'description_longue': 0.5,
+}
+
+LONGUEUR_MAX_TERME = 64
+
+MOTS_VIDES = frozenset({
+    'a', 'au', 'aux', 'avec', 'ce', 'ces', 'dans', 'de', 'des', 'du', 'en',
+    'et', 'il', 'la', 'le', 'les', 'leur', 'ou', 'par', 'pas', 'pour', 'qui',
+    'sa', 'se', 'ses', 'son', 'sur', 'un', 'une',
+})
+
+_SEPARATEURS = re.compile(r"[^0-9a-z]+")
+
+
+def replier_accents(texte: str) -> str:
+    """Passe en minuscules et retire les accents ('Crème brûlée' -> 'creme brulee')"""
+    decompose = unicodedata.normalize('NFKD', texte.lower())
+    return ''.join(c for c in decompose if not unicodedata.combining(c))
+
+
+def _raciniser(mot: str) -> str:
+    """Ramène les pluriels réguliers au singulier (pommes -> pomme, choux -> chou)"""
+    if len(mot) > 3 and mot[-1] in 'sx' and mot[-2] not in 'sx':
+        return mot[:-1]
+    return mot
+
+
+def extraire_termes(texte: str) -> List[str]:
+    """Découpe un texte en termes normalisés, dans l'ordre d'apparition"""
+    if not texte:
+        return []
+    termes = []
+    for mot in _SEPARATEURS.split(replier_accents(texte)):
+        if len(mot) < 2 or mot in MOTS_VIDES:
+            continue
+        termes.append(_raciniser(mot)[:LONGUEUR_MAX_TERME])
+    return termes
+
+
+def ponderer_termes(champs: Iterable[Tuple[str, str]]) -> Dict[str, float]:
+    """
+    Calcule le poids de chaque terme à partir des couples (champ, texte)
+
+    Un terme présent dans plusieurs champs cumule les poids de ces champs ;
+    les répétitions dans un même champ comptent une seule fois pour ne pas
+    favoriser les descriptions qui répètent les mêmes mots.
+    """
+    poids = {}
+    for champ, texte in champs:
+        for terme in set(extraire_termes(texte)):
+            poids[terme] = poids.get(terme, 0.0) + POIDS_CHAMPS[champ]
+    return poids
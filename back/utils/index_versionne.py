@@ -0,0 +1,101 @@
+"""
+Index en mémoire d'un processus, invalidé entre les workers
+
+Un index (tarifs, zones de livraison...) est construit depuis la base puis
+conservé par le processus avec la version sous laquelle il a été construit.
+La version vit dans le cache partagé par les workers (voir
+utils.version_partagee) : une écriture la fait avancer une fois sa
+transaction validée, et chaque processus reconstruit son index au plus
+DUREE_VERSION_LOCALE plus tard.
+
+Tant que la transaction qui a invalidé l'index n'est pas validée, elle lit
+un index reconstruit à chaque accès et jamais conservé : il contient ses
+propres écritures, que les autres transactions ne doivent pas voir et qui
+disparaissent si elle est annulée.
+"""
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+from django.db import transaction
+
+from .version_partagee import VersionPartagee
+
+T = TypeVar('T')
+
+
+class _Publication:
+    """Rappel on_commit d'une invalidation : oublie l'index et fait avancer la version"""
+    __slots__ = ('index', 'faite')
+
+    def __init__(self, index: 'IndexVersionne'):
+        self.index = index
+        self.faite = False
+
+    def __call__(self):
+        self.faite = True
+        self.index._publier()
+
+
+class IndexVersionne(Generic[T]):
+    """
+    Index construit par `construire()` et partagé par les threads du processus
+
+    Args:
+        cle_version: clé de la version dans le cache partagé
+        construire: lit la base et renvoie l'index (figé une fois construit)
+    """
+
+    def __init__(self, cle_version: str, construire: Callable[[], T]):
+        self.cle_version = cle_version
+        self._version_partagee = VersionPartagee(cle_version)
+        self._construire = construire
+        self._verrou = threading.Lock()
+        self._index: Optional[T] = None
+        self._version = None
+
+    def version(self) -> int:
+        """Version courante, partagée par les workers"""
+        return self._version_partagee.get()
+
+    def invalidation_en_attente(self, using=None) -> bool:
+        """La transaction en cours a invalidé l'index et n'est pas encore validée"""
+        connexion = transaction.get_connection(using)
+        if not connexion.in_atomic_block:
+            return False
+        return any(
+            isinstance(rappel, _Publication) and rappel.index is self and not rappel.faite
+            for _, rappel, *_ in connexion.run_on_commit
+        )
+
+    def get(self) -> T:
+        """Index du processus, reconstruit si la version a changé"""
+        if self.invalidation_en_attente():
+            return self._construire()
+
+        version = self.version()
+        index = self._index
+        if index is not None and self._version == version:
+            return index
+
+        with self._verrou:
+            if self._index is None or self._version != version:
+                self._index = self._construire()
+                self._version = version
+            return self._index
+
+    def invalider(self):
+        """
+        À appeler après une écriture sur les données de l'index
+
+        L'index du processus est oublié et la version avance à la validation
+        de la transaction : une transaction annulée ne laisse aucune trace.
+        """
+        transaction.on_commit(_Publication(self))
+
+    def vider(self):
+        """Oublie l'index du processus sans changer la version (fin de test)"""
+        self._index = None
+
+    def _publier(self):
+        self._index = None
+        self._version_partagee.incrementer()
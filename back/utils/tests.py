@@ -1,3 +1,38 @@
+from itertools import count
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from .index_versionne import IndexVersionne
+from .version_partagee import VersionPartagee
+
+
+class VersionPartageeTests(TestCase):
+    def test_invalidation_vue_par_les_autres_workers(self):
+        # Deux instances de la même version : celle de ce processus et celle d'un autre worker
+        ici, ailleurs = VersionPartagee('test:version'), VersionPartagee('test:version')
+        version = ailleurs.get()
+
+        nouvelle = ici.incrementer()
+        self.assertNotEqual(nouvelle, version)
+        self.assertEqual(ici.get(), nouvelle)
+        # L'autre worker garde sa version au plus DUREE_VERSION_LOCALE, puis relit le cache partagé
+        self.assertEqual(ailleurs.get(), version)
+        with mock.patch('utils.version_partagee.DUREE_VERSION_LOCALE', 0):
+            self.assertEqual(ailleurs.get(), nouvelle)
+
+
+class IndexVersionneTests(TestCase):
+    def test_index_reconstruit_dans_les_autres_workers(self):
+        constructions = count(1)
+        ici = IndexVersionne('test:index:version', lambda: next(constructions))
+        ailleurs = IndexVersionne('test:index:version', lambda: next(constructions))
+        self.assertEqual((ici.get(), ailleurs.get()), (1, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ici.invalider()
+
+        self.assertEqual(ici.get(), 3)
+        with mock.patch('utils.version_partagee.DUREE_VERSION_LOCALE', 0):
+            self.assertEqual(ailleurs.get(), 4)
+            self.assertEqual(ailleurs.get(), 4)
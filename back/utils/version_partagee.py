@@ -0,0 +1,55 @@
+"""
+Version d'un ensemble de données, partagée entre les workers
+
+Les versions sont stockées dans le cache CACHE_VERSIONS (voir CACHES dans
+les réglages), partagé par tous les workers : une écriture validée dans un
+processus est vue par tous les autres (catalogue, index en mémoire).
+"""
+import time
+
+from django.core.cache import caches
+
+CACHE_VERSIONS = 'versions'
+
+# Durée (s) pendant laquelle un processus réutilise la version lue sans
+# interroger le cache partagé : délai maximal avant qu'un autre worker voie
+# une invalidation
+DUREE_VERSION_LOCALE = 1.0
+
+
+class VersionPartagee:
+    """
+    Version d'un ensemble de données, partagée entre les workers
+
+    Une nouvelle version est un horodatage en nanosecondes écrit tel quel
+    (pas d'incrément lecture-écriture) : deux invalidations simultanées
+    donnent deux versions distinctes, quel que soit le cache utilisé.
+    """
+
+    def __init__(self, cle: str):
+        self.cle = cle
+        # (version, instant de lecture) du processus
+        self._locale = None
+
+    def get(self) -> int:
+        """Version courante (initialisée si absente du cache partagé)"""
+        maintenant = time.monotonic()
+        locale = self._locale
+        if locale is not None and maintenant - locale[1] < DUREE_VERSION_LOCALE:
+            return locale[0]
+
+        cache = caches[CACHE_VERSIONS]
+        version = cache.get(self.cle)
+        if version is None:
+            version = time.time_ns()
+            if not cache.add(self.cle, version, timeout=None):
+                version = cache.get(self.cle, version)
+        self._locale = (version, maintenant)
+        return version
+
+    def incrementer(self) -> int:
+        """Publie une nouvelle version, vue aussitôt par ce processus"""
+        version = time.time_ns()
+        caches[CACHE_VERSIONS].set(self.cle, version, timeout=None)
+        self._locale = (version, time.monotonic())
+        return version